@@ -5,23 +5,25 @@ This Python3 module implements a library to access and manage resources on a one
 Licensed under the BSD 3-Clause License. See the LICENSE file for further details.
 
 """
-import json, uuid
+import uuid, threading
 
 import onem2mlib.constants as CON
 import onem2mlib.exceptions
 import onem2mlib.utilities as UT
 import onem2mlib.marshalling as M
 import onem2mlib.mcarequests as MCA
+import onem2mlib.transport as TRN
 import onem2mlib.internal as INT
 import onem2mlib.exceptions as EXC
 import onem2mlib.notifications as NOT
+import onem2mlib.cache
 
 
 
-__all__ = [	'AccessControlPolicy', 'AccessControlRule', 'AE', 'Container',
-			'ContentInstance', 'CSEBase', 'Group', 'RemoteCSE', 'Subscription', 
+__all__ = [	'AccessControlPolicy', 'AccessControlRule', 'AE', 'BatchNotify', 'Container',
+			'ContentInstance', 'CSEBase', 'EventNotificationCriteria', 'Group', 'RateLimit', 'RemoteCSE', 'Subscription', 
 			'ResourceBase', 'Session',
-			'constants', 'exceptions', 'utilities', 'notifications',
+			'constants', 'exceptions', 'utilities', 'notifications', 'transport',
 			'retrieveResourceFromCSE']
 
 
@@ -34,7 +36,7 @@ class Session:
 	about the current session, such as the CSE endpoint, credentials, desired encoding, etc.
 	"""
 
-	def __init__(self, address,  originator, encoding=CON.Encoding_JSON):
+	def __init__(self, address,  originator, encoding=CON.Encoding_JSON, poolSize=CON.NETWORK_POOL_SIZE, maxConnectionsPerHost=CON.NETWORK_MAX_CONNECTIONS_PER_HOST, idleTimeout=CON.NETWORK_IDLE_TIMEOUT, maxParallelRequests=CON.NETWORK_MAX_PARALLEL_REQUESTS, cacheSize=CON.CACHE_SIZE, cacheTTL=CON.CACHE_TTL, transport=None):
 		"""
 		Initialize a Session object. 
 
@@ -44,11 +46,31 @@ class Session:
 		Args:
 
 		- *address*: String. The URL of the CSE host to connect to. This includes the protocol, hostname, 
-			port number, and any API prefix etc.
+			port number, and any API prefix etc. Supported protocols are *http*, *https*, *http+unix*, *coap*, *mqtt*,
+			*ws* and *wss*. A CSE in the same process is used with a `onem2mlib.transport.LocalTransport` as the
+			*transport*. See `onem2mlib.transport` for the address formats.
 		- *originator*: String. The originator for identification in access control policies.
 		- *encoding*: Integer. The encoding of request content. Optional, the default is
-			`onem2mlib.constants.Encoding_JSON`. Providing a wrong encoding will throw a `onem2mlib.exceptions.NotSupportedError`
-			exception.
+			`onem2mlib.constants.Encoding_JSON`. Providing a wrong encoding, or `onem2mlib.constants.Encoding_CBOR` without
+			the *cbor2* module, will throw a `onem2mlib.exceptions.NotSupportedError` exception.
+		- *poolSize*: Integer. The number of per-host connection pools that are cached by this session.
+			Optional, the default is `onem2mlib.constants.NETWORK_POOL_SIZE`.
+		- *maxConnectionsPerHost*: Integer. The maximum number of keep-alive connections per host that
+			are kept for re-use. Optional, the default is `onem2mlib.constants.NETWORK_MAX_CONNECTIONS_PER_HOST`.
+		- *idleTimeout*: Integer. The number of seconds after which idle pooled connections are closed.
+			*None* or 0 disables the timeout. Optional, the default is `onem2mlib.constants.NETWORK_IDLE_TIMEOUT`.
+		- *maxParallelRequests*: Integer. The maximum number of requests that are sent in parallel, for example
+			when retrieving the resources of a discovery. 1 disables parallel requests. This number should not be 
+			larger than *maxConnectionsPerHost*. Optional, the default is `onem2mlib.constants.NETWORK_MAX_PARALLEL_REQUESTS`.
+		- *cacheSize*: Integer. The maximum number of resources that are kept in the session's resource cache. 
+			0 disables the cache. Optional, the default is `onem2mlib.constants.CACHE_SIZE`.
+		- *cacheTTL*: Integer. The number of seconds for which a cached resource is returned without contacting
+			the CSE. Optional, the default is `onem2mlib.constants.CACHE_TTL`.
+		- *transport*: `onem2mlib.transport.Transport`. The protocol binding that is used to send the requests.
+			Optional, the default is chosen by the protocol of the *address*, see `onem2mlib.transport`. Providing an
+			address with an unsupported protocol will throw a `onem2mlib.exceptions.NotSupportedError` exception.
+
+		The arguments *poolSize*, *maxConnectionsPerHost* and *idleTimeout* only apply to http.
 		"""
 		self.address = address
 		""" String. The URL of the CSE host to connect to. The address includes the protocol, hostname, 
@@ -61,23 +83,94 @@ class Session:
 			It can be a domain, an originatorID, the string "all", or a role-ID. """
 
 		self.encoding = encoding
-		"""	Integer, either `onem2mlib.constants.Encoding_XML` or `onem2mlib.constants.Encoding_JSON`.
-			It specifies the type of encoding for requests between the AE and the CSE. """
-		if self.encoding not in [CON.Encoding_XML, CON.Encoding_JSON]:
+		"""	Integer, either `onem2mlib.constants.Encoding_XML`, `onem2mlib.constants.Encoding_JSON` or
+			`onem2mlib.constants.Encoding_CBOR`. It specifies the type of encoding for requests between the AE and the CSE. """
+		if self.encoding not in [CON.Encoding_XML, CON.Encoding_JSON, CON.Encoding_CBOR]:
 			raise EXC.NotSupportedError('Unsupported encoding: ' + str(self.encoding))
+		if self.encoding == CON.Encoding_CBOR and INT.cbor2 is None:
+			raise EXC.NotSupportedError('The CBOR encoding requires the cbor2 module.')
 
 		if not self.originator:
 			raise EXC.AuthenticationError('Missing accessControlOriginator.')
 
+		self.transport = transport if transport else TRN._transportForAddress(self.address)
+		""" `onem2mlib.transport.Transport`. The protocol binding that is used to send the requests to the CSE. """
+
+		self.poolSize = poolSize
+		""" Integer. The number of per-host connection pools that are cached by this session. """
+
+		self.maxConnectionsPerHost = maxConnectionsPerHost
+		""" Integer. The maximum number of keep-alive connections per host that are kept for re-use. """
+
+		self.idleTimeout = idleTimeout
+		""" Integer. The number of seconds after which idle pooled connections are closed, or None. """
+
+		self.maxParallelRequests = maxParallelRequests
+		""" Integer. The maximum number of requests that are sent in parallel. """
+
+		self.cacheSize = cacheSize
+		"""
+		Integer. The maximum number of resources in the resource cache, or 0 when the cache is disabled.
+
+		When enabled, the cache holds a single instance for each resource that was retrieved, created
+		or updated through this session. `onem2mlib.retrieveResourceFromCSE`() and the *find...*() methods
+		(e.g. `onem2mlib.AE.findContainer`()) return the cached instance for *cacheTTL* seconds without
+		contacting the CSE. Afterwards the resource is retrieved again, and the cached instance is only
+		updated when its *stateTag* or *lastModifiedTime* have changed. The least recently used resources
+		are removed from the cache when it is full.
+
+		Deleting a resource removes it and its cached child resources from the cache. Creating or deleting
+		a resource, or receiving a notification for a subscribed resource, marks the affected resources
+		for revalidation. Changes that are made by other applications to resources that are not subscribed 
+		to are only seen after *cacheTTL* seconds.
+		"""
+
+		self.cacheTTL = cacheTTL
+		""" Integer. The number of seconds for which a cached resource is returned without contacting the CSE. """
+
+		# Capabilities of the CSE, determined at runtime. None means unknown.
+		self._supportsResultContent = None
+		self._supportsLevel = None
+
+		# The pooled http connection. It is created with the first request, see onem2mlib.transport.
+		self._connection = None
+		self._connectionLock = threading.Lock()
+		self._lastRequestTime = 0
+
+		# The resource cache, see cacheSize
+		self._cache = onem2mlib.cache.ResourceCache(self)
+
 
 	def __str__(self):
 		result = 'Session:\n'
 		result += INT.strResource('address', None, self.address)
 		result += INT.strResource('originator', None, self.originator)
 		result += INT.strResource('encoding', None, self.encoding)
+		result += INT.strResource('transport', None, self.transport.__class__.__name__)
+		result += INT.strResource('poolSize', None, self.poolSize)
+		result += INT.strResource('maxConnectionsPerHost', None, self.maxConnectionsPerHost)
+		result += INT.strResource('idleTimeout', None, self.idleTimeout)
+		result += INT.strResource('maxParallelRequests', None, self.maxParallelRequests)
+		result += INT.strResource('cacheSize', None, self.cacheSize)
+		result += INT.strResource('cacheTTL', None, self.cacheTTL)
 		return result
 
 
+	def close(self):
+		"""
+		Close all pooled connections of this session. The session can still be used afterwards,
+		new connections are then established with the next request.
+		"""
+		MCA.closeConnection(self)
+
+
+	def clearCache(self):
+		"""
+		Remove all resources from the resource cache of this session.
+		"""
+		self._cache.clear()
+
+
 
 ###############################################################################
 
@@ -272,7 +365,7 @@ class ResourceBase:
 		return self.createInCSE()
 
 
-	def discover(self, filter, filterOperation=CON.Dsc_AND):
+	def discover(self, filter, filterOperation=CON.Dsc_AND, limit=None, offset=None, level=None):
 		"""
 		Discover a rsource on the CSE, starting with the resource as a root for
 		discovery.
@@ -283,20 +376,52 @@ class ResourceBase:
 		*onem2mlib.utilties.new...FilterCriteria* functions.
 		- *filterOperation*. A boolean value that Indicates the logical operation (AND/OR) 
 		to be used for different condition tags. The default value is logical AND.
+		- *limit*: Integer. The maximum number of resources to return. Optional.
+		- *offset*: Integer. The number of found resources to skip before returning results. Optional.
+		- *level*: Integer. The maximum number of levels below this resource to search for resources, 
+		e.g. 1 restricts the discovery to the direct child resources. Optional, the default is to search
+		the whole resource tree below this resource. If the CSE doesn't support this filter criteria then
+		the level is checked by the library instead.
 
-		The method returns a list of found resources, or an empty list.
+		The method returns a list of found resources, or an empty list. The found resources are
+		retrieved in parallel, see `onem2mlib.Session.maxParallelRequests`.
 
 		**Note**
 
 		Currently, only *label* and *resoureType* are supported in filters.
 		"""
-		rids = MCA.discoverInCSE(self, filter=filter, filterOperation=filterOperation)
+		rids = INT._discoverResourceIDs(self, filter=filter, filterOperation=filterOperation, limit=limit, offset=offset, level=level)
 		if rids is None:
 			return []
-		return [ retrieveResourceFromCSE(self, id) for id in rids ]
+		return INT._parallelMap(self.session, lambda id: retrieveResourceFromCSE(self, id), rids)
+
+
+	def iterDiscover(self, filter, filterOperation=CON.Dsc_AND, pageSize=CON.Dsc_def_pageSize, level=None):
+		"""
+		Discover resources on the CSE, starting with the resource as a root for
+		discovery. In contrast to `onem2mlib.ResourceBase.discover`() this method returns 
+		a generator that fetches the found resources page by page, and it yields the resources
+		of one page while the next page is fetched in the background. This way only one page 
+		of resources is held in memory at a time.
 
+		Args:
+
+		- *filter*, *filterOperation*, *level*: See `onem2mlib.ResourceBase.discover`().
+		- *pageSize*: Integer. The number of resources that are fetched per request. Optional,
+		the default is `onem2mlib.constants.Dsc_def_pageSize`.
+
+		Resources that cannot be retrieved are skipped.
+
+		**Note**
 
-	def subscribe(self, callback=None):
+		The CSE must support the *offset* filter criteria. Pages are requested until the CSE
+		returns an empty page, so a CSE that caps or ignores the *limit* still delivers all
+		resources. If it ignores the *offset* then the first response is treated as the whole result.
+		"""
+		return INT._iterDiscover(self, filter, filterOperation, pageSize, level)
+
+
+	def subscribe(self, callback=None, batchNotify=None, batchCallback=None, rateLimit=None, latestNotify=None, pendingNotification=None, eventNotificationCriteria=None):
 		"""
 		Create a &lt;subscription> to resource and receive notifications. For this, the notification
 		sub-module must be enabled, ie. `onem2mlib.notifications.setupNotifications`() must have
@@ -312,6 +437,21 @@ class ResourceBase:
 		notification is received for the subscription. If this argument is ommitted then the
 		default callback function, provided with `onem2mlib.notifications.setupNotifiations`(),
 		is called instead.
+		- *batchNotify*: An optional `onem2mlib.BatchNotify` object. If present then the CSE collects
+		notifications and sends them in batches.
+		- *batchCallback*: An optional reference to a callback function of the form ``function(resources)``.
+		If present then this function is called with the list of all resources of a received notification
+		instead of calling *callback* for every single resource. This is useful together with *batchNotify*.
+		- *rateLimit*: An optional `onem2mlib.RateLimit` object. If present then the CSE sends not more
+		than the given number of notifications in a time window.
+		- *latestNotify*: Optional Boolean. If True then the CSE sends only the latest of the notifications
+		that are buffered, e.g. because of the *rateLimit*.
+		- *pendingNotification*: Optional Integer, one of `onem2mlib.constants.Sub_pn_sendLatest` or 
+		`onem2mlib.constants.Sub_pn_sendAllPending`. It determines which of the notifications that are 
+		pending while the subscriber is unreachable are sent afterwards.
+		- *eventNotificationCriteria*: An optional `onem2mlib.EventNotificationCriteria` object. If present
+		then the CSE sends only notifications for events that match the criteria, e.g. only for the
+		creation of child resources.
 
 		The method returns a Boolean indicating whether the subscription was successfull.
 
@@ -326,7 +466,7 @@ class ResourceBase:
 			raise EXC.NotSupportedError('Subscription not supported for this resource type')
 		if not NOT.isNotificationEnabled():
 			return False
-		return NOT.addSubscription(self, callback)
+		return NOT.addSubscription(self, callback, batchNotify=batchNotify, batchCallback=batchCallback, rateLimit=rateLimit, latestNotify=latestNotify, pendingNotification=pendingNotification, eventNotificationCriteria=eventNotificationCriteria)
 
 
 	def unsubscribe(self):
@@ -339,7 +479,7 @@ class ResourceBase:
 
 		The method returns a Boolean indicating whether the subscription was successfull.
 		"""
-		if self.type not in NOT._subscriptionResources:
+		if self.type not in NOT._allowedSubscriptionResources:
 			raise EXC.NotSupportedError('Subscription not supported for this resource type')
 		return NOT.removeSubscription(self)
 
@@ -377,18 +517,23 @@ class ResourceBase:
 
 	def _parseResponse(self, response):
 		#print(response.text)
+		return self._parseDocument(INT.decodeResponse(response, self.session.encoding))
+
+
+	# Parse an already decoded XML structure or JSON dictionary, see INT.decodeResponse()
+	def _parseDocument(self, document):
 		if self.session.encoding == CON.Encoding_XML:
-			return self._parseXML(INT.responseToXML(response))
-		elif self.session.encoding == CON.Encoding_JSON:
-			return self._parseJSON(response.json())
+			return self._parseXML(document)
+		elif self.session.encoding in INT.jsonEncodings:
+			return self._parseJSON(document)
 		raise EXC.NotSupportedError('Encoding not supported: ' + str(self.session.encoding))
 
 
 	def _createContent(self, isUpdate=False):
 		if self.session.encoding == CON.Encoding_XML:
 			return INT.xmlToString(self._createXML(isUpdate))
-		elif self.session.encoding == CON.Encoding_JSON:
-			return json.dumps(self._createJSON(isUpdate))
+		elif self.session.encoding in INT.jsonEncodings:
+			return INT.encodeJSON(self._createJSON(isUpdate), self.session.encoding)
 		raise EXC.NotSupportedError('Encoding not supported: ' + str(self.session.encoding))
 
 
@@ -661,9 +806,8 @@ class RemoteCSE(ResourceBase):
 			raise EXC.CSEOperationError('Missing PointOfAccess of remote CSE.')
 
 		if session is None:
-			nSession = Session(self.pointOfAccess[0], self.session.originator, self.session.encoding)
-		else:
-			nSession = Session(self.pointOfAccess[0], session.originator, session.encoding)
+			session = self.session
+		nSession = Session(self.pointOfAccess[0], session.originator, session.encoding, session.poolSize, session.maxConnectionsPerHost, session.idleTimeout, session.maxParallelRequests, session.cacheSize, session.cacheTTL)
 		return CSEBase(nSession, self.cseID, instantly=instantly)
 
 
@@ -823,6 +967,217 @@ class AccessControlRule():
 ###############################################################################
 
 
+class BatchNotify():
+	"""
+	This class provides the structure for the *batchNotify* attribute of &lt;subscription> 
+	resources. It indicates that the subscriber wants to receive batches of notifications rather
+	than receiving them one at a time. It contains:
+
+	- *number* : The number of notifications to be batched for delivery. 
+	- *duration* : The maximum time period, as an xs:duration string (e.g. "PT10S"), that notifications
+		are collected before they are sent, even when less than *number* notifications are collected.
+	"""
+
+	def __init__(self, number=None, duration=None):
+		"""
+		Initialize the BatchNotify. 
+
+		Args:
+
+		- *number*: The number of notifications per batch.
+		- *duration*: The maximum duration of a batch.
+		"""
+
+		self.number = number
+		""" Integer. The number of notifications per batch. R/W. """
+		
+		self.duration = duration
+		""" String. The maximum time period for collecting the notifications of a batch. R/W. """
+
+	def __str__(self):
+		result =  '\t  batchNotify(bn):\n'
+		result += INT.strResource('    ' + 'number', 'num', self.number)
+		result += INT.strResource('    ' + 'duration', 'dur', self.duration)
+		return result
+
+
+	def _parseXML(self, root):
+		M._batchNotify_parseXML(self, root)
+
+
+	def _createXML(self, root):
+		M._batchNotify_createXML(self, root)
+
+
+	def _parseJSON(self, jsn):
+		M._batchNotify_parseJSON(self, jsn)
+
+
+	def _createJSON(self):
+		return M._batchNotify_createJSON(self)
+
+
+###############################################################################
+
+
+class RateLimit():
+	"""
+	This class provides the structure for the *rateLimit* attribute of &lt;subscription> 
+	resources. It indicates that the subscriber wants to limit the rate at which it receives
+	notifications. It contains:
+
+	- *maxNrOfNotify* : The maximum number of notifications that are sent in a time window.
+	- *timeWindow* : The duration of the time window, as an xs:duration string (e.g. "PT1S").
+	"""
+
+	def __init__(self, maxNrOfNotify=None, timeWindow=None):
+		"""
+		Initialize the RateLimit. 
+
+		Args:
+
+		- *maxNrOfNotify*: The maximum number of notifications per time window.
+		- *timeWindow*: The duration of the time window.
+		"""
+
+		self.maxNrOfNotify = maxNrOfNotify
+		""" Integer. The maximum number of notifications per time window. R/W. """
+		
+		self.timeWindow = timeWindow
+		""" String. The duration of the time window. R/W. """
+
+	def __str__(self):
+		result =  '\t  rateLimit(rl):\n'
+		result += INT.strResource('    ' + 'maxNrOfNotify', 'mnn', self.maxNrOfNotify)
+		result += INT.strResource('    ' + 'timeWindow', 'tww', self.timeWindow)
+		return result
+
+
+	def _parseXML(self, root):
+		M._rateLimit_parseXML(self, root)
+
+
+	def _createXML(self, root):
+		M._rateLimit_createXML(self, root)
+
+
+	def _parseJSON(self, jsn):
+		M._rateLimit_parseJSON(self, jsn)
+
+
+	def _createJSON(self):
+		return M._rateLimit_createJSON(self)
+
+
+###############################################################################
+
+
+class EventNotificationCriteria():
+	"""
+	This class provides the structure for the *eventNotificationCriteria* attribute of 
+	&lt;subscription> resources. It contains the conditions for the events for which the CSE
+	sends notifications. All conditions must be met. Events that don't match the criteria
+	are filtered by the CSE. It contains:
+
+	- *notificationEventType* : A list of event types, one or more of the constants 
+	`onem2mlib.constants.Sub_net_updateResource`, `onem2mlib.constants.Sub_net_deleteResource`,
+	`onem2mlib.constants.Sub_net_createDirectChild`, or `onem2mlib.constants.Sub_net_deleteDirectChild`.
+	- *createdBefore*, *createdAfter* : Timestamps that limit the creationTime of a resource.
+	- *modifiedSince*, *unmodifiedSince* : Timestamps that limit the lastModifiedTime of a resource.
+	- *stateTagSmaller*, *stateTagBigger* : Integers that limit the stateTag of a resource.
+	- *expireBefore*, *expireAfter* : Timestamps that limit the expirationTime of a resource.
+	- *sizeAbove*, *sizeBelow* : Integers that limit the contentSize of a &lt;contentInstance>.
+	- *contentType* : A list of content types (MIME types) of &lt;contentInstance> resources.
+	- *attribute* : A list of attribute names. Only changes of these attributes are notified.
+	"""
+
+	def __init__(self, notificationEventType=[], createdBefore=None, createdAfter=None, modifiedSince=None, unmodifiedSince=None, 
+				 stateTagSmaller=None, stateTagBigger=None, expireBefore=None, expireAfter=None, sizeAbove=None, sizeBelow=None,
+				 contentType=[], attribute=[]):
+		"""
+		Initialize the EventNotificationCriteria. 
+
+		Args:
+
+		- All arguments initialize the attributes of the same name. All criteria are optional.
+		"""
+
+		self.notificationEventType = notificationEventType
+		""" List of Integers. The event types to be notified. R/W. """
+
+		self.createdBefore = createdBefore
+		""" String. Notify only resources created before this timestamp. R/W. """
+
+		self.createdAfter = createdAfter
+		""" String. Notify only resources created after this timestamp. R/W. """
+
+		self.modifiedSince = modifiedSince
+		""" String. Notify only resources modified since this timestamp. R/W. """
+
+		self.unmodifiedSince = unmodifiedSince
+		""" String. Notify only resources not modified since this timestamp. R/W. """
+
+		self.stateTagSmaller = stateTagSmaller
+		""" Integer. Notify only resources with a smaller stateTag. R/W. """
+
+		self.stateTagBigger = stateTagBigger
+		""" Integer. Notify only resources with a bigger stateTag. R/W. """
+
+		self.expireBefore = expireBefore
+		""" String. Notify only resources that expire before this timestamp. R/W. """
+
+		self.expireAfter = expireAfter
+		""" String. Notify only resources that expire after this timestamp. R/W. """
+
+		self.sizeAbove = sizeAbove
+		""" Integer. Notify only &lt;contentInstance> resources with a bigger contentSize. R/W. """
+
+		self.sizeBelow = sizeBelow
+		""" Integer. Notify only &lt;contentInstance> resources with a smaller contentSize. R/W. """
+
+		self.contentType = contentType
+		""" List of Strings. Notify only &lt;contentInstance> resources with one of these content types. R/W. """
+
+		self.attribute = attribute
+		""" List of Strings. Notify only changes of these attributes. R/W. """
+
+	def __str__(self):
+		result =  '\t  eventNotificationCriteria(enc):\n'
+		result += INT.strResource('    ' + 'notificationEventType', 'net', self.notificationEventType)
+		result += INT.strResource('    ' + 'createdBefore', 'crb', self.createdBefore)
+		result += INT.strResource('    ' + 'createdAfter', 'cra', self.createdAfter)
+		result += INT.strResource('    ' + 'modifiedSince', 'ms', self.modifiedSince)
+		result += INT.strResource('    ' + 'unmodifiedSince', 'us', self.unmodifiedSince)
+		result += INT.strResource('    ' + 'stateTagSmaller', 'sts', self.stateTagSmaller)
+		result += INT.strResource('    ' + 'stateTagBigger', 'stb', self.stateTagBigger)
+		result += INT.strResource('    ' + 'expireBefore', 'exb', self.expireBefore)
+		result += INT.strResource('    ' + 'expireAfter', 'exa', self.expireAfter)
+		result += INT.strResource('    ' + 'sizeAbove', 'sza', self.sizeAbove)
+		result += INT.strResource('    ' + 'sizeBelow', 'szb', self.sizeBelow)
+		result += INT.strResource('    ' + 'contentType', 'cty', self.contentType)
+		result += INT.strResource('    ' + 'attribute', 'atr', self.attribute)
+		return result
+
+
+	def _parseXML(self, root):
+		M._eventNotificationCriteria_parseXML(self, root)
+
+
+	def _createXML(self, root):
+		M._eventNotificationCriteria_createXML(self, root)
+
+
+	def _parseJSON(self, jsn):
+		M._eventNotificationCriteria_parseJSON(self, jsn)
+
+
+	def _createJSON(self):
+		return M._eventNotificationCriteria_createJSON(self)
+
+
+###############################################################################
+
+
 class AE(ResourceBase):
 	"""
 	This class implements the oneM2M &lt;AE> resource. 
@@ -1081,11 +1436,12 @@ class Container(ResourceBase):
 	def addContent(self, value, labels=[]):
 		"""
 		Add a new value to a container. The value is automatically converted to its string
-		representation.
+		representation, except for bytes with the `onem2mlib.constants.Encoding_CBOR` encoding,
+		which are sent as binary content.
 		This is a convenience function that actually creates a new&lt;contentInstance> resource
 		for that value in the &lt;container>. returns the new *ContentInstance* object, or None.
 		"""
-		if not isinstance(value, str):
+		if not isinstance(value, str) and not (isinstance(value, bytes) and self.session.encoding == CON.Encoding_CBOR):
 			value = str(value)
 		return ContentInstance(self, content=value, labels=labels)
 
@@ -1392,8 +1748,8 @@ class Group(ResourceBase):
 		if not self._isValidFanOutPoint: return None
 		if self.session.encoding == CON.Encoding_XML:
 			body = INT.xmlToString(resource._createXML(isUpdate=True))
-		elif self.session.encoding == CON.Encoding_JSON:
-			body = json.dumps(resource._createJSON(isUpdate=True))
+		elif self.session.encoding in INT.jsonEncodings:
+			body = INT.encodeJSON(resource._createJSON(isUpdate=True), self.session.encoding)
 		else:
 			raise EXC.NotSupportedError('Encoding not supported: ' + str(self.session.encoding))
 		response = MCA.update(self.session, self.fanOutPoint, resource.type, body)
@@ -1409,8 +1765,8 @@ class Group(ResourceBase):
 		if not self._isValidFanOutPoint: return None
 		if self.session.encoding == CON.Encoding_XML:
 			body = INT.xmlToString(resource._createXML(isUpdate=True))
-		elif self.session.encoding == CON.Encoding_JSON:
-			body = json.dumps(resource._createJSON(isUpdate=True))
+		elif self.session.encoding in INT.jsonEncodings:
+			body = INT.encodeJSON(resource._createJSON(isUpdate=True), self.session.encoding)
 		else:
 			raise EXC.NotSupportedError('Encoding not supported: ' + str(self.session.encoding))
 		response = MCA.create(self.session, self.fanOutPoint, resource.type, body)
@@ -1437,15 +1793,11 @@ class Group(ResourceBase):
 		# Get the resources from the answer
 		if response and response.status_code == 200:
 			if self.session.encoding == CON.Encoding_XML:
-				rsps = INT.getElements(INT.responseToXML(response), 'pc')	# deep-search the tree for all <pc> elements
+				rsps = INT.getElements(INT.decodeResponse(response, self.session.encoding), 'pc')	# deep-search the tree for all <pc> elements
 				if not rsps or not len(rsps) > 0: return None
 				resources = []
 				for rsp in rsps: # each <pc>  contains a onem2m resource 
-
-					# The following is a hack to get a stand-alone XML tree. Otherwise the XML parser always only
-					# finds the first resource in the whole response tree.
-					# Take the XML as a string and parse it again.
-					xml = INT.stringToXML(INT.xmlToString(rsp[0]))
+					xml = rsp[0]
 					tag = INT.xmlQualifiedName(xml, True)
 					# The resources get the group as a parent to pass on the Session.
 					# Yes, this is halfway wrong, it will not result in a fully qualified path later.
@@ -1455,8 +1807,8 @@ class Group(ResourceBase):
 						resource._parseXML(xml)
 						resources.append(resource)
 				return resources
-			elif self.session.encoding == CON.Encoding_JSON:
-				elements = INT.getALLSubElementsJSON(response.json(), 'm2m:pc')
+			elif self.session.encoding in INT.jsonEncodings:
+				elements = INT.getALLSubElementsJSON(INT.decodeResponse(response, self.session.encoding), 'm2m:pc')
 				resources = []
 				for elem in elements:
 					keyWithoutPrefix = list(elem.keys())[0].replace('m2m:','')
@@ -1499,7 +1851,7 @@ class Subscription(ResourceBase):
 	is changed.
 	"""
 
-	def __init__(self, parent=None, resourceName=None, resourceID=None, notificationURI=[], labels = [], instantly=True):
+	def __init__(self, parent=None, resourceName=None, resourceID=None, notificationURI=[], labels = [], batchNotify=None, rateLimit=None, latestNotify=None, pendingNotification=None, eventNotificationCriteria=None, instantly=True):
 		"""
 		Initialize the &lt;subscription> resource. 
 
@@ -1509,6 +1861,13 @@ class Subscription(ResourceBase):
 			will be created.
 		- *notificationURI*: A list consisting of one or more targets that the Hosting CSE
 		shall send notifications to.
+		- *batchNotify*: An optional `onem2mlib.BatchNotify` object to receive notifications in batches.
+		- *rateLimit*: An optional `onem2mlib.RateLimit` object to limit the rate of notifications.
+		- *latestNotify*: Optional Boolean. If True then only the latest of buffered notifications is sent.
+		- *pendingNotification*: Optional Integer. Which of the pending notifications are sent after a
+		period of unreachability.
+		- *eventNotificationCriteria*: An optional `onem2mlib.EventNotificationCriteria` object that 
+		determines the events for which notifications are sent.
 		- *instantly*: The resource will be instantly retrieved from or created on the CSE. This might throw
 			a `onem2mlib.exceptions.CSEOperationError` exception in case of an error.
 		- All other arguments initialize the status variables of the same name in
@@ -1541,7 +1900,14 @@ class Subscription(ResourceBase):
 		is deleted.
 		"""
 
-		self.latestNotify = None
+		self.eventNotificationCriteria = eventNotificationCriteria
+		"""
+		A `onem2mlib.EventNotificationCriteria` object, or None. This attribute indicates the events
+		of the subscribed-to resource for which notifications are sent. If it is None then the CSE
+		only sends notifications for updates of the subscribed-to resource.
+		"""
+
+		self.latestNotify = latestNotify
 		"""
 		This attribute indicates if the subscriber wants only the latest notification. 
 		If multiple notifications of this subscription are buffered, and if the value of
@@ -1569,6 +1935,28 @@ class Subscription(ResourceBase):
 		or as a URL with one of oneM2M supported protocol binding, e.g. http.
 		"""
 
+		self.batchNotify = batchNotify
+		"""
+		A `onem2mlib.BatchNotify` object, or None. This attribute indicates that the subscriber wants
+		to receive batches of notifications rather than receiving them one at a time. 
+		"""
+
+		self.rateLimit = rateLimit
+		"""
+		A `onem2mlib.RateLimit` object, or None. This attribute indicates that the subscriber wants
+		to limit the rate at which it receives notifications. Notifications that exceed the limit 
+		are buffered by the CSE.
+		"""
+
+		self.pendingNotification = pendingNotification
+		"""
+		This attribute indicates how the CSE handles notifications that are pending while the 
+		subscriber is not reachable. The allowed values are one of the following constants, or None:
+
+		- Sub_pn_sendLatest
+		- Sub_pn_sendAllPending
+		"""
+
 
 		# TODO: determine NotificationURi automatically
 		#if not self.notificationURI or len(self.notificationURI) == 0:
@@ -1584,6 +1972,8 @@ class Subscription(ResourceBase):
 		result += super().__str__()
 		result += INT.strResource('notificationURI', 'nu', self.notificationURI)
 		result += INT.strResource('notificationContentType', 'nct', self.notificationContentType)
+		if self.eventNotificationCriteria:
+			result += str(self.eventNotificationCriteria)
 		if self.expirationCounter != -1:
 			result += INT.strResource('expirationCounter', 'exc', self.expirationCounter)
 		if self.latestNotify:
@@ -1594,6 +1984,12 @@ class Subscription(ResourceBase):
 			result += INT.strResource('notificationForwardingURI', 'nfu', self.notificationForwardingURI)
 		if self.subscriberURI:
 			result += INT.strResource('subscriberURI', 'su', self.subscriberURI)
+		if self.batchNotify:
+			result += str(self.batchNotify)
+		if self.rateLimit:
+			result += str(self.rateLimit)
+		if self.pendingNotification:
+			result += INT.strResource('pendingNotification', 'pn', self.pendingNotification)
 		return result
 
 
@@ -1617,10 +2013,15 @@ class Subscription(ResourceBase):
 		super()._copy(resource)
 		self.notificationURI = resource.notificationURI
 		self.notificationContentType = resource.notificationContentType
+		self.eventNotificationCriteria = resource.eventNotificationCriteria
 		self.expirationCounter = resource.expirationCounter
 		self.latestNotify = resource.latestNotify
 		self.groupID = resource.groupID
 		self.notificationForwardingURI = resource.notificationForwardingURI
+		self.subscriberURI = resource.subscriberURI
+		self.batchNotify = resource.batchNotify
+		self.rateLimit = resource.rateLimit
+		self.pendingNotification = resource.pendingNotification
 
 
 
@@ -1640,21 +2041,11 @@ def retrieveResourceFromCSE(parent, resourceID):
 	"""
 	if not parent.session or not resourceID or not len(resourceID):
 		return False
-	result = None
-	response = MCA.get(parent.session, resourceID)
-	if response and response.status_code == 200:
-		ty = INT.getTypeFromResponse(response, parent.session.encoding)
-		if parent.session.encoding == CON.Encoding_XML:
-			root = INT.responseToXML(response)
-			result = INT._newResourceFromRID(ty, resourceID, parent)
-			if result:
-				result._parseXML(root)
-		elif parent.session.encoding == CON.Encoding_JSON:
-			jsn = response.json()
-			result = INT._newResourceFromRID(ty, resourceID, parent)
-			if result:
-				result._parseJSON(jsn)
-	return result
+	resource = parent.session._cache.get(resourceID)
+	if resource:
+		return resource
+	resource = INT._newResourceFromResponse(MCA.get(parent.session, resourceID), resourceID, parent)
+	return parent.session._cache.put(resource, resourceID)
 
 
 ###############################################################################
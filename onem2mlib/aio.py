@@ -0,0 +1,416 @@
+#
+#	aio.py
+#
+#	(c) 2018 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	This sub-module implements an asyncio interface to access resources on a CSE.
+#
+
+"""
+This sub-module implements an asyncio interface to access and manage resources on a CSE.
+
+All requests are sent through an `onem2mlib.aio.AsyncSession`, which runs many requests
+concurrently on a single event loop. The resource classes and the marshalling of the
+resources are the same as for the blocking interface. Resource objects must be created with
+the *instantly=False* argument, and are then retrieved, created, updated, or deleted by the
+awaitable methods of the *AsyncSession*:
+
+```python
+import asyncio
+from onem2mlib import *
+from onem2mlib.aio import AsyncSession
+
+async def main():
+	async with AsyncSession('http://localhost:8282', 'admin:admin') as session:
+		cse = CSEBase(session, 'mn-cse', instantly=False)
+		await session.retrieve(cse)
+		ae = AE(cse, resourceName='anAE', instantly=False)
+		await session.get(ae)
+		containers = await session.subResources(ae, constants.Type_Container)
+
+asyncio.run(main())
+```
+
+This sub-module requires the [aiohttp](https://aiohttp.readthedocs.io) module.
+"""
+
+import asyncio
+
+try:
+	import aiohttp
+except ImportError:
+	aiohttp = None
+
+import onem2mlib
+import onem2mlib.constants as CON
+import onem2mlib.exceptions as EXC
+import onem2mlib.internal as INT
+import onem2mlib.mcarequests as MCA
+import onem2mlib.transport as TRN
+
+
+class AsyncSession(onem2mlib.Session):
+	"""
+	An AsyncSession object is used when connecting to a oneM2M CSE with the asyncio interface.
+	Besides the information held by a `onem2mlib.Session` object it owns a pool of keep-alive
+	connections, and it provides awaitable methods for the operations on resources.
+
+	An AsyncSession should be closed with the awaitable `onem2mlib.aio.AsyncSession.aclose`() method
+	when it is not needed anymore, or it should be used as an asynchronous context manager.
+	"""
+
+	def __init__(self, address, originator, encoding=CON.Encoding_JSON, poolSize=CON.NETWORK_POOL_SIZE, maxConnectionsPerHost=CON.NETWORK_MAX_CONNECTIONS_PER_HOST, idleTimeout=CON.NETWORK_IDLE_TIMEOUT, maxConcurrentRequests=CON.NETWORK_MAX_CONCURRENT_REQUESTS, cacheSize=CON.CACHE_SIZE, cacheTTL=CON.CACHE_TTL, maxParallelRequests=CON.NETWORK_MAX_PARALLEL_REQUESTS):
+		"""
+		Initialize an AsyncSession object.
+
+		Args:
+
+		- *maxConcurrentRequests*: Integer. The maximum number of requests that are in-flight
+			at the same time. Further requests wait until a running request has finished.
+			Optional, the default is `onem2mlib.constants.NETWORK_MAX_CONCURRENT_REQUESTS`. This does not
+			apply to the synchronous methods, see *maxParallelRequests*. The connections of the
+			awaitable methods are limited by this number only, and *maxConnectionsPerHost* only
+			applies to the pool of the synchronous methods.
+		- All other arguments are the same as for `onem2mlib.Session`.
+
+		This may throw a `onem2mlib.exceptions.NotSupportedError` exception when the *aiohttp*
+		module is not installed, or when the *address* is not an http address.
+		"""
+		if aiohttp is None:
+			raise EXC.NotSupportedError('The asyncio interface requires the aiohttp module.')
+		super().__init__(address, originator, encoding=encoding, poolSize=poolSize, maxConnectionsPerHost=maxConnectionsPerHost, idleTimeout=idleTimeout, maxParallelRequests=maxParallelRequests, cacheSize=cacheSize, cacheTTL=cacheTTL)
+		if not isinstance(self.transport, TRN.HTTPTransport):
+			raise EXC.NotSupportedError('The asyncio interface only supports http.')
+
+		self.maxConcurrentRequests = maxConcurrentRequests
+		""" Integer. The maximum number of requests that are in-flight at the same time. """
+
+		# The aiohttp client session and the limiter for concurrent requests. Both are
+		# created with the first request, because they must be bound to the running event loop.
+		self._clientSession = None
+		self._limiter = None
+
+
+	def __str__(self):
+		result = 'Async' + super().__str__()
+		result += INT.strResource('maxConcurrentRequests', None, self.maxConcurrentRequests)
+		return result
+
+
+	async def __aenter__(self):
+		return self
+
+
+	async def __aexit__(self, exc_type, exc_value, traceback):
+		await self.aclose()
+
+
+	async def aclose(self):
+		"""
+		Close all pooled connections of this session, including the connections that are used
+		by the awaitable methods. 
+		"""
+		if self._clientSession:
+			await self._clientSession.close()
+			self._clientSession = None
+		self.close()
+
+
+	#
+	#	Resource operations
+	#
+
+	async def retrieve(self, resource):
+		"""
+		Retrieve the resource from the &lt;CSEBase>. The resource object is updated accordingly.
+
+		The method returns *True* or *False*, depending on the success of the operation.
+		"""
+		MCA.lastError = ''
+		if not MCA._isValidResource(resource):
+			MCA.lastError = 'Invalid resource'
+			return False
+		path = MCA._retrievePath(resource)
+		response = await self.request('GET', path)
+		if not MCA._handleResponse(resource, response, 200):
+			return False
+		MCA._updateCache(resource, 'GET', path)
+		return True
+
+
+	async def create(self, resource):
+		"""
+		Create the resource in the &lt;CSEBase>. The resource object is updated accordingly.
+
+		The method returns *True* or *False*, depending on the success of the operation.
+		It may throw a `onem2mlib.exceptions.NotSupportedError` exception when the operation is not supported
+		by the resource type.
+		"""
+		if resource.type in [CON.Type_CSEBase, CON.Type_RemoteCSE]: # not allowed
+			raise EXC.NotSupportedError('Resource doesn''t support creating.')
+		MCA.lastError = ''
+		if not MCA._isValidResource(resource):
+			MCA.lastError = 'Invalid resource'
+			return False
+		response = await self.request('POST', resource.parent.resourceID, resource.type, resource._createContent(False))
+		if not MCA._handleResponse(resource, response, 201):
+			return False
+		MCA._updateCache(resource, 'POST')
+		return True
+
+
+	async def update(self, resource):
+		"""
+		Update the existing resource in the &lt;CSEBase> with new attributes. The resource object
+		is updated accordingly.
+
+		The method returns *True* or *False*, depending on the success of the operation.
+		It may throw a `onem2mlib.exceptions.NotSupportedError` exception when the operation is not supported
+		by the resource type.
+		"""
+		if resource.type in [CON.Type_ContentInstance, CON.Type_CSEBase, CON.Type_RemoteCSE]: # not allowed
+			raise EXC.NotSupportedError('Resource doesn''t support updating.')
+		MCA.lastError = ''
+		if not MCA._isValidResource(resource):
+			MCA.lastError = 'Invalid resource'
+			return False
+		response = await self.request('PUT', resource.resourceID, resource.type, resource._createContent(True))
+		if not MCA._handleResponse(resource, response, 200):
+			return False
+		MCA._updateCache(resource, 'PUT')
+		return True
+
+
+	async def delete(self, resource):
+		"""
+		Delete the resource and all its sub-resources from the &lt;CSEBase>.
+
+		The method returns *True* or *False*, depending on the success of the operation.
+		It may throw a `onem2mlib.exceptions.NotSupportedError` exception when the operation is not supported
+		by the resource type.
+		"""
+		if resource.type in [CON.Type_CSEBase, CON.Type_RemoteCSE]: # not allowed
+			raise EXC.NotSupportedError('Resource doesn''t support deleting.')
+		MCA.lastError = ''
+		if not MCA._isValidResource(resource) or not resource.resourceID:
+			MCA.lastError = 'Invalid resource'
+			return False
+		response = await self.request('DELETE', resource.resourceID)
+		if not MCA._handleResponse(resource, response, 200, parse=False):
+			return False
+		MCA._updateCache(resource, 'DELETE')
+		return True
+
+
+	async def get(self, resource):
+		"""
+		Retrieve the resource from the &lt;CSEBase>, or create it if it doesn't exist.
+		The resource object is updated accordingly.
+
+		The method returns *True* or *False*, depending on the success of the operation.
+		"""
+		if resource.resourceID:
+			return await self.retrieve(resource)
+		if resource.resourceName:
+			if await self.retrieve(resource):
+				return True
+		return await self.create(resource)
+
+
+	async def retrieveResource(self, parent, resourceID):
+		"""
+		Retrieve a resource by its *resourceID* from the CSE. This is the asyncio version of
+		`onem2mlib.retrieveResourceFromCSE`().
+
+		When successful, this method returns the retrieved resource, or None otherwise.
+		"""
+		if not resourceID or not len(resourceID):
+			return None
+		resource = self._cache.get(resourceID)
+		if resource:
+			return resource
+		resource = INT._newResourceFromResponse(await self.request('GET', resourceID), resourceID, parent)
+		return self._cache.put(resource, resourceID)
+
+
+	async def discover(self, resource, filter, filterOperation=CON.Dsc_AND, limit=None, offset=None, level=None):
+		"""
+		Discover resources on the CSE, starting with *resource* as a root for discovery.
+		The found resources are retrieved concurrently.
+
+		See `onem2mlib.ResourceBase.discover`() for the arguments.
+
+		The method returns a list of found resources, or an empty list.
+		"""
+		rids = await self._discoverResourceIDs(resource, filter, filterOperation, limit, offset, level)
+		if rids is None:
+			return []
+		return list(await asyncio.gather(*[ self.retrieveResource(resource, ri) for ri in rids ]))
+
+
+	async def iterDiscover(self, resource, filter, filterOperation=CON.Dsc_AND, pageSize=CON.Dsc_def_pageSize, level=None):
+		"""
+		Discover resources on the CSE page by page, starting with *resource* as a root for discovery.
+		This is an asynchronous generator that yields the resources of one page while the next page
+		is fetched in the background.
+
+		See `onem2mlib.ResourceBase.iterDiscover`() for the arguments.
+		"""
+		offset = 0
+		previousPage = None
+		fallbackCache = {}	# Holds the whole result when the level filter must be emulated
+		page = await self._discoverResourceIDs(resource, filter, filterOperation, pageSize, offset, level, fallbackCache)
+		while page and page != previousPage: 		# stop at an empty page, or when the CSE ignores the offset
+			# Always ask for the next page, the CSE may cap the limit below the page size
+			nextPage = asyncio.ensure_future(self._discoverResourceIDs(resource, filter, filterOperation, pageSize, offset + len(page), level, fallbackCache))
+			for subResource in await asyncio.gather(*[ self.retrieveResource(resource, ri) for ri in page ]):
+				if subResource:
+					yield subResource
+			offset += len(page)
+			previousPage = page
+			page = await nextPage
+
+
+	async def subResources(self, resource, type):
+		"""
+		Return a list of the direct child resources of *resource* with the resource type *type*,
+		or an empty list. The child resources are retrieved concurrently.
+
+		This is the asyncio version of methods like `onem2mlib.AE.containers`() or
+		`onem2mlib.Container.contentInstances`(). Like those, it retrieves all child resources
+		with a single request if the CSE supports this.
+		"""
+		if not resource or not resource.resourceID:
+			return []
+		if self._supportsResultContent is not False:
+			result = INT._childResourcesFromResponse(resource, type, await self.request('GET', INT._childResourcesPath(resource, type)))
+			if result is not None:
+				return [ self._cache.put(subResource) for subResource in result ]
+		ris = await self._discoverResourceIDs(resource, [ ('ty', str(type)) ], None, None, None, 1)
+		if not ris:
+			return []
+		result = [ INT._newResourceFromRID(type, ri, resource) for ri in ris ]
+		await asyncio.gather(*[ self.retrieve(subResource) for subResource in result ])
+		result.sort(key=lambda x: x.creationTime)
+		if result and self._supportsResultContent is None:
+			self._supportsResultContent = False 	# The CSE ignored the resultContent before
+		return [ self._cache.put(subResource) for subResource in result ]
+
+
+	async def findSubResource(self, resource, type, resourceName):
+		"""
+		Find a direct child resource of *resource* with the resource type *type* by its
+		*resourceName*, or return None.
+
+		This is the asyncio version of methods like `onem2mlib.AE.findContainer`().
+		"""
+		subResource = INT._newResourceFromType(type, resource)
+		if subResource is None:
+			return None
+		subResource.resourceName = resourceName
+		cached = self._cache.get(subResource._structuredResourceID())
+		if cached:
+			return cached
+		if await self.retrieve(subResource):
+			return self._cache.put(subResource)
+		return None
+
+
+	async def latestContentInstance(self, container):
+		"""
+		Return the latest (newest) &lt;contentInstance> resource from *container*, or None.
+		"""
+		return await self._contentInstance(container, container.latest)
+
+
+	async def oldestContentInstance(self, container):
+		"""
+		Return the oldest &lt;contentInstance> resource from *container*, or None.
+		"""
+		return await self._contentInstance(container, container.oldest)
+
+
+	async def groupResources(self, group):
+		"""
+		Return the resources that are managed by the &lt;group> resource *group*. This method
+		returns a list of the resources, or *None*.
+		"""
+		if not group._isValidFanOutPoint():
+			return None
+		return group._parseFanOutPointResponse(await self.request('GET', group.fanOutPoint))
+
+
+	#
+	#	Basic requests
+	#
+
+	async def request(self, method, path, type=None, body=None):
+		"""
+		Send a request with the http *method* to the *path* on the CSE. *type* is the resource
+		type for create and update requests, and *body* is the already encoded content.
+
+		The method returns a response object with the *status_code*, *content* and *text*
+		attributes and a *json*() method, or *None* in case of a network error.
+		"""
+		try:
+			async with self._getLimiter():
+				async with self._getClientSession().request(method, TRN._getPath(self, path), headers=TRN._getHeaders(self, type), data=body) as response:
+					return TRN._Response(response.status, await response.read())
+		except Exception as e:
+			return None
+
+
+	# See onem2mlib.internal._discoverResourceIDs() for the handling of the level
+	async def _discoverResourceIDs(self, resource, filter, filterOperation, limit, offset, level=None, fallbackCache=None):
+		if not level:
+			return await self._discoverInCSE(resource, filter, filterOperation, limit=limit, offset=offset)
+		if fallbackCache and 'ris' in fallbackCache:
+			return INT._limitResourceIDs(fallbackCache['ris'], limit, offset)
+		if self._supportsLevel is not False:
+			ris = await self._discoverInCSE(resource, filter, filterOperation, True, limit, offset, level)
+			if ris is not None:
+				result = INT._resourceIDsWithinLevel(resource, ris, level)
+				if len(result) == len(ris):
+					return result
+				self._supportsLevel = False 	# The CSE returned resources below the level
+		ris = await self._discoverInCSE(resource, filter, filterOperation, True)
+		if ris is None:
+			return None
+		ris = INT._resourceIDsWithinLevel(resource, ris, level)
+		if fallbackCache is not None:
+			fallbackCache['ris'] = ris
+		return INT._limitResourceIDs(ris, limit, offset)
+
+
+	async def _discoverInCSE(self, resource, filter, filterOperation, structuredResult=False, limit=None, offset=None, level=None):
+		MCA.lastError = ''
+		response = await self.request('GET', MCA._discoveryPath(resource, filter, filterOperation, structuredResult, limit, offset, level))
+		return MCA._parseDiscoveryResponse(resource, response)
+
+
+	async def _contentInstance(self, container, path):
+		if not path:
+			return None
+		response = await self.request('GET', path)
+		if response and response.status_code == 200:
+			contentInstance = onem2mlib.ContentInstance(container, instantly=False)
+			contentInstance._parseResponse(response)
+			return contentInstance
+		return None
+
+
+	def _getClientSession(self):
+		if not self._clientSession:
+			if self.idleTimeout:
+				connector = aiohttp.TCPConnector(limit=self.maxConcurrentRequests, limit_per_host=0, keepalive_timeout=self.idleTimeout)
+			else:
+				connector = aiohttp.TCPConnector(limit=self.maxConcurrentRequests, limit_per_host=0)
+			self._clientSession = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=CON.NETWORK_REQUEST_TIMEOUT))
+		return self._clientSession
+
+
+	def _getLimiter(self):
+		if not self._limiter:
+			self._limiter = asyncio.Semaphore(self.maxConcurrentRequests)
+		return self._limiter
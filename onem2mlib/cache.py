@@ -0,0 +1,126 @@
+#
+#	cache.py
+#
+#	(c) 2018 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	This module implements the resource cache of a Session. The cache is an identity map
+#	that holds a single instance per resource, bounded by size (LRU) and time-to-live.
+#
+
+import threading, time
+from collections import OrderedDict
+
+
+# The cache maps resourceIDs and structured resourceIDs to resource instances. The size
+# and time-to-live are read from the session, so that they can be changed at runtime.
+# A cache size of 0 or None disables the cache.
+class ResourceCache:
+
+	def __init__(self, session):
+		self.session = session
+		self._entries = OrderedDict()	# resourceID -> [resource, timestamp, set of keys]
+		self._keys = {}					# key (resourceID or structured resourceID) -> resourceID
+		self._lock = threading.RLock()
+
+
+	def isEnabled(self):
+		return bool(self.session.cacheSize)
+
+
+	# Return the cached resource for a key when it is not older than the time-to-live,
+	# otherwise None.
+	def get(self, key):
+		if not self.isEnabled() or not key:
+			return None
+		with self._lock:
+			entry = self._entry(key)
+			if not entry or entry[1] is None or (self.session.cacheTTL is not None and time.monotonic() - entry[1] > self.session.cacheTTL):
+				return None
+			self._entries.move_to_end(entry[0].resourceID)
+			return entry[0]
+
+
+	# Add a resource that was just received from the CSE under its resourceID and the
+	# optional key. If another instance of the same resource is already cached then that
+	# instance is kept, and it is updated when the resource has changed in the CSE (ie.
+	# the stateTag or lastModifiedTime differ). The cached instance is returned.
+	def put(self, resource, key=None):
+		if not self.isEnabled() or not resource or not resource.resourceID:
+			return resource
+		with self._lock:
+			entry = self._entries.get(resource.resourceID)
+			if entry:
+				cached = entry[0]
+				if cached is not resource and (cached.stateTag != resource.stateTag or cached.lastModifiedTime != resource.lastModifiedTime):
+					cached._copy(resource)
+				entry[1] = time.monotonic()
+				self._entries.move_to_end(resource.resourceID)
+			else:
+				entry = [ resource, time.monotonic(), set([ resource.resourceID ]) ]
+				self._entries[resource.resourceID] = entry
+				self._keys[resource.resourceID] = resource.resourceID
+			if key and key not in entry[2]:
+				self._removeKey(key)
+				entry[2].add(key)
+				self._keys[key] = resource.resourceID
+			while len(self._entries) > self.session.cacheSize:
+				self._removeEntry(next(iter(self._entries)))
+			return entry[0]
+
+
+	# Mark a resource as outdated. The next access retrieves it again from the CSE, but the
+	# cached instance is kept.
+	def invalidate(self, key):
+		if not key:
+			return
+		with self._lock:
+			entry = self._entry(key)
+			if entry:
+				entry[1] = None
+
+
+	# Remove a resource and all its cached child resources from the cache
+	def remove(self, key):
+		if not key:
+			return
+		with self._lock:
+			entry = self._entry(key)
+			if not entry:
+				return
+			removed = [ entry[0].resourceID ]
+			while removed:
+				ri = removed.pop()
+				self._removeEntry(ri)
+				removed.extend([ r for (r, e) in self._entries.items() if e[0].parentID == ri ])
+
+
+	def clear(self):
+		with self._lock:
+			self._entries.clear()
+			self._keys.clear()
+
+
+	def __len__(self):
+		return len(self._entries)
+
+
+	def _entry(self, key):
+		ri = self._keys.get(key)
+		if ri is None:
+			return None
+		return self._entries.get(ri)
+
+
+	def _removeEntry(self, ri):
+		entry = self._entries.pop(ri, None)
+		if entry:
+			for key in entry[2]:
+				self._keys.pop(key, None)
+
+
+	def _removeKey(self, key):
+		entry = self._entry(key)
+		if entry:
+			entry[2].discard(key)
+			self._keys.pop(key, None)
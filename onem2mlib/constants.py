@@ -95,6 +95,9 @@ Dsc_AND = 1
 Dsc_OR = 2
 """ Used to define the filter operation. Perform a logical disjunction (logical OR) on all filter criteria. """
 
+Dsc_def_pageSize = 100
+""" Default for the number of resources that are fetched per request in `onem2mlib.ResourceBase.iterDiscover`(). """
+
 
 #
 #	Subscriptions
@@ -106,6 +109,50 @@ Sub_ModefiedAttributes = 2
 Sub_ResourceID = 3
 """ Constant for notificationContentType: Send only the  resource's ID in a notification. """
 
+Sub_net_updateResource = 1
+""" Constant for the notificationEventType of an eventNotificationCriteria: Update to the attributes of the subscribed-to resource. """
+Sub_net_deleteResource = 2
+""" Constant for the notificationEventType of an eventNotificationCriteria: Deletion of the subscribed-to resource. """
+Sub_net_createDirectChild = 3
+""" Constant for the notificationEventType of an eventNotificationCriteria: Creation of a direct child of the subscribed-to resource. """
+Sub_net_deleteDirectChild = 4
+""" Constant for the notificationEventType of an eventNotificationCriteria: Deletion of a direct child of the subscribed-to resource. """
+
+Sub_pn_sendLatest = 1
+""" Constant for pendingNotification: Send only the latest of the pending notifications when the subscriber becomes reachable again. """
+Sub_pn_sendAllPending = 2
+""" Constant for pendingNotification: Send all pending notifications when the subscriber becomes reachable again. """
+
+Sub_def_workers = 4
+""" Default number of worker threads that call the notification callbacks, see `onem2mlib.notifications.setupNotifications`(). """
+Sub_def_queueSize = 1000
+""" Default maximum number of received notifications that wait for being processed, see `onem2mlib.notifications.setupNotifications`(). """
+Sub_server_threading = 1
+""" Constant for the notification server: A multi-threaded http server, one thread per connection. """
+Sub_server_asyncio = 2
+""" Constant for the notification server: An asyncio based http server that handles all connections in a single thread. """
+Sub_server_mqtt = 3
+""" Constant for the notification server: Receive notifications via the MQTT broker connection of a `onem2mlib.Session`. """
+Sub_server_websocket = 4
+""" Constant for the notification server: Receive notifications via the WebSocket connection of a `onem2mlib.Session`. """
+
+Sub_def_server = Sub_server_threading
+""" Default notification server, see `onem2mlib.notifications.setupNotifications`(). """
+Sub_def_processes = 1
+""" Default number of processes that receive notifications, see `onem2mlib.notifications.setupNotifications`(). """
+Sub_def_bulkWorkers = 10
+""" Default number of parallel requests when adding or removing many subscriptions, see `onem2mlib.notifications.addSubscriptions`(). """
+Sub_def_shutdownTimeout = 30
+""" Default time in seconds for removing the subscriptions when shutting down, see `onem2mlib.notifications.shutdownNotifications`(). """
+Sub_def_coalesceWindow = None
+""" Default time window in seconds in which notifications are coalesced, see `onem2mlib.notifications.setupNotifications`(). None disables coalescing. """
+Sub_def_deduplicationSize = 10000
+""" Default number of recently received notifications that are remembered to detect duplicates, see `onem2mlib.notifications.setupNotifications`(). 0 or None disables de-duplication. """
+Sub_def_deduplicationWindow = 60
+""" Default time window in seconds in which a notification is recognized as a duplicate, see `onem2mlib.notifications.setupNotifications`(). None means no limit. """
+Sub_def_cancelInterval = 0.5
+""" Time in seconds after which a receiver waiting for a free slot in the notification queue checks whether the shutdown has started, see `onem2mlib.notifications.shutdownNotifications`(). """
+
 
 #
 #	Network configurations
@@ -114,8 +161,59 @@ Sub_ResourceID = 3
 NETWORK_REQUEST_TIMEOUT = 20
 """ Timeout after n seconds in requests. """
 
+NETWORK_POOL_SIZE = 10
+""" Default number of per-host connection pools that are cached by a `onem2mlib.Session`. """
+
+NETWORK_MAX_CONNECTIONS_PER_HOST = 10
+""" Default maximum number of keep-alive connections per host that are kept in a `onem2mlib.Session`'s pool. """
+
+NETWORK_IDLE_TIMEOUT = 60
+""" Close the pooled connections of a `onem2mlib.Session` after they have been idle for n seconds. """
+
+NETWORK_MAX_PARALLEL_REQUESTS = 10
+""" Default maximum number of requests that a `onem2mlib.Session` sends in parallel, e.g. when retrieving discovered resources. """
+
+NETWORK_MAX_CONCURRENT_REQUESTS = 100
+""" Default maximum number of requests that are in-flight at the same time in a `onem2mlib.aio.AsyncSession`. """
+
+NETWORK_COAP_ACK_TIMEOUT = 2
+""" Default initial time in seconds to wait for the acknowledgement of a confirmable CoAP request, see `onem2mlib.transport.CoAPTransport`. """
+
+NETWORK_COAP_MAX_RETRANSMIT = 4
+""" Default maximum number of re-transmissions of a confirmable CoAP request, see `onem2mlib.transport.CoAPTransport`. """
+
+NETWORK_COAP_BLOCK_SIZE = 1024
+""" Default block size for CoAP block-wise transfers, see `onem2mlib.transport.CoAPTransport`. """
+
+NETWORK_MQTT_KEEPALIVE = 60
+""" Default keep-alive interval in seconds of the connection to an MQTT broker, see `onem2mlib.transport.MQTTTransport`. """
+
+NETWORK_WEBSOCKET_PING_INTERVAL = 30
+""" Default time in seconds after which a ping is sent on an idle WebSocket connection, see `onem2mlib.transport.WebSocketTransport`. """
+
+NETWORK_WEBSOCKET_RECONNECT_DELAY = 1
+""" Initial time in seconds before a lost WebSocket connection that receives requests, e.g. notifications, is re-established. The time is doubled for each failed attempt, up to `onem2mlib.constants.NETWORK_WEBSOCKET_RECONNECT_MAX_DELAY`. See `onem2mlib.transport.WebSocketTransport`. """
+NETWORK_WEBSOCKET_RECONNECT_MAX_DELAY = 60
+""" Maximum time in seconds between the attempts to re-establish a lost WebSocket connection that receives requests. See `onem2mlib.transport.WebSocketTransport`. """
+
 Encoding_XML = 1
 """ Specify XML as the request encoding format. """
 
 Encoding_JSON = 2
 """ Specify JSON as the request encoding format. """
+
+Encoding_CBOR = 3
+""" Specify CBOR as the request encoding format. It uses the same structures as JSON, but a compact binary
+serialization, in which the content of a &lt;contentInstance> can also be binary (bytes). This requires the 
+[cbor2](https://github.com/agronholm/cbor2) module. """
+
+
+#
+#	Resource cache
+#
+
+CACHE_SIZE = 0
+""" Default maximum number of resources that are cached by a `onem2mlib.Session`. 0 disables the cache. """
+
+CACHE_TTL = 5
+""" Default number of seconds after which a resource in the cache of a `onem2mlib.Session` is revalidated with the CSE. """
@@ -8,8 +8,16 @@
 #
 
 
+import concurrent.futures, json
 from lxml import etree as ET
+
+try:
+	import cbor2
+except ImportError:
+	cbor2 = None
+
 import onem2mlib.constants as CON
+import onem2mlib.exceptions as EXC
 import onem2mlib.utilities as UT
 import onem2mlib.mcarequests
 
@@ -28,13 +36,22 @@ def _searchExpression(elemName, relative):
 	return '//'+elemName
 
 
-# Find a tag value (string) from the tree or, if not found, return the default.
-# If relative is set to True then the search is done relatively to the provided
-# element.
-def getElement(tree, elemName, default=None, relative=False):
-	elem = tree.xpath(_searchExpression(elemName, relative), namespaces=_ns)
-	if elem and len(elem)>0 and elem[0].text:
-		result = elem[0].text
+# The compiled XPath expressions, by expression string
+_xpathCache = {}
+
+# Return a compiled XPath expression. Compiled expressions are cached and re-used.
+def _xpath(expression):
+	xpath = _xpathCache.get(expression)
+	if xpath is None:
+		xpath = ET.XPath(expression, namespaces=_ns)
+		_xpathCache[expression] = xpath
+	return xpath
+
+
+# Return the text of an element, converted to the type of the default.
+def _elementValue(elem, default):
+	if elem is not None and elem.text:
+		result = elem.text
 		if isinstance(default, list):
 			result = result.split()
 		elif isinstance(default, bool):	# bool must be checked before int!
@@ -45,11 +62,21 @@ def getElement(tree, elemName, default=None, relative=False):
 	return default
 
 
+# Find a tag value (string) from the tree or, if not found, return the default.
+# If relative is set to True then the search is done relatively to the provided
+# element.
+def getElement(tree, elemName, default=None, relative=False):
+	elem = _xpath(_searchExpression(elemName, relative))(tree)
+	if elem and len(elem)>0:
+		return _elementValue(elem[0], default)
+	return default
+
+
 # Find all subtree elements from the tree. Returns a list.
 # If relative is set to True then the search is done relatively to the provided
 # element.
 def getElements(tree, elemName, relative=False):
-	return tree.xpath(_searchExpression(elemName, relative), namespaces=_ns)
+	return _xpath(_searchExpression(elemName, relative))(tree)
 
 
 # Find the children elements of a specific XML element.
@@ -62,13 +89,40 @@ def getElementWithChildren(tree, elemName):
 
 # Find an attribute value from the tree/element or, if not found, return the default
 def getAttribute(tree, elemName, attrName, default=None):
-	elem = tree.xpath('//'+elemName, namespaces=_ns)
+	elem = _xpath('//'+elemName)(tree)
 	if elem and len(elem)>0:
 		if attrName in elem[0].attrib:
 			return elem[0].attrib[attrName]
 	return default
 
 
+# Return the element that holds the attributes of a resource. This is either the given
+# element itself, or the first element below it that has a <ty> child element.
+def getResourceElement(tree):
+	if tree.find('ty') is not None:
+		return tree
+	elem = _xpath('.//ty/..')(tree)
+	if elem and len(elem)>0:
+		return elem[0]
+	return tree
+
+
+# Collect the direct child elements of an element in a single pass. Return a dictionary
+# that maps the tag names to the elements. Only the first element for a name is kept.
+def getChildElements(elem):
+	result = {}
+	for child in elem:
+		if isinstance(child.tag, str) and child.tag not in result:	# ignore comments etc.
+			result[child.tag] = child
+	return result
+
+
+# Find a tag value (string) from a dictionary of child elements, see getChildElements(),
+# or, if not found, return the default.
+def getChildElementValue(elems, elemName, default=None):
+	return _elementValue(elems.get(elemName), default)
+
+
 # Create an XML element, including an optional namespace. Return the element
 def createElement(elemName, namespace=None):
 	if namespace:
@@ -90,7 +144,7 @@ def addToElement(root, name, content, mandatory=False):
 	if isinstance(content, int) or (content and len(content) > 0) or mandatory:
 		elem = createElement(name)
 		if isinstance(content, list):
-			elem.text = ' '.join(content)
+			elem.text = ' '.join([ str(c) for c in content ])
 		else:
 		 	elem.text = str(content)
 		root.append(elem)
@@ -110,6 +164,19 @@ def responseToXML(response):
 	return None
 
 
+# Decode the content of a response only once into a document, ie. an XML structure or a
+# JSON dictionary, depending on the encoding. The document is then shared for determining
+# the type and for parsing the resource. Return None if the response has no content.
+def decodeResponse(response, encoding):
+	if encoding == CON.Encoding_XML:
+		return responseToXML(response)
+	elif encoding in jsonEncodings:
+		if response is None or not response.content:
+			return None
+		return decodeJSON(response.content, encoding)
+	raise EXC.NotSupportedError('Encoding not supported: ' + str(encoding))
+
+
 # Return the qualified name of an element
 def xmlQualifiedName(element, stripNameSpace=False):
 	qname = ET.QName(element)
@@ -134,6 +201,33 @@ def stringToXML(value):
 #	JSON Utilities
 #
 
+# The encodings that use the JSON structures. CBOR is only a different serialization.
+jsonEncodings = [ CON.Encoding_JSON, CON.Encoding_CBOR ]
+
+
+# Serialize a JSON dictionary for an encoding: as a JSON string, or as CBOR bytes.
+def encodeJSON(jsn, encoding=CON.Encoding_JSON):
+	if encoding == CON.Encoding_CBOR:
+		return cbor2.dumps(jsn)
+	return json.dumps(jsn)
+
+
+# Deserialize a JSON string or CBOR bytes into a JSON dictionary
+def decodeJSON(data, encoding=CON.Encoding_JSON):
+	if encoding == CON.Encoding_CBOR:
+		return cbor2.loads(data)
+	return json.loads(data)		# bytes are decoded directly, no charset guessing
+
+
+# Return the content type of an encoding
+def contentType(encoding):
+	if encoding == CON.Encoding_XML:
+		return 'application/xml'
+	elif encoding == CON.Encoding_CBOR:
+		return 'application/cbor'
+	return 'application/json'
+
+
 # Find a tag value (string) from the JSON dictionaty or, if not found, return the default.
 def getElementJSON(jsn, elemName, default=None):
 	if elemName in jsn:
@@ -164,6 +258,37 @@ def getALLSubElementsJSON(jsn, name):
 	return result
 
 
+# Find the first sub-structures for each of a list of names inside a JSON document in a single
+# pass. An entry of the list can also be a tuple of alternative names for the same element,
+# e.g. ('vrq', 'm2m:vrq'). Return a dictionary that maps the found names, or the first name
+# of a tuple, to the sub-structures. The search stops when all elements have been found.
+def getFirstSubElementsJSON(jsn, names):
+	aliases = {}
+	for name in names:
+		group = (name,) if isinstance(name, str) else tuple(name)
+		for alias in group:
+			aliases[alias] = group[0]
+	count = len(names)
+	result = {}
+	def _search(jsn):
+		for elemName in jsn:
+			if len(result) == count:
+				return
+			elem = jsn[elemName]
+			key = aliases.get(elemName)
+			if key is not None and key not in result:
+				result[key] = elem
+			if isinstance(elem, dict):
+				_search(elem)
+			elif isinstance(elem, list):
+				for e in elem:
+					if isinstance(e, dict):
+						_search(e)
+	if isinstance(jsn, dict):
+		_search(jsn)
+	return result
+
+
 ###############################################################################
 #
 #	Utilities
@@ -171,15 +296,20 @@ def getALLSubElementsJSON(jsn, name):
 
 # Get the type from a response, for JSON and XML
 def getTypeFromResponse(response, encoding):
+	return getTypeFromDocument(decodeResponse(response, encoding), encoding)
+
+
+# Get the type from a decoded document, for JSON and XML
+def getTypeFromDocument(document, encoding):
+	if document is None:
+		return -1
 	if encoding == CON.Encoding_XML:
-		root = responseToXML(response)
-		return toInt(getElement(root, 'ty'))
-	elif encoding == CON.Encoding_JSON:
-		jsn = response.json()
+		return toInt(getResourceElement(document).findtext('ty'))
+	elif encoding in jsonEncodings:
 		# This is a bit complicated. We need to get to the type, which is hidden under an
 		# unknown object definition key. So, we asume that the JSON we get has the object
 		# definition in the first element (as it should be).
-		inner = list(jsn.values())[0]
+		inner = list(document.values())[0]
 		return getElementJSON(inner, 'ty')
 	return -1
 
@@ -212,6 +342,12 @@ def toInt(value):
 	return int(value)
 
 
+def toBool(value):
+	if value is None or isinstance(value, bool):
+		return value
+	return str(value).lower() in [ 'true', '1' ]
+
+
 ###############################################################################
 #
 #	Search
@@ -221,31 +357,141 @@ def toInt(value):
 def _findSubResource(resource, type):
 	if not resource or not resource.session or not resource.resourceID: 
 		return None
+
+	# First try to get all the child resources with a single request
+	if resource.session._supportsResultContent is not False:
+		result = _childResourcesFromResponse(resource, type, onem2mlib.mcarequests.get(resource.session, _childResourcesPath(resource, type)))
+		if result is not None:
+			return [ resource.session._cache.put(subResource) for subResource in result ]
+
+	# Otherwise discover the child resources and retrieve them one by one
 	result = []
-	ris = onem2mlib.mcarequests.discoverInCSE(resource, filter=[UT.newTypeFilterCriteria(int(type))], structuredResult=True)
+	ris = _discoverResourceIDs(resource, filter=[UT.newTypeFilterCriteria(int(type))], level=1)
 	if ris:
-		#	The following is a hack to restrict the search result to the direct child
-		#	level. Yes, the oneM2M "level" attribute could be used for that, but it
-		#	doesn't seem to be supported that much (at least not in om2m).
-		#	Anyway, the hack works like that: count the forward slashes, ie. the 
-		#	number of path elements, and only add those from the response to the result
-		#	which have count+1 path elements.
-
-		sid = resource._structuredResourceID()
-		count = sid.count('/') + 1
-
-		for ri in ris:
-			if ri.count('/') == count:	# <- hack s.o.
-				subResource = _newResourceFromRID(type, ri, resource)
-				subResource.retrieveFromCSE()
-				result.append(subResource)
+		result = [ _newResourceFromRID(type, ri, resource) for ri in ris ]
+		_parallelMap(resource.session, lambda subResource: subResource.retrieveFromCSE(), result)
 
 		# Still a hack: sort the list by the ct attribute
 		result.sort(key=lambda x: x.creationTime)
 
+	if result and resource.session._supportsResultContent is None:
+		resource.session._supportsResultContent = False 	# The CSE ignored the resultContent before
+	return [ resource.session._cache.put(subResource) for subResource in result ]
+
+
+# Return the path to retrieve a resource together with its child resources of a
+# specific type, ie. with the resultContent "attributes and child resources".
+def _childResourcesPath(resource, type):
+	return resource.resourceID + '?rcn=4&ty=' + str(type)
+
+
+# Return a list of the child resources of a specific type from a response to a request 
+# with the resultContent "attributes and child resources", or None when the child resources
+# must be retrieved differently. This also records whether the CSE supports the resultContent.
+def _childResourcesFromResponse(resource, type, response):
+	session = resource.session
+	if response is None:
+		return None
+	if response.status_code in [ 400, 501 ]:	# The CSE rejected the resultContent
+		session._supportsResultContent = False
+		return None
+	if response.status_code != 200:				# Any other error says nothing about the resultContent
+		return None
+	shortName = _typeShortNames.get(type)
+	result = []
+	document = decodeResponse(response, session.encoding)
+	if document is None:
+		return None
+	if session.encoding == CON.Encoding_XML:
+		for elem in document:
+			if xmlQualifiedName(elem, True) == shortName:
+				subResource = _newResourceFromType(type, resource)
+				subResource._parseXML(elem)
+				result.append(subResource)
+	elif session.encoding in jsonEncodings:
+		inner = list(document.values())[0] if document else None
+		elems = []
+		if isinstance(inner, dict):
+			elems = getElementJSON(inner, 'm2m:' + shortName, getElementJSON(inner, shortName, []))
+		if isinstance(elems, dict):
+			elems = [ elems ]
+		for elem in elems:
+			subResource = _newResourceFromType(type, resource)
+			subResource._parseJSON({ 'm2m:' + shortName : elem })
+			result.append(subResource)
+
+	if len(result) > 0:
+		session._supportsResultContent = True
+	elif not session._supportsResultContent:
+		return None 	# No children, or the CSE ignored the resultContent. Find out the other way.
+	result.sort(key=lambda x: x.creationTime)
 	return result
 
 
+# Discover resource IDs, optionally restricted to a number of levels below the resource.
+# When a level is given then the result consists of structured resource IDs, which are 
+# additionally checked for their level. This way it is detected when the CSE doesn't
+# support or ignores the level filter criteria (e.g. om2m). In this case the level
+# filter is emulated by counting path elements. When a *fallbackCache* dictionary is
+# given then the emulated result is stored there and re-used for further pages.
+def _discoverResourceIDs(resource, filter=None, filterOperation=None, limit=None, offset=None, level=None, fallbackCache=None):
+	if not level:
+		return onem2mlib.mcarequests.discoverInCSE(resource, filter=filter, filterOperation=filterOperation, limit=limit, offset=offset)
+	if fallbackCache and 'ris' in fallbackCache:
+		return _limitResourceIDs(fallbackCache['ris'], limit, offset)
+	session = resource.session
+	if session._supportsLevel is not False:
+		ris = onem2mlib.mcarequests.discoverInCSE(resource, filter=filter, filterOperation=filterOperation, structuredResult=True, limit=limit, offset=offset, level=level)
+		if ris is not None:
+			result = _resourceIDsWithinLevel(resource, ris, level)
+			if len(result) == len(ris):
+				return result
+			session._supportsLevel = False 	# The CSE returned resources below the level
+	ris = onem2mlib.mcarequests.discoverInCSE(resource, filter=filter, filterOperation=filterOperation, structuredResult=True)
+	if ris is None:
+		return None
+	ris = _resourceIDsWithinLevel(resource, ris, level)
+	if fallbackCache is not None:
+		fallbackCache['ris'] = ris
+	return _limitResourceIDs(ris, limit, offset)
+
+
+# Return a generator that discovers resources page by page. The next page of resource IDs
+# is prefetched in the background while the resources of the current page are yielded.
+def _iterDiscover(resource, filter, filterOperation, pageSize, level=None):
+
+	fallbackCache = {}	# Holds the whole result when the level filter must be emulated
+
+	def fetchPage(offset):
+		return _discoverResourceIDs(resource, filter=filter, filterOperation=filterOperation, limit=pageSize, offset=offset, level=level, fallbackCache=fallbackCache)
+
+	with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+		offset = 0
+		previousPage = None
+		page = fetchPage(offset)
+		while page and page != previousPage: 		# stop at an empty page, or when the CSE ignores the offset
+			# Always ask for the next page, even after a short one, because the CSE
+			# may cap the limit at a lower value than the requested page size.
+			nextPage = executor.submit(fetchPage, offset + len(page))
+			for subResource in _parallelMap(resource.session, lambda ri: onem2mlib.retrieveResourceFromCSE(resource, ri), page):
+				if subResource:
+					yield subResource
+			offset += len(page)
+			previousPage = page
+			page = nextPage.result()
+
+
+# Call a function for each of the items, with at most the session's maxParallelRequests
+# calls running in parallel. The results are returned in the order of the items.
+def _parallelMap(session, function, items):
+	items = list(items)
+	workers = min(session.maxParallelRequests or 1, len(items))
+	if workers <= 1:
+		return [ function(item) for item in items ]
+	with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+		return list(executor.map(function, items))
+
+
 # Find a resource from a list by its resource name
 def _findResourceInList(resources, resourceName):
 	if resources and len(resources)>0:
@@ -264,24 +510,69 @@ def _newResourceFromRID(type, ri, parent):
 
 
 def _newResourceFromType(type, parent):
-	if type == CON.Type_ContentInstance:	return onem2mlib.ContentInstance(parent, instantly=False)
-	elif type == CON.Type_Container:		return onem2mlib.Container(parent, instantly=False)
-	elif type == CON.Type_AE:				return onem2mlib.AE(parent, instantly=False)
-	elif type == CON.Type_Group:			return onem2mlib.Group(parent, instantly=False)
-	elif type == CON.Type_ACP:				return onem2mlib.AccessControlPolicy(parent, instantly=False)
-	elif type == CON.Type_Subscription:		return onem2mlib.Subscription(parent, instantly=False)
-	elif type == CON.Type_RemoteCSE:		return onem2mlib.RemoteCSE(parent, instantly=False)
+	resourceClass = _resourceClassFromType(type)
+	if resourceClass:
+		return resourceClass(parent, instantly=False)
 	return None
 
 
+# Return the class of a resource type, or None if the type is not supported
+def _resourceClassFromType(type):
+	if type == CON.Type_ContentInstance:	return onem2mlib.ContentInstance
+	elif type == CON.Type_Container:		return onem2mlib.Container
+	elif type == CON.Type_AE:				return onem2mlib.AE
+	elif type == CON.Type_Group:			return onem2mlib.Group
+	elif type == CON.Type_ACP:				return onem2mlib.AccessControlPolicy
+	elif type == CON.Type_Subscription:		return onem2mlib.Subscription
+	elif type == CON.Type_RemoteCSE:		return onem2mlib.RemoteCSE
+	return None
+
+
+# Create a new resource object from a response to a retrieve request. The type of the
+# resource is determined from the response.
+def _newResourceFromResponse(response, ri, parent):
+	result = None
+	if response and response.status_code == 200:
+		document = decodeResponse(response, parent.session.encoding)
+		result = _newResourceFromRID(getTypeFromDocument(document, parent.session.encoding), ri, parent)
+		if result:
+			result._parseDocument(document)
+	return result
+
+
+# Return those resource IDs from a list of structured resource IDs that are at most
+# *level* levels below a resource. This works by counting the forward slashes, ie. the
+# number of path elements.
+def _resourceIDsWithinLevel(resource, ris, level):
+	count = resource._structuredResourceID().count('/')
+	return [ ri for ri in ris if count < ri.count('/') <= count + level ]
+
+
+# Apply limit and offset to a list of resource IDs
+def _limitResourceIDs(ris, limit, offset):
+	if offset:
+		ris = ris[offset:]
+	if limit is not None:
+		ris = ris[:limit]
+	return ris
+
+
+# The short names of the resource types
+_typeShortNames = {
+	CON.Type_ContentInstance :	'cin',
+	CON.Type_Container :		'cnt',
+	CON.Type_AE :				'ae',
+	CON.Type_Group :			'grp',
+	CON.Type_ACP :				'acp',
+	CON.Type_Subscription :		'sub',
+	CON.Type_RemoteCSE :		'csr'
+}
+
+
 def _newResourceFromTypeString(typeString, parent):
-	if typeString == 'cin':		return _newResourceFromType(CON.Type_ContentInstance, parent)
-	elif typeString == 'cnt':	return _newResourceFromType(CON.Type_Container, parent)
-	elif typeString == 'ae':	return _newResourceFromType(CON.Type_AE, parent)
-	elif typeString == 'grp':	return _newResourceFromType(CON.Type_Group, parent)
-	elif typeString == 'acp':	return _newResourceFromType(CON.Type_ACP, parent)
-	elif typeString == 'sub':	return _newResourceFromType(CON.Type_Subscription, parent)
-	elif typeString == 'csr':	return _newResourceFromType(CON.Type_RemoteCSE, parent)
+	for type, shortName in _typeShortNames.items():
+		if typeString == shortName:
+			return _newResourceFromType(type, parent)
 	return None
 
 
@@ -295,8 +586,13 @@ def _getResourceFromCSEByResourceName(type, rn, parent):
 	elif type == CON.Type_ACP:					res = onem2mlib.AccessControlPolicy(parent, resourceName=rn, instantly=False)
 	elif type == CON.Type_Subscription:			res = onem2mlib.Subscription(parent, resourceName=rn, instantly=False)
 	elif type == CON.Type_RemoteCSE:			res = onem2mlib.RemoteCSE(parent, resourceName=rn, instantly=False)
-	if res is not None and res.retrieveFromCSE():
-		return res
+	if res is None:
+		return None
+	cached = res.session._cache.get(res._structuredResourceID())
+	if cached:
+		return cached
+	if res.retrieveFromCSE():
+		return res.session._cache.put(res)
 	return None
 
 
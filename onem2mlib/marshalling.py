@@ -17,21 +17,26 @@ import onem2mlib.exceptions as EXC
 #	Resource Base
 #
 
+# Parse the common resource attributes. The child elements of the resource are collected
+# in a single pass, and the dictionary of child elements is returned for the parsing of the
+# resource specific attributes.
 def _resourceBase_parseXML(obj, root):
-	rootTag = INT.xmlQualifiedName(root)
-	obj.resourceName = INT.getAttribute(root, 'm2m:'+rootTag.localname, 'rn', obj.resourceName)
-	obj.type = INT.getElement(root, 'ty', obj.type)
-	obj.stateTag = INT.toInt(INT.getElement(root, 'st', obj.stateTag))
-	obj.labels = INT.getElement(root, 'lbl', obj.labels)
-	obj.resourceID = INT.getElement(root, 'ri', obj.resourceID)
-	obj.parentID = INT.getElement(root, 'pi', obj.parentID)
-	obj.creationTime = INT.getElement(root, 'ct', obj.creationTime)
-	obj.lastModifiedTime = INT.getElement(root, 'lt', obj.lastModifiedTime)
-	obj.accessControlPolicyIDs = INT.getElement(root, 'acpi', obj.accessControlPolicyIDs)
-	obj.expirationTime = INT.getElement(root, 'et', obj.expirationTime)
-	obj.announceTo = INT.getElement(root, 'at', obj.announceTo)
-	obj.announcedAttribute = INT.getElement(root, 'aa', obj.announcedAttribute)
+	root = INT.getResourceElement(root)
+	elems = INT.getChildElements(root)
+	obj.resourceName = root.attrib.get('rn', obj.resourceName)
+	obj.type = INT.getChildElementValue(elems, 'ty', obj.type)
+	obj.stateTag = INT.toInt(INT.getChildElementValue(elems, 'st', obj.stateTag))
+	obj.labels = INT.getChildElementValue(elems, 'lbl', obj.labels)
+	obj.resourceID = INT.getChildElementValue(elems, 'ri', obj.resourceID)
+	obj.parentID = INT.getChildElementValue(elems, 'pi', obj.parentID)
+	obj.creationTime = INT.getChildElementValue(elems, 'ct', obj.creationTime)
+	obj.lastModifiedTime = INT.getChildElementValue(elems, 'lt', obj.lastModifiedTime)
+	obj.accessControlPolicyIDs = INT.getChildElementValue(elems, 'acpi', obj.accessControlPolicyIDs)
+	obj.expirationTime = INT.getChildElementValue(elems, 'et', obj.expirationTime)
+	obj.announceTo = INT.getChildElementValue(elems, 'at', obj.announceTo)
+	obj.announcedAttribute = INT.getChildElementValue(elems, 'aa', obj.announcedAttribute)
 	# todo: dynamicAuthorizationConsultationIDs
+	return elems
 
 
 # Create the XML for only some of the writable attributes.
@@ -76,10 +81,10 @@ def _resourceBase_createJSON(obj, jsn, isUpdate):
 #
 
 def _CSEBase_parseXML(obj, root):
-	_resourceBase_parseXML(obj, root)
-	obj.cseType = INT.toInt(INT.getElement(root, 'cst', obj.cseType))
-	obj.supportedResourceTypes = INT.getElement(root, 'srt', obj.supportedResourceTypes)
-	obj.pointOfAccess = INT.getElement(root, 'poa', obj.pointOfAccess)
+	elems = _resourceBase_parseXML(obj, root)
+	obj.cseType = INT.toInt(INT.getChildElementValue(elems, 'cst', obj.cseType))
+	obj.supportedResourceTypes = INT.getChildElementValue(elems, 'srt', obj.supportedResourceTypes)
+	obj.pointOfAccess = INT.getChildElementValue(elems, 'poa', obj.pointOfAccess)
 
 
 def _CSEBase_parseJSON(obj, jsn):
@@ -99,11 +104,11 @@ def _CSEBase_parseJSON(obj, jsn):
 #
 
 def _remoteCSE_parseXML(obj, root):
-	_resourceBase_parseXML(obj, root)
-	obj.requestReachability = INT.getElement(root, 'rr', obj.requestReachability)
-	obj.pointOfAccess = INT.getElement(root, 'poa', obj.pointOfAccess)
-	obj.cseBase = INT.getElement(root, 'cb', obj.cseBase)
-	obj.cseID = INT.getElement(root, 'csi', obj.cseID)
+	elems = _resourceBase_parseXML(obj, root)
+	obj.requestReachability = INT.getChildElementValue(elems, 'rr', obj.requestReachability)
+	obj.pointOfAccess = INT.getChildElementValue(elems, 'poa', obj.pointOfAccess)
+	obj.cseBase = INT.getChildElementValue(elems, 'cb', obj.cseBase)
+	obj.cseID = INT.getChildElementValue(elems, 'csi', obj.cseID)
 
 
 def _remoteCSE_parseJSON(obj, jsn):
@@ -124,19 +129,19 @@ def _remoteCSE_parseJSON(obj, jsn):
 
 def _accessControlPolicy_parseXML(obj, root):
 	#print(INT.xmlToString(root))
-	_resourceBase_parseXML(obj, root)
+	elems = _resourceBase_parseXML(obj, root)
 	obj.privileges = []
-	pv = INT.getElementWithChildren(root, 'pv')
-	if pv is not None and len(pv)>0:
-		acrs = INT.getElements(pv[0], 'acr', relative=True) # only the first element[0]
+	pv = elems.get('pv')
+	if pv is not None:
+		acrs = INT.getElements(pv, 'acr', relative=True)
 		for a in acrs:
 			acr = onem2mlib.AccessControlRule()
 			acr._parseXML(a)
 			obj.privileges.append(acr)
 	obj.selfPrivileges = []
-	pvs = INT.getElementWithChildren(root, 'pvs')
-	if pvs is not None and len(pvs)>0:
-		acrs = INT.getElements(pvs[0], 'acr', relative=True) # only the first element[0]
+	pvs = elems.get('pvs')
+	if pvs is not None:
+		acrs = INT.getElements(pvs, 'acr', relative=True)
 		for a in acrs:
 			acr = onem2mlib.AccessControlRule()
 			acr._parseXML(a)
@@ -237,11 +242,11 @@ def _accessControlRule_createJSON(obj):
 #
 
 def _AE_parseXML(obj, root):
-	_resourceBase_parseXML(obj, root)
-	obj.appID = INT.getElement(root, 'api', obj.appID)
-	obj.AEID = INT.getElement(root, 'aei', obj.AEID)
-	obj.requestReachability = INT.getElement(root, 'rr', obj.requestReachability)
-	obj.pointOfAccess = INT.getElement(root, 'poa', obj.pointOfAccess)
+	elems = _resourceBase_parseXML(obj, root)
+	obj.appID = INT.getChildElementValue(elems, 'api', obj.appID)
+	obj.AEID = INT.getChildElementValue(elems, 'aei', obj.AEID)
+	obj.requestReachability = INT.getChildElementValue(elems, 'rr', obj.requestReachability)
+	obj.pointOfAccess = INT.getChildElementValue(elems, 'poa', obj.pointOfAccess)
 
 
 def _AE_createXML(obj, isUpdate=False):
@@ -287,14 +292,14 @@ def _AE_createJSON(obj, isUpdate=False):
 #
 
 def _Container_parseXML(obj, root):
-	_resourceBase_parseXML(obj, root)
-	obj.maxNrOfInstances = INT.toInt(INT.getElement(root, 'mni', obj.maxNrOfInstances))
-	obj.maxByteSize = INT.toInt(INT.getElement(root, 'mbs', obj.maxByteSize))
-	obj.maxInstanceAge = INT.toInt(INT.getElement(root, 'mia', obj.maxInstanceAge))
-	obj.currentNrOfInstances = INT.toInt(INT.getElement(root, 'cni', obj.currentNrOfInstances))
-	obj.currentByteSize = INT.toInt(INT.getElement(root, 'cbs', obj.currentByteSize))
-	obj.oldest = INT.getElement(root, 'ol', obj.oldest)
-	obj.latest = INT.getElement(root, 'la', obj.latest)
+	elems = _resourceBase_parseXML(obj, root)
+	obj.maxNrOfInstances = INT.toInt(INT.getChildElementValue(elems, 'mni', obj.maxNrOfInstances))
+	obj.maxByteSize = INT.toInt(INT.getChildElementValue(elems, 'mbs', obj.maxByteSize))
+	obj.maxInstanceAge = INT.toInt(INT.getChildElementValue(elems, 'mia', obj.maxInstanceAge))
+	obj.currentNrOfInstances = INT.toInt(INT.getChildElementValue(elems, 'cni', obj.currentNrOfInstances))
+	obj.currentByteSize = INT.toInt(INT.getChildElementValue(elems, 'cbs', obj.currentByteSize))
+	obj.oldest = INT.getChildElementValue(elems, 'ol', obj.oldest)
+	obj.latest = INT.getChildElementValue(elems, 'la', obj.latest)
 
 
 def _Container_createXML(obj, isUpdate=False):
@@ -335,10 +340,10 @@ def _Container_createJSON(obj, isUpdate=False):
 #
 
 def _ContentInstance_parseXML(obj, root):
-	_resourceBase_parseXML(obj, root)
-	obj.contentInfo = INT.getElement(root, 'cnf', obj.contentInfo)
-	obj.contentSize = INT.toInt(INT.getElement(root, 'cs', obj.contentSize))
-	obj.content = INT.getElement(root, 'con', obj.content)
+	elems = _resourceBase_parseXML(obj, root)
+	obj.contentInfo = INT.getChildElementValue(elems, 'cnf', obj.contentInfo)
+	obj.contentSize = INT.toInt(INT.getChildElementValue(elems, 'cs', obj.contentSize))
+	obj.content = INT.getChildElementValue(elems, 'con', obj.content)
 
 
 def _ContentInstance_createXML(obj, isUpdate=False):
@@ -376,15 +381,15 @@ def _ContentInstance_createJSON(obj, isUpdate=False):
 #
 
 def _Group_parseXML(obj, root):
-	_resourceBase_parseXML(obj, root)
-	obj.maxNrOfMembers = INT.toInt(INT.getElement(root, 'mnm', obj.maxNrOfMembers))
-	obj.memberType = INT.toInt(INT.getElement(root, 'mt', obj.memberType))
-	obj.currentNrOfMembers = INT.toInt(INT.getElement(root, 'cnm', obj.currentNrOfMembers))
-	obj.memberIDs = INT.getElement(root, 'mid', obj.memberIDs)
-	obj.memberTypeValidated = INT.getElement(root, 'mtv', obj.memberTypeValidated)
-	obj.consistencyStrategy = INT.toInt(INT.getElement(root, 'csy', obj.consistencyStrategy))
-	obj.groupName = INT.getElement(root, 'gn', obj.groupName)
-	obj.fanOutPoint = INT.getElement(root, 'fopt', obj.fanOutPoint)
+	elems = _resourceBase_parseXML(obj, root)
+	obj.maxNrOfMembers = INT.toInt(INT.getChildElementValue(elems, 'mnm', obj.maxNrOfMembers))
+	obj.memberType = INT.toInt(INT.getChildElementValue(elems, 'mt', obj.memberType))
+	obj.currentNrOfMembers = INT.toInt(INT.getChildElementValue(elems, 'cnm', obj.currentNrOfMembers))
+	obj.memberIDs = INT.getChildElementValue(elems, 'mid', obj.memberIDs)
+	obj.memberTypeValidated = INT.getChildElementValue(elems, 'mtv', obj.memberTypeValidated)
+	obj.consistencyStrategy = INT.toInt(INT.getChildElementValue(elems, 'csy', obj.consistencyStrategy))
+	obj.groupName = INT.getChildElementValue(elems, 'gn', obj.groupName)
+	obj.fanOutPoint = INT.getChildElementValue(elems, 'fopt', obj.fanOutPoint)
 
 
 def _Group_createXML(obj, isUpdate):
@@ -437,14 +442,30 @@ def _Group_createJSON(obj, isUpdate):
 #
 
 def _Subscription_parseXML(obj, root):
-	_resourceBase_parseXML(obj, root)
-	obj.notificationURI = INT.getElement(root, 'nu', obj.notificationURI)
-	obj.notificationContentType = INT.toInt(INT.getElement(root, 'nct', obj.notificationContentType))
-	obj.expirationCounter = INT.toInt(INT.getElement(root, 'exc', obj.expirationCounter))
-	obj.latestNotify = INT.getElement(root, 'ln', obj.latestNotify)
-	obj.groupID = INT.getElement(root, 'gpi', obj.groupID)
-	obj.notificationForwardingURI = INT.getElement(root, 'nfu', obj.notificationForwardingURI)
-	obj.subscriberURI = INT.getElement(root, 'su', obj.subscriberURI)
+	elems = _resourceBase_parseXML(obj, root)
+	obj.notificationURI = INT.getChildElementValue(elems, 'nu', obj.notificationURI)
+	obj.notificationContentType = INT.toInt(INT.getChildElementValue(elems, 'nct', obj.notificationContentType))
+	obj.eventNotificationCriteria = None
+	enc = elems.get('enc')
+	if enc is not None:
+		obj.eventNotificationCriteria = onem2mlib.EventNotificationCriteria()
+		obj.eventNotificationCriteria._parseXML(enc)
+	obj.expirationCounter = INT.toInt(INT.getChildElementValue(elems, 'exc', obj.expirationCounter))
+	obj.latestNotify = INT.toBool(INT.getChildElementValue(elems, 'ln', obj.latestNotify))
+	obj.groupID = INT.getChildElementValue(elems, 'gpi', obj.groupID)
+	obj.notificationForwardingURI = INT.getChildElementValue(elems, 'nfu', obj.notificationForwardingURI)
+	obj.subscriberURI = INT.getChildElementValue(elems, 'su', obj.subscriberURI)
+	obj.batchNotify = None
+	bn = elems.get('bn')
+	if bn is not None:
+		obj.batchNotify = onem2mlib.BatchNotify()
+		obj.batchNotify._parseXML(bn)
+	obj.rateLimit = None
+	rl = elems.get('rl')
+	if rl is not None:
+		obj.rateLimit = onem2mlib.RateLimit()
+		obj.rateLimit._parseXML(rl)
+	obj.pendingNotification = INT.toInt(INT.getChildElementValue(elems, 'pn', obj.pendingNotification))
 
 
 def _Subscription_createXML(obj, isUpdate=False):
@@ -452,16 +473,24 @@ def _Subscription_createXML(obj, isUpdate=False):
 	_resourceBase_createXML(obj, root, isUpdate)
 	INT.addToElement(root, 'nu', obj.notificationURI)
 	INT.addToElement(root, 'nct', obj.notificationContentType)
+	if obj.eventNotificationCriteria:
+		obj.eventNotificationCriteria._createXML(root)
 	if obj.expirationCounter != -1:
 		INT.addToElement(root, 'exc', obj.expirationCounter)
 	if obj.latestNotify:
-		INT.addToElement(root, 'ln', obj.latestNotify)
+		INT.addToElement(root, 'ln', 'true')
 	if obj.groupID:
 		INT.addToElement(root, 'gpi', obj.groupID)
 	if obj.notificationForwardingURI:
 		INT.addToElement(root, 'nfu', obj.notificationForwardingURI)
 	if obj.subscriberURI:
 		INT.addToElement(root, 'su', obj.subscriberURI)
+	if obj.batchNotify:
+		obj.batchNotify._createXML(root)
+	if obj.rateLimit:
+		obj.rateLimit._createXML(root)
+	if obj.pendingNotification:
+		INT.addToElement(root, 'pn', obj.pendingNotification)
 	return root
 
 
@@ -474,11 +503,27 @@ def _Subscription_parseJSON(obj, jsn):
 	_resourceBase_parseJSON(obj, _jsn)
 	obj.notificationURI = INT.getElementJSON(_jsn, 'nu', obj.notificationURI)
 	obj.notificationContentType = INT.getElementJSON(_jsn, 'nct', obj.notificationContentType)
+	obj.eventNotificationCriteria = None
+	enc = INT.getElementJSON(_jsn, 'enc')
+	if enc:
+		obj.eventNotificationCriteria = onem2mlib.EventNotificationCriteria()
+		obj.eventNotificationCriteria._parseJSON(enc)
 	obj.expirationCounter = INT.getElementJSON(_jsn, 'exc', obj.expirationCounter)
 	obj.latestNotify = INT.getElementJSON(_jsn, 'ln', obj.latestNotify)
 	obj.groupID = INT.getElementJSON(_jsn, 'gpi', obj.groupID)
 	obj.notificationForwardingURI = INT.getElementJSON(_jsn, 'nfu', obj.notificationForwardingURI)
 	obj.subscriberURI = INT.getElementJSON(_jsn, 'su', obj.subscriberURI)
+	obj.batchNotify = None
+	bn = INT.getElementJSON(_jsn, 'bn')
+	if bn:
+		obj.batchNotify = onem2mlib.BatchNotify()
+		obj.batchNotify._parseJSON(bn)
+	obj.rateLimit = None
+	rl = INT.getElementJSON(_jsn, 'rl')
+	if rl:
+		obj.rateLimit = onem2mlib.RateLimit()
+		obj.rateLimit._parseJSON(rl)
+	obj.pendingNotification = INT.getElementJSON(_jsn, 'pn', obj.pendingNotification)
 
 
 def _Subscription_createJSON(obj, isUpdate=False):
@@ -486,6 +531,8 @@ def _Subscription_createJSON(obj, isUpdate=False):
 	_resourceBase_createJSON(obj, data, isUpdate)
 	INT.addToElementJSON(data, 'nu', obj.notificationURI)
 	INT.addToElementJSON(data, 'nct', obj.notificationContentType)
+	if obj.eventNotificationCriteria:
+		data['enc'] = obj.eventNotificationCriteria._createJSON()
 	if obj.expirationCounter != -1:
 		INT.addToElementJSON(data, 'exc', obj.expirationCounter)
 	if obj.latestNotify:
@@ -496,4 +543,139 @@ def _Subscription_createJSON(obj, isUpdate=False):
 		INT.addToElementJSON(data, 'nfu', obj.notificationForwardingURI)
 	if obj.subscriberURI:
 		INT.addToElementJSON(data, 'su', obj.subscriberURI)
+	if obj.batchNotify:
+		data['bn'] = obj.batchNotify._createJSON()
+	if obj.rateLimit:
+		data['rl'] = obj.rateLimit._createJSON()
+	if obj.pendingNotification:
+		INT.addToElementJSON(data, 'pn', obj.pendingNotification)
 	return {'m2m:sub' : data}
+
+
+###############################################################################
+#
+#	BatchNotify
+#
+
+def _batchNotify_parseXML(obj, root):
+	obj.number = INT.toInt(INT.getElement(root, 'num', obj.number, relative=True))
+	obj.duration = INT.getElement(root, 'dur', obj.duration, relative=True)
+
+
+def _batchNotify_createXML(obj, root):
+	bn = INT.addElement(root, 'bn')
+	INT.addToElement(bn, 'num', obj.number)
+	INT.addToElement(bn, 'dur', obj.duration)
+
+
+def _batchNotify_parseJSON(obj, jsn):
+	obj.number = INT.getElementJSON(jsn, 'num', obj.number)
+	obj.duration = INT.getElementJSON(jsn, 'dur', obj.duration)
+
+
+def _batchNotify_createJSON(obj):
+	jsn = {}
+	INT.addToElementJSON(jsn, 'num', obj.number)
+	INT.addToElementJSON(jsn, 'dur', obj.duration)
+	return jsn
+
+
+###############################################################################
+#
+#	RateLimit
+#
+
+def _rateLimit_parseXML(obj, root):
+	obj.maxNrOfNotify = INT.toInt(INT.getElement(root, 'mnn', obj.maxNrOfNotify, relative=True))
+	obj.timeWindow = INT.getElement(root, 'tww', obj.timeWindow, relative=True)
+
+
+def _rateLimit_createXML(obj, root):
+	rl = INT.addElement(root, 'rl')
+	INT.addToElement(rl, 'mnn', obj.maxNrOfNotify)
+	INT.addToElement(rl, 'tww', obj.timeWindow)
+
+
+def _rateLimit_parseJSON(obj, jsn):
+	obj.maxNrOfNotify = INT.getElementJSON(jsn, 'mnn', obj.maxNrOfNotify)
+	obj.timeWindow = INT.getElementJSON(jsn, 'tww', obj.timeWindow)
+
+
+def _rateLimit_createJSON(obj):
+	jsn = {}
+	INT.addToElementJSON(jsn, 'mnn', obj.maxNrOfNotify)
+	INT.addToElementJSON(jsn, 'tww', obj.timeWindow)
+	return jsn
+
+
+###############################################################################
+#
+#	EventNotificationCriteria
+#
+
+def _eventNotificationCriteria_parseXML(obj, root):
+	elems = INT.getChildElements(root)
+	obj.notificationEventType = [ int(t) for t in INT.getChildElementValue(elems, 'net', []) ]
+	obj.createdBefore = INT.getChildElementValue(elems, 'crb', obj.createdBefore)
+	obj.createdAfter = INT.getChildElementValue(elems, 'cra', obj.createdAfter)
+	obj.modifiedSince = INT.getChildElementValue(elems, 'ms', obj.modifiedSince)
+	obj.unmodifiedSince = INT.getChildElementValue(elems, 'us', obj.unmodifiedSince)
+	obj.stateTagSmaller = INT.toInt(INT.getChildElementValue(elems, 'sts', obj.stateTagSmaller))
+	obj.stateTagBigger = INT.toInt(INT.getChildElementValue(elems, 'stb', obj.stateTagBigger))
+	obj.expireBefore = INT.getChildElementValue(elems, 'exb', obj.expireBefore)
+	obj.expireAfter = INT.getChildElementValue(elems, 'exa', obj.expireAfter)
+	obj.sizeAbove = INT.toInt(INT.getChildElementValue(elems, 'sza', obj.sizeAbove))
+	obj.sizeBelow = INT.toInt(INT.getChildElementValue(elems, 'szb', obj.sizeBelow))
+	obj.contentType = INT.getChildElementValue(elems, 'cty', [])
+	obj.attribute = INT.getChildElementValue(elems, 'atr', [])
+
+
+def _eventNotificationCriteria_createXML(obj, root):
+	enc = INT.addElement(root, 'enc')
+	INT.addToElement(enc, 'crb', obj.createdBefore)
+	INT.addToElement(enc, 'cra', obj.createdAfter)
+	INT.addToElement(enc, 'ms', obj.modifiedSince)
+	INT.addToElement(enc, 'us', obj.unmodifiedSince)
+	INT.addToElement(enc, 'sts', obj.stateTagSmaller)
+	INT.addToElement(enc, 'stb', obj.stateTagBigger)
+	INT.addToElement(enc, 'exb', obj.expireBefore)
+	INT.addToElement(enc, 'exa', obj.expireAfter)
+	INT.addToElement(enc, 'sza', obj.sizeAbove)
+	INT.addToElement(enc, 'szb', obj.sizeBelow)
+	INT.addToElement(enc, 'cty', obj.contentType)
+	INT.addToElement(enc, 'atr', obj.attribute)
+	INT.addToElement(enc, 'net', obj.notificationEventType)
+
+
+def _eventNotificationCriteria_parseJSON(obj, jsn):
+	obj.notificationEventType = INT.getElementJSON(jsn, 'net', [])
+	obj.createdBefore = INT.getElementJSON(jsn, 'crb', obj.createdBefore)
+	obj.createdAfter = INT.getElementJSON(jsn, 'cra', obj.createdAfter)
+	obj.modifiedSince = INT.getElementJSON(jsn, 'ms', obj.modifiedSince)
+	obj.unmodifiedSince = INT.getElementJSON(jsn, 'us', obj.unmodifiedSince)
+	obj.stateTagSmaller = INT.getElementJSON(jsn, 'sts', obj.stateTagSmaller)
+	obj.stateTagBigger = INT.getElementJSON(jsn, 'stb', obj.stateTagBigger)
+	obj.expireBefore = INT.getElementJSON(jsn, 'exb', obj.expireBefore)
+	obj.expireAfter = INT.getElementJSON(jsn, 'exa', obj.expireAfter)
+	obj.sizeAbove = INT.getElementJSON(jsn, 'sza', obj.sizeAbove)
+	obj.sizeBelow = INT.getElementJSON(jsn, 'szb', obj.sizeBelow)
+	obj.contentType = INT.getElementJSON(jsn, 'cty', [])
+	obj.attribute = INT.getElementJSON(jsn, 'atr', [])
+
+
+def _eventNotificationCriteria_createJSON(obj):
+	jsn = {}
+	INT.addToElementJSON(jsn, 'crb', obj.createdBefore)
+	INT.addToElementJSON(jsn, 'cra', obj.createdAfter)
+	INT.addToElementJSON(jsn, 'ms', obj.modifiedSince)
+	INT.addToElementJSON(jsn, 'us', obj.unmodifiedSince)
+	INT.addToElementJSON(jsn, 'sts', obj.stateTagSmaller)
+	INT.addToElementJSON(jsn, 'stb', obj.stateTagBigger)
+	INT.addToElementJSON(jsn, 'exb', obj.expireBefore)
+	INT.addToElementJSON(jsn, 'exa', obj.expireAfter)
+	INT.addToElementJSON(jsn, 'sza', obj.sizeAbove)
+	INT.addToElementJSON(jsn, 'szb', obj.sizeBelow)
+	INT.addToElementJSON(jsn, 'cty', obj.contentType)
+	INT.addToElementJSON(jsn, 'atr', obj.attribute)
+	INT.addToElementJSON(jsn, 'net', obj.notificationEventType)
+	return jsn
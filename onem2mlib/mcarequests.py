@@ -4,13 +4,14 @@
 #	(c) 2017 by Andreas Kraft
 #	License: BSD 3-Clause License. See the LICENSE file for further details.
 #
-#	This module contains helper functions to communicate with an CSE over the Mca interface via HTTP.
+#	This module contains helper functions to communicate with an CSE over the Mca interface.
+#	The requests are sent through the transport of a Session, see onem2mlib.transport.
 #
 
-import requests
 import onem2mlib.internal
 import onem2mlib.constants as CON
 import onem2mlib.exceptions as EXC
+import onem2mlib.transport as TRN
 
 
 ###############################################################################
@@ -29,18 +30,12 @@ def retrieveFromCSE(resource):
 	if not _isValidResource(resource):
 		lastError = 'Invalid resource'
 		return False
-	if resource.resourceName:
-		response = get(resource.session, resource._structuredResourceID())
-	else:
-		response = get(resource.session, resource.resourceID)
-	if response and response.status_code == 200:
-		#print(response)
-		resource._parseResponse(response)
-		return True
-	if response:
-		lastError = str(response.status_code) + ' - ' + response.text
-		#print(str(response.status_code) + ' - ' + response.text)
-	return False
+	path = _retrievePath(resource)
+	response = get(resource.session, path)
+	if not _handleResponse(resource, response, 200):
+		return False
+	_updateCache(resource, 'GET', path)
+	return True
 
 
 def createInCSE(resource, type):
@@ -53,14 +48,10 @@ def createInCSE(resource, type):
 	content = resource._createContent(False)
 	#print(content)
 	response =  create(resource.session, resource.parent.resourceID, type, content)
-	if response and response.status_code == 201:
-		#print(response)
-		resource._parseResponse(response)	# update own fields with response
-		return True
-	if response:
-		lastError = str(response.status_code) + ' - ' + response.text
-		#print(str(response.status_code) + ' - ' + response.text)
-	return False
+	if not _handleResponse(resource, response, 201):	# update own fields with response
+		return False
+	_updateCache(resource, 'POST')
+	return True
 
 
 def deleteFromCSE(resource):
@@ -71,12 +62,10 @@ def deleteFromCSE(resource):
 		lastError = 'Invalid resource'
 		return False
 	response = delete(resource.session, resource.resourceID)
-	if response and response.status_code == 200:
-		return True
-	if response:
-		lastError = str(response.status_code) + ' - ' + response.text
-		#print(response.status_code)
-	return False
+	if not _handleResponse(resource, response, 200, parse=False):
+		return False
+	_updateCache(resource, 'DELETE')
+	return True
 
 
 def updateInCSE(resource, type):
@@ -89,43 +78,19 @@ def updateInCSE(resource, type):
 	content = resource._createContent(True)
 	#print(content)
 	response = update(resource.session, resource.resourceID, type, content)
-	if response and response.status_code == 200:
-		#print(response)
-		resource._parseResponse(response)	# update own fields with response
-		return True
-	if response:
-		#print(response)
-		lastError = str(response.status_code) + ' - ' + response.text
-		#print(response.status_code)
-	return False
+	if not _handleResponse(resource, response, 200):	# update own fields with response
+		return False
+	_updateCache(resource, 'PUT')
+	return True
 
 
 # Find resources under a resource in the CSE
-def discoverInCSE(resource, filter=None, filterOperation=None, structuredResult=False):
+def discoverInCSE(resource, filter=None, filterOperation=None, structuredResult=False, limit=None, offset=None, level=None):
 	global lastError
 	lastError = ''
 
-	path = resource.resourceID + '?fu=1&drt='+str(1 if structuredResult else 2)
-	if filter and isinstance(filter, list):						# Construct the filter parameters
-		for key,val in filter:
-			path += '&' + key + '=' + val
-	if filterOperation and isinstance(filterOperation, int):	# Add filter operation
-		path += '&fo=' + str(filterOperation)
-	#print(path)
-	response = get(resource.session, path)
-	if response and response.status_code == 200:
-		#print(response.text)
-		if resource.session.encoding == CON.Encoding_XML:
-			return onem2mlib.internal.getElement(onem2mlib.internal.responseToXML(response), 'm2m:uril', default=[])	# setting default because: Make sure that the result is a list
-		elif resource.session.encoding == CON.Encoding_JSON:
-			return onem2mlib.internal.getElementJSON(response.json(), 'm2m:uril', default=[])
-		raise EXC.NotSupportedError('Encoding not supported: ' + str(self.session.encoding))
-
-	if response:
-		lastError = str(response.status_code) + ' - ' + response.text
-	else:
-		raise EXC.CSEOperationError('Response from CSE must not be None.')
-	return None
+	response = get(resource.session, _discoveryPath(resource, filter, filterOperation, structuredResult, limit, offset, level))
+	return _parseDiscoveryResponse(resource, response)
 
 
 ###############################################################################
@@ -137,64 +102,110 @@ def discoverInCSE(resource, filter=None, filterOperation=None, structuredResult=
 
 # Get a resource from the CSE
 def get(session, path):
-	try:
-		#print(_getPath(session, path))
-		return requests.get(_getPath(session, path), headers=_getHeaders(session), timeout=CON.NETWORK_REQUEST_TIMEOUT)
-	except Exception as e:
-		return None
+	return _request(session, 'GET', path)
 
 # Delete an existing resource on the CSE
 def delete(session, path):
-	try:
-		return requests.delete(_getPath(session, path), headers=_getHeaders(session), timeout=CON.NETWORK_REQUEST_TIMEOUT)
-	except Exception as e:
-		return None
+	return _request(session, 'DELETE', path)
 
 # Create a new resource on the CSE
 def create(session, path, type, body):
-	try:
-		return requests.post(_getPath(session, path), headers=_getHeaders(session, type), data=body, timeout=CON.NETWORK_REQUEST_TIMEOUT)
-	except Exception as e:
-		return None
+	return _request(session, 'POST', path, type, body)
 
 # Update an existing resource on the CSE
 def update(session, path, type, body):
+	return _request(session, 'PUT', path, type, body)
+
+
+# Send a request through the transport of the session. Return None in case of an error.
+def _request(session, method, path, type=None, body=None):
 	try:
-		return requests.put(_getPath(session, path), headers=_getHeaders(session, type), data=body, timeout=CON.NETWORK_REQUEST_TIMEOUT)
+		#print(TRN._getPath(session, path))
+		return session.transport.request(session, method, path, type, body)
 	except Exception as e:
 		return None
 
 
+# Close the connections of a session
+def closeConnection(session):
+	session.transport.close(session)
+
+
 ###############################################################################
 
 #
 #	Internal helpers
 #
 
-def _getHeaders(session, type=None):
-	headers = dict()
-	headers['X-M2M-Origin'] = session.originator
-	if session.encoding == CON.Encoding_XML:
-		encoding = 'application/xml'
-	else:
-		encoding = 'application/json'
+# Return the path to retrieve a resource, either its structured resourceID or its resourceID
+def _retrievePath(resource):
+	if resource.resourceName:
+		return resource._structuredResourceID()
+	return resource.resourceID
 
-	if type:
-		headers['Content-Type'] = encoding + ';ty=' + str(type)
-		headers['Accept'] = encoding
+
+# Check the status code of a response and update the resource's fields with the response,
+# or set the lastError accordingly.
+def _handleResponse(resource, response, statusCode, parse=True):
+	global lastError
+	if response and response.status_code == statusCode:
+		#print(response)
+		if parse:
+			resource._parseResponse(response)
+		return True
+	if response:
+		lastError = str(response.status_code) + ' - ' + response.text
+		#print(str(response.status_code) + ' - ' + response.text)
+	return False
+
+
+# Update the session's resource cache after a successful request. Creating or deleting a 
+# resource also changes its parent resource (e.g. the currentNrOfInstances of a container).
+def _updateCache(resource, method, path=None):
+	cache = resource.session._cache
+	if method == 'DELETE':
+		cache.remove(resource.resourceID)
 	else:
-		headers['Content-Type'] = encoding
-		headers['Accept'] = encoding
+		cache.put(resource, path)
+	if method in ['POST', 'DELETE'] and resource.parent:
+		cache.invalidate(resource.parent.resourceID)
+
+
+# Construct the path for a discovery request
+def _discoveryPath(resource, filter=None, filterOperation=None, structuredResult=False, limit=None, offset=None, level=None):
+	path = resource.resourceID + '?fu=1&drt='+str(1 if structuredResult else 2)
+	if filter and isinstance(filter, list):						# Construct the filter parameters
+		for key,val in filter:
+			path += '&' + key + '=' + val
+	if filterOperation and isinstance(filterOperation, int):	# Add filter operation
+		path += '&fo=' + str(filterOperation)
+	if limit is not None:										# Add maximum number of results
+		path += '&lim=' + str(limit)
+	if offset:													# Add offset into the results
+		path += '&ofst=' + str(offset)
+	if level:													# Add maximum level below the resource
+		path += '&lvl=' + str(level)
+	#print(path)
+	return path
 
-	headers['Accept'] = encoding
-	return headers
 
+# Return the list of resource IDs from a discovery response
+def _parseDiscoveryResponse(resource, response):
+	global lastError
+	if response and response.status_code == 200:
+		#print(response.text)
+		if resource.session.encoding == CON.Encoding_XML:
+			return onem2mlib.internal.getElement(onem2mlib.internal.decodeResponse(response, CON.Encoding_XML), 'm2m:uril', default=[])	# setting default because: Make sure that the result is a list
+		elif resource.session.encoding in onem2mlib.internal.jsonEncodings:
+			return onem2mlib.internal.getElementJSON(onem2mlib.internal.decodeResponse(response, resource.session.encoding), 'm2m:uril', default=[])
+		raise EXC.NotSupportedError('Encoding not supported: ' + str(resource.session.encoding))
 
-def _getPath(session, path):
-	if path and path[0] == '/':
-		return session.address+'/~' + path
+	if response is not None:
+		lastError = str(response.status_code) + ' - ' + response.text
 	else:
-		return session.address+'/~/' + path
+		raise EXC.CSEOperationError('Response from CSE must not be None.')
+	return None
+
 
 def _isValidResource(resource):
 	return	(resource.type == CON.Type_CSEBase and resource.session) or \
@@ -20,22 +20,56 @@ One can provide callback functions, either for general handling, or specific for
 subscription. The callback function must have the form ``function(resource)`` where
 *resource* is the changed resource from the notification. It is up to this callback function
 to determine the correct type by consulting the `onem2mlib.ResourceBase.type` attribute.
+The resource is only decoded when one of its attributes is accessed for the first time, and
+notifications for unknown subscriptions are dropped without decoding the resource at all.
+A callback function can also be a coroutine function (``async def function(resource)``). 
+Coroutines are run in an asyncio event loop of the notification sub-module.
 
 A program can now subscribe to resources by calling the `onem2mlib.ResourceBase.subscribe`()
 method. It is notified through the callback function every time that resource is modified.
 
+When subscribing with a `onem2mlib.BatchNotify` then the CSE collects notifications and sends
+them in batches. The resources of a batch are passed one by one to the callback function, or as
+a list to a batch callback function of the form ``function(resources)``, if one was provided.
+
 The sub-module is shutdown by calling `onem2mlib.notifications.shutdownNotifications`().
 This method also automatically shuts down the server when the parent program terminates.
+
+Notifications are received by a multi-threaded http server, or alternatively by an asyncio based
+http server that handles many persistent connections in a single thread (see the *server*
+argument of `onem2mlib.notifications.setupNotifications`()). When the decoding of notifications
+becomes the bottleneck, then several receiver processes can share the notification port (see
+the *processes* argument). Received notifications are put into a bounded queue and the callback functions are called by a pool of worker threads,
+so that a slow callback function doesn't block the receiving of further notifications. 
+When the queue is full then further notifications are rejected until there is space again.
+Statistics about the queue and the processed notifications can be retrieved with the
+`onem2mlib.notifications.getNotificationStatistics`() function.
+
+Notifications can also be coalesced by providing a *coalesceWindow* to 
+`onem2mlib.notifications.setupNotifications`(). Then all the notifications for a subscription
+that are received within that time window are collapsed, and only the latest notification is
+passed to the callback function at the end of the window. This is useful for callbacks that only
+need the latest state of a resource, e.g. to update a display.
+
+The subscriptions can optionally be recorded in a persistent registry by providing a *registry* 
+file to `onem2mlib.notifications.setupNotifications`(). When the program is restarted, e.g. after
+a crash, subscribing to the same resource again re-attaches to the existing &lt;subscription>
+resource in the CSE instead of creating a new one. This requires that the subscription has the same
+attributes, e.g. *batchNotify*, otherwise it is replaced by a new one. Subscriptions in the registry 
+that are not needed anymore can be removed with `onem2mlib.notifications.removeOrphanedSubscriptions`().
 """
 
-import atexit, threading, json
-from http.server import BaseHTTPRequestHandler, HTTPServer
+import atexit, threading, queue, time, sqlite3, asyncio, inspect, socket, signal, multiprocessing, re
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 import urllib.parse
 
 import onem2mlib
 import onem2mlib.exceptions as EXC
 import onem2mlib.constants as CON
 import onem2mlib.internal as INT
+import onem2mlib.mcarequests as MCA
+import onem2mlib.transport as TRN
 
 _isEnabled = False
 _host = None
@@ -53,11 +87,17 @@ _allowedSubscriptionResources = [
 	CON.Type_RemoteCSE
 ]
 
+# The server types that receive notifications through the connection of a session's transport
+_transportServers = {
+	CON.Sub_server_mqtt			: TRN.MQTTTransport,
+	CON.Sub_server_websocket	: TRN.WebSocketTransport
+}
+
 
-def setupNotifications(callback=None, host='localhost', port=1400):
+def setupNotifications(callback=None, host='localhost', port=1400, workers=CON.Sub_def_workers, queueSize=CON.Sub_def_queueSize, orderPerSubscription=True, coalesceWindow=CON.Sub_def_coalesceWindow, registry=None, server=CON.Sub_def_server, processes=CON.Sub_def_processes, deduplicationSize=CON.Sub_def_deduplicationSize, deduplicationWindow=CON.Sub_def_deduplicationWindow, session=None):
 	"""
 	Setup the notification sub-module. This also starts a http server listening on the
-	specified interface and port.
+	specified interface and port, and a pool of worker threads that call the callback functions.
 
 	Args:
 
@@ -69,12 +109,50 @@ def setupNotifications(callback=None, host='localhost', port=1400):
 	is receiced. This function will receive the notification's resource as the only argument.
 	This callback function is only a default and can be overriden by the callback function
 	in the `onem2mlib.ResourceBase.subscribe`() method.
+	- *workers*: Integer. The number of worker threads that call the callback functions. Optional,
+	the default is `onem2mlib.constants.Sub_def_workers`.
+	- *queueSize*: Integer. The maximum number of received notifications that wait for being
+	processed. Further notifications are rejected with an error status until there is space again.
+	Optional, the default is `onem2mlib.constants.Sub_def_queueSize`.
+	- *orderPerSubscription*: Boolean. If True then the notifications for the same subscription are
+	always processed by the same worker thread, ie. the callback functions are called in the order in which
+	the notifications were received. If False then all notifications are processed by the next free
+	worker thread, which gives the maximum parallelism. Optional, the default is True.
+	- *coalesceWindow*: Number. The time window in seconds in which notifications for the same subscription
+	are coalesced. Only the latest notification of a window is passed to the callback function, at the end
+	of the window. Optional, the default is `onem2mlib.constants.Sub_def_coalesceWindow` (no coalescing).
+	- *registry*: String. The path of a file in which the subscriptions are recorded (a sqlite database).
+	With a registry, subscriptions that still exist in the CSE from an earlier run of the program are
+	re-attached instead of creating new ones, if they have the same attributes. Optional, the default is None (no registry).
+	- *server*: Integer. The type of the http server that receives the notifications, either 
+	`onem2mlib.constants.Sub_server_threading` (a thread per connection) or `onem2mlib.constants.Sub_server_asyncio`
+	(all connections are handled by an asyncio event loop in a single thread, which scales better with
+	many connections and high notification rates). With `onem2mlib.constants.Sub_server_mqtt` the notifications are not
+	received by an http server, but via the MQTT broker connection of the *session*, on the request topic of the session's
+	originator. With `onem2mlib.constants.Sub_server_websocket` they are received via the WebSocket connection of the 
+	*session*, i.e. without a listening port. The *host* and *port* arguments are ignored in these cases. Optional, the
+	default is `onem2mlib.constants.Sub_def_server`.
+	- *processes*: Integer. The number of processes that receive and decode notifications. If greater than 1 then
+	this number of receiver processes is started, which share the notification port (SO_REUSEPORT). Each runs an
+	asyncio based server, and passes the decoded notifications on to this process, where the callback functions are
+	called. The *server* argument is ignored in this case. A `onem2mlib.exceptions.NotSupportedError` exception is 
+	raised when this is not supported by the operating system. Optional, the default is `onem2mlib.constants.Sub_def_processes`.
+	- *deduplicationSize*: Integer. The number of recently received notifications that are remembered by their
+	request identifier (*X-M2M-RI*) and subscription reference. A notification that is received again, e.g. when
+	the CSE retries after a timeout, is acknowledged without decoding it or calling the callback functions. The oldest
+	notifications are forgotten first. 0 or None disables the de-duplication. Optional, the default is 
+	`onem2mlib.constants.Sub_def_deduplicationSize`.
+	- *deduplicationWindow*: Number. The time in seconds after which a notification is forgotten and not recognized as
+	a duplicate anymore. None means no limit. Optional, the default is `onem2mlib.constants.Sub_def_deduplicationWindow`.
+	- *session*: `onem2mlib.Session`. The session with an *mqtt://* resp. *ws://* address whose connection is used to receive 
+	notifications with `onem2mlib.constants.Sub_server_mqtt` resp. `onem2mlib.constants.Sub_server_websocket`. Optional,
+	it is only needed for these server types.
 
 	The function returns a Boolean value that indicates whether the notification sub-module
 	was successfully started.
 	"""
 
-	global _host, _port, _callback, _notificationURI
+	global _host, _port, _callback, _notificationURI, _dispatcher, _coalescer, _registry, _deduplicator
 
 	if _notificationURI:
 		return True
@@ -85,11 +163,42 @@ def setupNotifications(callback=None, host='localhost', port=1400):
 		raise EXC.ConfigurationError('enableNotifications(): Missing host.')
 	if port == -1:
 		raise EXC.ConfigurationError('enableNotifications(): Missing port.')
+	if not workers or workers < 1:
+		raise EXC.ConfigurationError('enableNotifications(): Wrong number of workers.')
+	if server not in [ CON.Sub_server_threading, CON.Sub_server_asyncio, CON.Sub_server_mqtt, CON.Sub_server_websocket ]:
+		raise EXC.ConfigurationError('enableNotifications(): Unknown server type.')
+	if server in _transportServers and (not session or not isinstance(session.transport, _transportServers[server]) or processes != 1):
+		raise EXC.ConfigurationError('enableNotifications(): The server type requires a session with a ' + _transportServers[server].__name__ + ', and a single process.')
+	if not processes or processes < 1:
+		raise EXC.ConfigurationError('enableNotifications(): Wrong number of processes.')
+	if processes > 1 and (not hasattr(socket, 'SO_REUSEPORT') or 'fork' not in multiprocessing.get_all_start_methods()):
+		raise EXC.NotSupportedError('Multiple notification receiver processes are not supported on this platform.')
+	if coalesceWindow is not None and coalesceWindow < 0:
+		raise EXC.ConfigurationError('enableNotifications(): Wrong coalesce window.')
+	if (deduplicationSize is not None and deduplicationSize < 0) or (deduplicationWindow is not None and deduplicationWindow < 0):
+		raise EXC.ConfigurationError('enableNotifications(): Wrong de-duplication size or window.')
 	_host = host
 	_port = port
 	_callback = callback
-	_notificationURI = 'http://' + _host + ':' + str(_port)
-	_startNotificationServer()
+	try:
+		_registry = _SubscriptionRegistry(registry) if registry else None
+	except sqlite3.Error as e:
+		raise EXC.ConfigurationError('enableNotifications(): Cannot open registry: ' + str(e))
+	_deduplicator = _NotificationDeduplicator(deduplicationSize, deduplicationWindow) if deduplicationSize else None
+	try:
+		_startNotificationServer(server, processes, queueSize, session)	# first, before any threads are started
+	except Exception:
+		if _registry:
+			_registry.close()
+			_registry = None
+		_deduplicator = None
+		raise
+	if server in _transportServers:
+		_notificationURI = session.transport._uri(session)
+	else:
+		_notificationURI = 'http://' + _host + ':' + str(_port)
+	_dispatcher = _NotificationDispatcher(workers, queueSize, orderPerSubscription)
+	_coalescer = _NotificationCoalescer(coalesceWindow, _dispatcher) if coalesceWindow else None
 	enableNotifications()
 	return True
 
@@ -121,24 +230,50 @@ def disableNotifications():
 
 
 @atexit.register
-def shutdownNotifications():
+def shutdownNotifications(timeout=CON.Sub_def_shutdownTimeout, keepSubscriptions=False):
 	""" 
 	Shutdown the notification sub-module and the http server. It also removes subscriptions
 	created through the `onem2mlib.ResourceBase.subscribe`() method. After this no more 
 	notifications can be received through the sub-module.
 
+	Args:
+
+	- *timeout*: Number. The maximum time in seconds for the shutdown, which includes removing
+	the subscriptions in parallel and processing the already received notifications. Subscriptions
+	that are not removed in time are left in the CSE, and notifications that are not processed in
+	time are discarded. Optional, the default is `onem2mlib.constants.Sub_def_shutdownTimeout`.
+	None means no limit.
+	- *keepSubscriptions*: Boolean. If True then the subscriptions are not removed from the CSE, so
+	that they can be re-attached after a restart of the program. This requires a *registry*, see 
+	`onem2mlib.notifications.setupNotifications`(). Optional, the default is False.
+
 	**Note**
 
 	This function is automatically called when the parent program terminates.
 	"""
-	global _notificationURI
+	global _notificationURI, _dispatcher, _coalescer, _registry, _deduplicator
 
 	if not _notificationURI:
 		return
-	removeAllSubscriptions()
+	deadline = time.monotonic() + timeout if timeout is not None else None
+	if keepSubscriptions and _registry:
+		with _subscriptionsLock:
+			_subscriptions.clear()
+			_subscriptionIDToParentResourceID.clear()
+	else:
+		removeAllSubscriptions(timeout=_remainingTime(deadline))
 	disableNotifications()
 	_notificationURI = None
-	_stopNotificationServer()
+	_stopNotificationServer(_remainingTime(deadline))
+	if _coalescer:
+		_coalescer.stop(_remainingTime(deadline))		# pass on the pending notifications
+		_coalescer = None
+	if _dispatcher:
+		_dispatcher.stop(_remainingTime(deadline))		# process the already received notifications first
+	if _registry:
+		_registry.close()
+		_registry = None
+	_deduplicator = None
 
 
 def isNotificationEnabled():
@@ -150,6 +285,33 @@ def getNotificationURI():
 	""" String. Return the current notificationURI, or None when notifications are disabled. """
 	return _notificationURI
 
+
+def getNotificationStatistics():
+	"""
+	Return a dictionary with statistics about the received notifications. The dictionary
+	contains the following keys:
+
+	- *queued*: The number of notifications that currently wait for being processed.
+	- *processed*: The number of notifications for which a callback function was called.
+	- *rejected*: The number of notifications that were rejected because the queue was full.
+	- *dropped*: The number of notifications that were received but not processed, e.g. because
+	notifications were disabled or the subscription is not known (anymore).
+	- *errors*: The number of callback functions that raised an exception.
+	- *coalesced*: The number of notifications that were dropped in favour of a later notification
+	for the same subscription, see the *coalesceWindow* argument of `onem2mlib.notifications.setupNotifications`().
+	- *duplicates*: The number of notifications that were received more than once and were only acknowledged,
+	see the *deduplicationSize* argument of `onem2mlib.notifications.setupNotifications`().
+
+	All values are 0 when the notification sub-module is not set up.
+	"""
+	if not _dispatcher:
+		return { 'queued' : 0, 'processed' : 0, 'rejected' : 0, 'dropped' : 0, 'errors' : 0, 'coalesced' : 0, 'duplicates' : 0 }
+	statistics = _dispatcher.statistics()
+	if isinstance(_server, MultiProcessNotificationServer):
+		statistics['rejected'] += _server.rejected.value
+		statistics['duplicates'] += _server.duplicates.value
+	return statistics
+
 ###############################################################################
 #
 #	Handling temporary subscriptions / notifications
@@ -158,8 +320,19 @@ def getNotificationURI():
 
 _subscriptions = {}
 _subscriptionIDToParentResourceID = {}
+_subscriptionsLock = threading.RLock()
+
+
+# An entry for a subscription that is managed by the notification sub-module
+class _ManagedSubscription:
+	def __init__(self, subscription, resource, callback=None, batchCallback=None):
+		self.subscription = subscription
+		self.resource = resource
+		self.callback = callback
+		self.batchCallback = batchCallback
+
 
-def addSubscription(resource, callback=None):
+def addSubscription(resource, callback=None, batchNotify=None, batchCallback=None, rateLimit=None, latestNotify=None, pendingNotification=None, eventNotificationCriteria=None):
 	"""
 	Add a subscription to the given resource. This creates a &lt;subscription> resource for
 	that resource.
@@ -172,21 +345,65 @@ def addSubscription(resource, callback=None):
 	- *resource*: Resource to add the resource to.
 	- *callback*: Optional reference to a callback function. This function is called instead of
 	the one provided with the `onem2mlib.notifications.setupNotifications`() function.
+	- *batchNotify*: Optional `onem2mlib.BatchNotify` object. If present then the CSE sends the
+	notifications in batches.
+	- *batchCallback*: Optional reference to a callback function of the form ``function(resources)``.
+	It is called with the list of resources of a received notification, e.g. a batch of notifications, 
+	instead of calling the *callback* function for every single resource.
+	- *rateLimit*: Optional `onem2mlib.RateLimit` object. If present then the CSE limits the
+	number of notifications that are sent in a time window.
+	- *latestNotify*: Optional Boolean. If True then the CSE sends only the latest of the buffered 
+	notifications.
+	- *pendingNotification*: Optional Integer, one of `onem2mlib.constants.Sub_pn_sendLatest` or 
+	`onem2mlib.constants.Sub_pn_sendAllPending`.
+	- *eventNotificationCriteria*: Optional `onem2mlib.EventNotificationCriteria` object. If present
+	then the CSE only sends notifications for the events that match the criteria.
 
 	The method returns a Boolean indicating whether the subscription was successfully added.
 	"""
 
-	if resource.resourceID in _subscriptions:
+	if hasSubscription(resource):
 		return True
 	if resource.type not in _allowedSubscriptionResources:
 		raise EXC.NotSupportedError('Subscription not supported for this resource type')
-	sub = onem2mlib.Subscription(resource, notificationURI=[_notificationURI])
+	attributes = { 'batchNotify' : batchNotify, 'rateLimit' : rateLimit, 'latestNotify' : latestNotify, 'pendingNotification' : pendingNotification, 'eventNotificationCriteria' : eventNotificationCriteria }
+	sub = _reattachSubscription(resource, attributes)
 	if not sub:
-		return False
-	_addSubscription(resource, sub, callback)
+		sub = onem2mlib.Subscription(resource, notificationURI=[_notificationURI], **attributes)
+		if not sub:
+			return False
+	_addSubscription(resource, sub, callback, batchCallback)
 	return True
 
 
+def addSubscriptions(resources, workers=CON.Sub_def_bulkWorkers, timeout=None, **kwargs):
+	"""
+	Add subscriptions to many resources at once. The &lt;subscription> resources are
+	created in parallel.
+
+	This method might throw	a `onem2mlib.exceptions.NotSupportedError` exception in case
+	one of the target resource types doesn't support subscriptions. No subscription is 
+	added in this case.
+
+	Args:
+
+	- *resources*: List of resources to add subscriptions to.
+	- *workers*: Integer. The maximum number of subscriptions that are created in parallel.
+	Optional, the default is `onem2mlib.constants.Sub_def_bulkWorkers`.
+	- *timeout*: Number. The maximum time in seconds for adding the subscriptions. Subscriptions
+	that are not added in time are not created. Optional, the default is None (no limit).
+	- All other keyword arguments, e.g. *callback*, are the same as for 
+	`onem2mlib.notifications.addSubscription`() and apply to all subscriptions.
+
+	The method returns a list of Booleans, in the order of the *resources*, indicating whether
+	the respective subscription was successfully added.
+	"""
+	for resource in resources:
+		if resource.type not in _allowedSubscriptionResources:
+			raise EXC.NotSupportedError('Subscription not supported for this resource type')
+	return _bulkMap(lambda resource: addSubscription(resource, **kwargs), resources, workers, timeout)
+
+
 def removeSubscription(resource):
 	"""
 	Remove a subscription added prior by the `onem2mlib.notifications.addSubscription`()
@@ -204,6 +421,67 @@ def removeSubscription(resource):
 	return _removeSubscriptionByID(resource.resourceID)
 
 
+def removeSubscriptions(resources=None, workers=CON.Sub_def_bulkWorkers, timeout=None):
+	"""
+	Remove many subscriptions added prior by the `onem2mlib.notifications.addSubscription`()
+	or `onem2mlib.notifications.addSubscriptions`() methods at once. The &lt;subscription>
+	resources are deleted in parallel.
+
+	Args:
+
+	- *resources*: List of resources from which the subscriptions should be removed. Optional,
+	the default is None, which removes all subscriptions.
+	- *workers*: Integer. The maximum number of subscriptions that are removed in parallel.
+	Optional, the default is `onem2mlib.constants.Sub_def_bulkWorkers`.
+	- *timeout*: Number. The maximum time in seconds for removing the subscriptions. Subscriptions
+	that are not removed in time are kept, and they can be removed later. Optional, the default 
+	is None (no limit).
+
+	The method returns a list of Booleans, in the order of the *resources*, indicating whether
+	the respective subscription was successfully removed.
+	"""
+	if resources is None:
+		with _subscriptionsLock:
+			resourceIDs = list(_subscriptions.keys())
+	else:
+		resourceIDs = [ resource.resourceID if resource else None for resource in resources ]
+	return _bulkMap(_removeSubscriptionByID, resourceIDs, workers, timeout)
+
+
+def removeOrphanedSubscriptions(session, workers=CON.Sub_def_bulkWorkers, timeout=None):
+	"""
+	Remove the subscriptions that are recorded in the registry, but that were not re-attached
+	by the program, e.g. because the program doesn't subscribe to a resource anymore after
+	a restart, or because a replaced subscription could not be deleted. The &lt;subscription> resources are deleted from the CSE in parallel, and they
+	are removed from the registry. This function should be called after the program 
+	subscribed again to all the resources it needs.
+
+	Args:
+
+	- *session*: The `onem2mlib.Session` that is used to delete the subscriptions.
+	- *workers*: Integer. The maximum number of subscriptions that are removed in parallel.
+	Optional, the default is `onem2mlib.constants.Sub_def_bulkWorkers`.
+	- *timeout*: Number. The maximum time in seconds for removing the subscriptions. Optional, 
+	the default is None (no limit).
+
+	The method returns the number of removed subscriptions.
+	"""
+	if not _registry:
+		return 0
+	with _subscriptionsLock:
+		orphans = [ (ri, subscriptionID) for (ri, subscriptionID, _) in _registry.entries() if ri not in _subscriptions or _subscriptions[ri].subscription.resourceID != subscriptionID ]
+
+	def removeOrphan(orphan):
+		(ri, subscriptionID) = orphan
+		response = MCA.delete(session, subscriptionID)
+		if response is None or response.status_code not in [ 200, 404 ]:	# already deleted is fine as well
+			return False
+		_registry.remove(ri, subscriptionID)
+		return True
+
+	return _bulkMap(removeOrphan, orphans, workers, timeout).count(True)
+
+
 def hasSubscription(resource):
 	"""
 	Check whether a resource has a subscription attached, which is managed by the
@@ -218,41 +496,698 @@ def hasSubscription(resource):
 	"""
 	if not resource or not resource.resourceID:
 		return False
-	return resource.resourceID in _subscriptions.keys()
+	with _subscriptionsLock:
+		return resource.resourceID in _subscriptions
 
 
 # Add a subscription to the internal data strucures
-def _addSubscription(resource, sub, callback):
-	_subscriptions[resource.resourceID] = (sub, resource, callback)
-	_subscriptionIDToParentResourceID[sub.resourceID] = resource.resourceID
-	_subscriptionIDToParentResourceID[sub._structuredResourceID()] = resource.resourceID
+def _addSubscription(resource, sub, callback, batchCallback=None):
+	with _subscriptionsLock:
+		_subscriptions[resource.resourceID] = _ManagedSubscription(sub, resource, callback, batchCallback)
+		_subscriptionIDToParentResourceID[sub.resourceID] = resource.resourceID
+		_subscriptionIDToParentResourceID[sub._structuredResourceID()] = resource.resourceID
+	if _registry:
+		_registry.put(resource.resourceID, sub.resourceID, _notificationURI)
 
 
-# Remove a subscription from the internal data structures
+# Remove a subscription from the internal data structures, and delete it in the CSE
 def _removeSubscriptionByID(resourceID):
-	(sub, _, _) = _subscriptions.pop(resourceID)
-	_subscriptionIDToParentResourceID.pop(sub.resourceID)
-	_subscriptionIDToParentResourceID.pop(sub._structuredResourceID())
-	return sub.deleteFromCSE()
+	with _subscriptionsLock:
+		managed = _subscriptions.pop(resourceID, None)
+		if not managed:
+			return False
+		sub = managed.subscription
+		_subscriptionIDToParentResourceID.pop(sub.resourceID, None)
+		_subscriptionIDToParentResourceID.pop(sub._structuredResourceID(), None)
+	result = sub.deleteFromCSE()
+	if result and _registry:	# otherwise keep it for removeOrphanedSubscriptions()
+		_registry.remove(resourceID, sub.resourceID)
+	return result
+
+
+# Return the existing subscription of a resource that is recorded in the registry, or None.
+# The subscription must still exist in the CSE, it must point to the current notificationURI,
+# and it must have the requested *attributes*. Otherwise the recorded subscription is deleted,
+# so that a new one can be created. If it cannot be deleted then it stays in the registry
+# for removeOrphanedSubscriptions().
+def _reattachSubscription(resource, attributes):
+	if not _registry:
+		return None
+	entry = _registry.get(resource.resourceID)
+	if not entry:
+		return None
+	if entry[1] == _notificationURI:
+		sub = onem2mlib.Subscription(resource, resourceID=entry[0], instantly=False)
+		if sub.retrieveFromCSE() and sub.parentID == resource.resourceID and _notificationURI in (sub.notificationURI or []):
+			if _matchesSubscriptionAttributes(sub, onem2mlib.Subscription(resource, instantly=False, **attributes)):
+				return sub
+	response = MCA.delete(resource.session, entry[0])
+	if response is not None and response.status_code in [ 200, 404 ]:	# already deleted is fine as well
+		_registry.remove(resource.resourceID, entry[0])
+	return None
+
+
+# The attributes of a subscription that must match when re-attaching it
+_reattachAttributes = [ 'bn', 'rl', 'ln', 'pn', 'enc' ]
+
+# The values that a CSE may return for attributes that were not set when the subscription was created
+_reattachDefaults = { 'ln' : [ False ], 'enc' : [ { 'net' : [ CON.Sub_net_updateResource ] } ] }
+
+
+# Return the attributes of a subscription that are compared when re-attaching it, in their 
+# JSON representation. Attributes that are not set are None.
+def _subscriptionAttributesJSON(sub):
+	jsn = sub._createJSON()['m2m:sub']
+	return { name : jsn.get(name) for name in _reattachAttributes }
+
+
+# Check whether an existing subscription has the *requested* attributes. Attributes that are not
+# requested must either be absent in the existing subscription, or have the CSE's default value.
+def _matchesSubscriptionAttributes(existing, requested):
+	existingJSON = _subscriptionAttributesJSON(existing)
+	for (name, value) in _subscriptionAttributesJSON(requested).items():
+		if value is not None:
+			if existingJSON[name] != value:
+				return False
+		elif existingJSON[name] is not None and existingJSON[name] not in _reattachDefaults.get(name, []):
+			return False
+	return True
+
+
+# The registry records the subscriptions in a sqlite database, so that they can be re-attached
+# after a restart of the program.
+class _SubscriptionRegistry:
+
+	def __init__(self, path):
+		self.lock = threading.Lock()
+		self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)	# autocommit
+		self.connection.execute('PRAGMA journal_mode=WAL')
+		self.connection.execute('CREATE TABLE IF NOT EXISTS subscriptions (resourceID TEXT NOT NULL, subscriptionID TEXT NOT NULL, notificationURI TEXT, PRIMARY KEY (resourceID, subscriptionID))')
+
+
+	# Return a tuple (subscriptionID, notificationURI) of the latest subscription for a resource, 
+	# or None. Earlier subscriptions of the resource are only recorded when they couldn't be deleted.
+	def get(self, resourceID):
+		with self.lock:
+			return self.connection.execute('SELECT subscriptionID, notificationURI FROM subscriptions WHERE resourceID = ? ORDER BY rowid DESC', (resourceID,)).fetchone()
+
+
+	def put(self, resourceID, subscriptionID, notificationURI):
+		with self.lock:
+			self.connection.execute('INSERT OR REPLACE INTO subscriptions VALUES (?, ?, ?)', (resourceID, subscriptionID, notificationURI))
+
+
+	def remove(self, resourceID, subscriptionID):
+		with self.lock:
+			self.connection.execute('DELETE FROM subscriptions WHERE resourceID = ? AND subscriptionID = ?', (resourceID, subscriptionID))
+
+
+	# Return a list of tuples (resourceID, subscriptionID, notificationURI)
+	def entries(self):
+		with self.lock:
+			return self.connection.execute('SELECT resourceID, subscriptionID, notificationURI FROM subscriptions').fetchall()
+
+
+	def close(self):
+		with self.lock:
+			self.connection.close()
+
+
+_registry = None
 
 
 # Remove all subscriptions from internal data structures
-def removeAllSubscriptions():
+def removeAllSubscriptions(workers=CON.Sub_def_bulkWorkers, timeout=None):
 	"""
 	Remove all the subscriptions that have been added through the 
-	`onem2mlib.notifications.addSubscription`() function.
+	`onem2mlib.notifications.addSubscription`() function. The subscriptions are
+	removed in parallel, see `onem2mlib.notifications.removeSubscriptions`() for
+	the arguments.
+
+	The method returns a Boolean indicating whether all subscriptions were successfully removed.
 	"""
-	keys = list(_subscriptions.keys())
-	for k in keys:
-		_removeSubscriptionByID(k)
+	return all(removeSubscriptions(None, workers=workers, timeout=timeout))
+
+
+# Call a function for each of the items from at most *workers* threads, and return the 
+# results in the order of the items. Items that are not processed before the timeout are 
+# skipped, and their result is False. The worker threads are daemon threads, so that
+# requests that are still running after the timeout don't block the termination of the program.
+def _bulkMap(function, items, workers, timeout):
+	items = list(items)
+	results = [ False ] * len(items)
+	work = queue.Queue()
+	for item in enumerate(items):
+		work.put(item)
+	deadline = time.monotonic() + timeout if timeout is not None else None
+
+	def run():
+		while deadline is None or time.monotonic() < deadline:
+			try:
+				(index, item) = work.get_nowait()
+			except queue.Empty:
+				return
+			try:
+				results[index] = bool(function(item))
+			except Exception as e:
+				results[index] = False
+
+	threads = [ threading.Thread(target=run, name='onem2mlib-subscriptions-' + str(i), daemon=True) for i in range(min(max(workers or 1, 1), len(items))) ]
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join(_remainingTime(deadline))
+	return list(results)
+
+
+# Return the time in seconds until a deadline, but not less than 0, or None for no deadline
+def _remainingTime(deadline):
+	return None if deadline is None else max(0, deadline - time.monotonic())
 
 
 
+###############################################################################
+#
+#	Notification processing
+#
+
+# Decode a notification. Return a list of tuples (subscriptionReference, resources), one for
+# each subscription. The list is empty when the notification is a verification request or
+# doesn't contain a resource. An aggregated notification (batch) results in more than one 
+# resource for a subscription.
+def _decodeNotification(contentType, data):
+	if not contentType:
+		return []
+	if contentType.lower().startswith('application/xml'):
+		notifications = _decodeXMLNotification(data)
+	elif contentType.lower().startswith('application/json'):
+		notifications = _decodeJSONNotification(data)
+	elif contentType.lower().startswith('application/cbor') and INT.cbor2:
+		notifications = _decodeJSONNotification(data, CON.Encoding_CBOR)
+	else:
+		return []
+	result = {}		# group the resources by subscription, keep the order
+	for (resource, sur) in notifications:
+		result.setdefault(sur, []).append(resource)
+	return list(result.items())
+
+
+# Decode XML notifications. Return a list of tuples (resource, subscriptionReference).
+def _decodeXMLNotification(data):
+	tree = INT.stringToXML(data)
+	if INT.xmlQualifiedName(tree, True) == 'agn':		# aggregated notification
+		return [ n for n in [ _decodeXMLSingleNotification(sgn) for sgn in tree if INT.xmlQualifiedName(sgn, True) == 'sgn' ] if n ]
+	notification = _decodeXMLSingleNotification(tree)
+	return [ notification ] if notification else []
+
+
+# Decode a single XML notification, relative to its element
+def _decodeXMLSingleNotification(tree):
+	(vrq, sur, rep) = _notificationElementsXML(tree)
+
+	# check verification request
+	if INT.toBool(vrq):
+		return None	# do nothing
+
+	# get the sur first
+	if not sur:
+		return None	# must have a subscription ID
+
+	# get resource from the already parsed tree. It is decoded later when needed.
+	if rep is not None and len(rep) > 0:
+		tree = rep[0]
+		type = INT.getTypeFromDocument(tree, CON.Encoding_XML)
+		if INT._resourceClassFromType(type):
+			return (_LazyResource(type, tree, CON.Encoding_XML), sur)
+	return None
+
+
+# Return the verification request, subscription reference and representation (element) of 
+# an XML notification. They are accessed directly in the m2m:sgn structure. Only if this fails, 
+# e.g. for a different structure, the whole notification is searched.
+def _notificationElementsXML(tree):
+	elems = INT.getChildElements(tree)
+	vrq = INT.getChildElementValue(elems, 'vrq')
+	sur = INT.getChildElementValue(elems, 'sur')
+	nev = elems.get('nev')
+	rep = nev.find('rep') if nev is not None else None
+	if sur is None or (vrq is None and rep is None):
+		vrq = INT.getElement(tree, 'vrq', relative=True)
+		sur = INT.getElement(tree, 'sur', relative=True)
+		reps = INT.getElements(tree, 'rep', relative=True)
+		rep = reps[0] if reps else None
+	return (vrq, sur, rep)
+
+
+# Decode JSON notifications, or CBOR notifications, which have the same structure. Return
+# a list of tuples (resource, subscriptionReference).
+def _decodeJSONNotification(data, encoding=CON.Encoding_JSON):
+	jsn = INT.decodeJSON(data, encoding)
+	#print(jsn)
+	agn = jsn.get('m2m:agn') if isinstance(jsn, dict) else None
+	if agn is not None:										# aggregated notification
+		sgns = INT.getElementJSON(agn, 'm2m:sgn', INT.getElementJSON(agn, 'sgn', []))
+		if isinstance(sgns, dict):
+			sgns = [ sgns ]
+		return [ n for n in [ _decodeJSONSingleNotification(sgn) for sgn in sgns if isinstance(sgn, dict) ] if n ]
+	notification = _decodeJSONSingleNotification(jsn)
+	return [ notification ] if notification else []
+
+
+# Decode a single JSON notification
+def _decodeJSONSingleNotification(jsn):
+	(vrq, sur, rep) = _notificationElementsJSON(jsn)
+
+	# check verification request
+	if vrq == True:
+		return None	# do nothing
+
+	# get the sur first
+	if sur is None:
+		return None	# must have a subscription ID
+
+	# get resource. It is decoded later when needed.
+	if isinstance(rep, dict) and len(rep) > 0:
+		type = INT.getTypeFromDocument(rep, CON.Encoding_JSON)
+		if INT._resourceClassFromType(type):
+			return (_LazyResource(type, rep, CON.Encoding_JSON), sur)
+	return None
+
+
+# Return the verification request, subscription reference and representation of a JSON
+# notification. They are accessed directly in the m2m:sgn structure. Only if this fails, 
+# e.g. for a different structure, the whole notification is searched in a single pass.
+# TODO remove the "m2m:" variants later when om2m corrects this
+def _notificationElementsJSON(jsn):
+	sgn = jsn.get('m2m:sgn', jsn)
+	if isinstance(sgn, dict):
+		vrq = sgn.get('vrq', sgn.get('m2m:vrq'))
+		sur = sgn.get('sur', sgn.get('m2m:sur'))
+		nev = sgn.get('nev', sgn.get('m2m:nev'))
+		rep = nev.get('rep', nev.get('m2m:rep')) if isinstance(nev, dict) else None
+		if sur is not None and (vrq is not None or rep is not None):
+			return (vrq, sur, rep)
+	elems = INT.getFirstSubElementsJSON(jsn, [ ('vrq', 'm2m:vrq'), ('sur', 'm2m:sur'), ('rep', 'm2m:rep') ])
+	return (elems.get('vrq'), elems.get('sur'), elems.get('rep'))
+
+
+# A proxy for a resource that is received with a notification. The resource is only decoded
+# when one of its attributes is accessed for the first time. The type and the resourceID are
+# read directly from the notification, because they are needed to dispatch a notification.
+# For everything else the proxy behaves like the decoded resource, including isinstance().
+class _LazyResource:
+	__slots__ = ('_type', '_document', '_encoding', '_resource')
+
+	def __init__(self, type, document, encoding):
+		object.__setattr__(self, '_type', type)
+		object.__setattr__(self, '_document', document)
+		object.__setattr__(self, '_encoding', encoding)
+		object.__setattr__(self, '_resource', None)
+
+	@property
+	def __class__(self):
+		return INT._resourceClassFromType(self._type)
+
+	@property
+	def type(self):
+		if self._resource is not None:
+			return self._resource.type
+		return self._type
+
+	@property
+	def resourceID(self):
+		if self._resource is not None:
+			return self._resource.resourceID
+		if self._encoding == CON.Encoding_XML:
+			return INT.getResourceElement(self._xml()).findtext('ri')
+		return INT.getElementJSON(list(self._document.values())[0], 'ri')
+
+	def __getattr__(self, name):
+		return getattr(self._decode(), name)
+
+	def __setattr__(self, name, value):
+		setattr(self._decode(), name, value)
+
+	def __str__(self):
+		return str(self._decode())
+
+	# Only the document is passed to other processes. XML is passed as a string.
+	def __reduce__(self):
+		if self._encoding == CON.Encoding_XML and not isinstance(self._document, (str, bytes)):
+			return (_LazyResource, (self._type, INT.xmlToString(self._document), self._encoding))
+		return (_LazyResource, (self._type, self._document, self._encoding))
+
+	# Return the XML document. It must be parsed again if it was passed from another process.
+	def _xml(self):
+		if isinstance(self._document, (str, bytes)):
+			object.__setattr__(self, '_document', INT.stringToXML(self._document))
+		return self._document
+
+	# Decode the resource, if not done before, and return it
+	def _decode(self):
+		if self._resource is None:
+			resource = INT._newResourceFromType(self._type, None)
+			if self._encoding == CON.Encoding_XML:
+				resource._parseXML(self._xml())
+			else:
+				resource._parseJSON(self._document)
+			object.__setattr__(self, '_resource', resource)
+		return self._resource
+
+
+# Process the decoded resources of a notification for a subscription: find the subscription
+# and call its callback function(s). Return False when the subscription is not known.
+def _processNotification(sur, resources):
+	# get and call callback
+	with _subscriptionsLock:
+		managed = _subscriptions.get(_subscriptionIDToParentResourceID.get(sur))
+	if not managed:
+		return False
+	session = managed.resource.session
+	if session:											# the cached resources have changed
+		session._cache.invalidate(managed.resource.resourceID)
+		for resource in resources:
+			session._cache.invalidate(resource.resourceID)
+	if managed.batchCallback:
+		_callCallback(managed.batchCallback, resources)
+		return True
+	callback = managed.callback
+	if not callback:
+		callback = _callback
+	if callback:
+		for resource in resources:
+			_callCallback(callback, resource)
+	return True
+
+
+# Call a callback function. If it is a coroutine function then wait for the coroutine, which
+# is run in the event loop of the dispatcher.
+def _callCallback(callback, argument):
+	result = callback(argument)
+	if inspect.isawaitable(result):
+		if _dispatcher:
+			_dispatcher.runCoroutine(result)
+		else:
+			asyncio.run(result)
+
+
+# The dispatcher queues decoded notifications and calls the callbacks from a pool of
+# worker threads. With orderPerSubscription each worker has its own queue, and all
+# notifications for a subscription are put into the same queue. Otherwise all workers
+# share a single queue.
+class _NotificationDispatcher:
+
+	def __init__(self, workers, queueSize, orderPerSubscription):
+		self.orderPerSubscription = orderPerSubscription
+		if orderPerSubscription:
+			size = max(1, -(-queueSize // workers)) if queueSize else 0	# round up
+			self.queues = [ queue.Queue(size) for _ in range(workers) ]
+		else:
+			self.queues = [ queue.Queue(queueSize or 0) ]
+		self.lock = threading.Lock()
+		self.processed = 0
+		self.rejected = 0
+		self.dropped = 0
+		self.errors = 0
+		self.coalesced = 0
+		self.duplicates = 0
+		self.loop = None		# event loop for coroutine callbacks, started when needed
+		self.loopThread = None
+		self.threads = []
+		for i in range(workers):
+			thread = threading.Thread(target=self._run, args=(self.queues[i % len(self.queues)],), name='onem2mlib-notification-' + str(i), daemon=True)
+			thread.start()
+			self.threads.append(thread)
+
+
+	# Queue a notification. Return False when the queue is full. With *block* the call
+	# waits for a free slot in the queue, but at most *timeout* seconds if given, and only
+	# until the event *cancel* is set if given.
+	def put(self, sur, resources, block=False, timeout=None, cancel=None):
+		deadline = time.monotonic() + timeout if timeout is not None else None
+		while True:
+			try:
+				wait = _remainingTime(deadline)
+				if block and cancel:
+					wait = CON.Sub_def_cancelInterval if wait is None else min(wait, CON.Sub_def_cancelInterval)
+				self._queue(sur).put((sur, resources), block, wait)
+				return True
+			except queue.Full:
+				if not block or not cancel or cancel.is_set() or _remainingTime(deadline) == 0:
+					self.count('rejected')
+					return False
+
+
+	# Check whether the queue for a subscription is full
+	def isFull(self, sur):
+		return self._queue(sur).full()
+
+
+	def _queue(self, sur):
+		return self.queues[hash(sur) % len(self.queues)]
+
+
+	def count(self, counter, value=1):
+		with self.lock:
+			setattr(self, counter, getattr(self, counter) + value)
+
+
+	def statistics(self):
+		with self.lock:
+			return {	'queued' : sum([ q.qsize() for q in self.queues ]),
+						'processed' : self.processed,
+						'rejected' : self.rejected,
+						'dropped' : self.dropped,
+						'errors' : self.errors,
+						'coalesced' : self.coalesced,
+						'duplicates' : self.duplicates }
+
+
+	# Run a coroutine in the event loop of the dispatcher, and wait for its result
+	def runCoroutine(self, coroutine):
+		with self.lock:
+			if not self.loop:
+				self.loop = asyncio.new_event_loop()
+				self.loopThread = threading.Thread(target=self.loop.run_forever, name='onem2mlib-notification-loop', daemon=True)
+				self.loopThread.start()
+		return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+
+	# Stop the workers after they processed the already queued notifications. With a timeout
+	# the workers are only waited for until then. Workers that are still busy are left running
+	# as daemon threads, so that they don't block the termination of the program.
+	def stop(self, timeout=None):
+		deadline = time.monotonic() + timeout if timeout is not None else None
+		for i in range(len(self.threads)):
+			try:
+				self.queues[i % len(self.queues)].put(None, timeout=_remainingTime(deadline))
+			except queue.Full:
+				pass
+		for thread in self.threads:
+			if thread is not threading.current_thread():
+				thread.join(_remainingTime(deadline))
+		if self.loop and not any([ thread.is_alive() for thread in self.threads if thread is not threading.current_thread() ]):
+			self.loop.call_soon_threadsafe(self.loop.stop)
+			self.loopThread.join(_remainingTime(deadline))
+			if not self.loopThread.is_alive():
+				self.loop.close()
+
+
+	def _run(self, q):
+		while True:
+			item = q.get()
+			if item is None:
+				return
+			try:
+				if _processNotification(*item):
+					self.count('processed')
+				else:
+					self.count('dropped')		# stale subscription
+			except Exception as e:
+				self.count('errors')
+
+
+_dispatcher = None
+
+
+# The coalescer collects the notifications for a subscription for a time window, starting
+# with the first notification. At the end of the window only the latest notification is 
+# passed on to the dispatcher.
+class _NotificationCoalescer:
+
+	def __init__(self, window, dispatcher):
+		self.window = window
+		self.dispatcher = dispatcher
+		self.pending = {}		# subscriptionReference -> [ deadline, resources ]
+		self.condition = threading.Condition()
+		self.stopped = False
+		self.thread = threading.Thread(target=self._run, name='onem2mlib-notification-coalescer', daemon=True)
+		self.thread.start()
+
+
+	# Add a notification. A notification that is still pending for the subscription is replaced.
+	# A notification for a new window is rejected and False is returned when the dispatcher's
+	# queue is full, so that the CSE learns about the backlog and may send it again. With *block*
+	# it is accepted anyway, because passing it on to the dispatcher waits for a free slot.
+	def put(self, sur, resources, block=False):
+		with self.condition:
+			if self.stopped:
+				return self.dispatcher.put(sur, resources, block)
+			entry = self.pending.get(sur)
+			if entry:
+				self.dispatcher.count('coalesced', len(entry[1]))
+				entry[1] = resources[-1:]
+			elif self.dispatcher.isFull(sur) and not block:
+				self.dispatcher.count('rejected')
+				return False
+			else:
+				self.pending[sur] = [ time.monotonic() + self.window, resources[-1:] ]
+				self.condition.notify()
+			if len(resources) > 1:
+				self.dispatcher.count('coalesced', len(resources) - 1)
+		return True
+
+
+	# Stop the coalescer and pass on all pending notifications. They are passed on until
+	# the timeout, if given, and discarded afterwards.
+	def stop(self, timeout=None):
+		deadline = time.monotonic() + timeout if timeout is not None else None
+		with self.condition:
+			self.stopped = True
+			self.condition.notify()
+		self.thread.join(_remainingTime(deadline))
+		with self.condition:
+			notifications = list(self.pending.items())
+			self.pending.clear()
+		for (sur, entry) in notifications:
+			self.dispatcher.put(sur, entry[1], True, _remainingTime(deadline))
+
+
+	def _run(self):
+		while True:
+			with self.condition:
+				while not self.stopped and not self.pending:
+					self.condition.wait()
+				if self.stopped:
+					return
+				now = time.monotonic()
+				due = [ sur for (sur, entry) in self.pending.items() if entry[0] <= now ]
+				if not due:
+					self.condition.wait(min([ entry[0] for entry in self.pending.values() ]) - now)
+					continue
+				notifications = [ (sur, self.pending.pop(sur)[1]) for sur in due ]
+			for (sur, resources) in notifications:
+				self.dispatcher.put(sur, resources, True)	# wait for the workers instead of dropping it
+
+
+_coalescer = None
+
+
+# Pass a decoded notification on to the coalescer or the dispatcher. With *block* this
+# waits for a free slot in the dispatcher's queue instead of rejecting the notification.
+def _dispatch(sur, resources, block=False, cancel=None):
+	if _coalescer:
+		return _coalescer.put(sur, resources, block)
+	return _dispatcher.put(sur, resources, block, cancel=cancel)
+
+
+# Decode a received notification and queue it for the callbacks. This is called by 
+# the notification servers. Return False when the notification was rejected because the
+# queue is full. A duplicate of an earlier notification is only acknowledged.
+def _receiveNotification(contentType, data, requestID=None):
+	notifications = []
+	deduplicator = _deduplicator
+	key = _deduplicationKey(requestID, data) if deduplicator and _isEnabled else None
+	if key and deduplicator.check(key):
+		if _dispatcher:
+			_dispatcher.count('duplicates')
+		return True
+	if _isEnabled:
+		try:
+			notifications = _decodeNotification(contentType, data)
+		except Exception as e:
+			pass
+	accepted = _queueNotifications(notifications)
+	if key and not accepted:		# the CSE may send it again
+		deduplicator.discard(key)
+	return accepted
+
+
+# Queue decoded notifications, a list of tuples (subscriptionReference, resources), for 
+# the callbacks. Return False when a notification was rejected because the queue is full.
+# With *block* this waits until there is space in the queue, or until the event *cancel* is set.
+def _queueNotifications(notifications, block=False, cancel=None):
+	if not _isEnabled:
+		if _dispatcher:
+			_dispatcher.count('dropped')
+		return True
+	accepted = True
+	if _dispatcher:
+		for (sur, resources) in notifications:
+			if not _isKnownSubscription(sur):		# drop it before any resource is decoded
+				_dispatcher.count('dropped')
+				continue
+			accepted = _dispatch(sur, resources, block, cancel) and accepted
+	return accepted
+
+
+# Check whether a subscriptionReference belongs to a managed subscription
+def _isKnownSubscription(sur):
+	with _subscriptionsLock:
+		return sur in _subscriptionIDToParentResourceID
+
+
+_deduplicator = None
+_surPattern = re.compile(rb'"(?:m2m:)?sur"\s*:\s*"([^"]*)"|<(?:m2m:)?sur>([^<]*)</')
+
+
+# Return the key of a received notification for the de-duplication, or None if it has no
+# request identifier. The subscription references are only searched in the raw data, 
+# because duplicates should not be decoded.
+def _deduplicationKey(requestID, data):
+	if not requestID:
+		return None
+	return (requestID, tuple(_surPattern.findall(data)))
+
+
+# The deduplicator remembers the keys of recently received notifications, so that copies
+# that are sent again by the CSE are recognized. The number of keys is bounded, and the
+# oldest keys are evicted first. Keys also expire after the time window.
+class _NotificationDeduplicator:
+
+	def __init__(self, size, window):
+		self.size = size
+		self.window = window
+		self.keys = OrderedDict()	# key -> time of reception, oldest first
+		self.lock = threading.Lock()
+
+
+	# Return True when the key was received before. Otherwise remember it and return False.
+	def check(self, key):
+		now = time.monotonic()
+		with self.lock:
+			if self.window is not None:
+				while self.keys and now - next(iter(self.keys.values())) > self.window:
+					self.keys.popitem(last=False)
+			if key in self.keys:
+				return True
+			self.keys[key] = now
+			if len(self.keys) > self.size:
+				self.keys.popitem(last=False)
+			return False
+
+
+	# Forget a key, e.g. when the notification was rejected
+	def discard(self, key):
+		with self.lock:
+			self.keys.pop(key, None)
+
+
 ###############################################################################
 #
 #	Notification callback server
 #
-#	This is actually a simple HTTP server
+#	This is either a multi-threaded HTTP server, or an asyncio based HTTP server
 #
 
 _server = None
@@ -260,33 +1195,47 @@ _thread = None
 
 
 # Start the notification server in a background thread
-def _startNotificationServer():
+def _startNotificationServer(server=CON.Sub_def_server, processes=1, queueSize=CON.Sub_def_queueSize, session=None):
 	global _server, _thread
 	if _thread:
 		return
 	# Start processing requests in a separate thread.
 	# Listen on any interface/IP address.
 	# TODO: Make this configurable
-	_server = HTTPNotificationServer(('', _port), HTTPNotificationHandler)
-	_thread = threading.Thread(target=_server.run)
+	if processes > 1:
+		_server = MultiProcessNotificationServer(('', _port), processes, queueSize)
+	elif server in _transportServers:
+		_server = TransportNotificationServer(session)
+	elif server == CON.Sub_server_asyncio:
+		_server = AsyncNotificationServer(('', _port))
+	else:
+		_server = HTTPNotificationServer(('', _port), HTTPNotificationHandler)
+	_thread = threading.Thread(target=_server.run, daemon=True)	# may be left running after a shutdown timeout
 	_thread.start()
 
 
-# Stop the thread/notification server
-def _stopNotificationServer():
+# Stop the thread/notification server. With a timeout the thread is only waited for until then.
+def _stopNotificationServer(timeout=None):
 	global _server, _thread
 	if not _server or not _thread:
 		return
+	deadline = time.monotonic() + timeout if timeout is not None else None
 	# Shutdown server
-	_server.shutdown()
-	_thread.join()
+	if isinstance(_server, MultiProcessNotificationServer):
+		_server.shutdown(timeout)
+	else:
+		_server.shutdown()
+	_thread.join(_remainingTime(deadline))
 	_server = None
 	_thread = None
 
 
 
 # This class implements the notification server that runs in the background.
-class HTTPNotificationServer(HTTPServer):
+# Each connection is handled in its own thread.
+class HTTPNotificationServer(ThreadingHTTPServer):
+	daemon_threads = True
+
 	def run(self):
 		try:
 			self.serve_forever()
@@ -297,26 +1246,29 @@ class HTTPNotificationServer(HTTPServer):
 
 # This class implements the handler that reseives the requests
 class HTTPNotificationHandler(BaseHTTPRequestHandler):
+	protocol_version = 'HTTP/1.1'	# keep connections alive for multiple notifications
 
 	# Handle incoming notifications (POST requests)
 	def do_POST(self):
-			# Construct return header
-			self.send_response(200)
-			self.send_header('X-M2M-RSC', '2000')
-			self.end_headers()
-
 			# Get headers and content data
 			length = int(self.headers['Content-Length'])
 			contentType = self.headers['Content-Type']
+			requestID = self.headers['X-M2M-RI']
 			post_data = self.rfile.read(length)
 			#print(post_data)
 
-			if _isEnabled:
-				# Handle notification in the background when enabled
-				if contentType.lower().startswith('application/xml'):
-					threading.Thread(target=self._handleXML(post_data), args=(post_data)).start()
-				elif contentType.lower().startswith('application/json'):
-					threading.Thread(target=self._handleJSON(post_data), args=(post_data)).start()
+			# Decode the notification in this thread, and queue it for the callbacks
+			accepted = _receiveNotification(contentType, post_data, requestID)
+
+			# Construct return header. Reject the notification when the queue is full.
+			if accepted:
+				self.send_response(200)
+				self.send_header('X-M2M-RSC', '2000')
+			else:
+				self.send_response(503)
+				self.send_header('X-M2M-RSC', '5000')
+			self.send_header('Content-Length', '0')
+			self.end_headers()
 			
 
 	# Catch and ignore all log messages
@@ -324,77 +1276,275 @@ class HTTPNotificationHandler(BaseHTTPRequestHandler):
 		return
 
 
-	# Handle XML notifications 
-	def _handleXML(self, data):
-		tree = INT.stringToXML(data)
-		
-		# check verification request
-		vrq = INT.getElement(tree, 'vrq')
-		if vrq:
-			return 	# do nothing
-
-		# get resource
-		rep = INT.getElements(tree, 'rep')
-		if rep and len(rep) > 0:
-			tree = rep[0][0]
-			type = INT.toInt(INT.getElement(tree, 'ty'))
-			resource = INT._newResourceFromType(type, None)
-			resource._parseXML(tree)
-		
-		# get the sur first
-		sur = INT.getElement(tree, 'sur')
-		if not sur:
-			return 	# must have a subscription ID
-
-		# get and call callback
-		self._callCallback(resource, sur)
-	
+# This class implements the asyncio based notification server. All connections are handled
+# by an event loop in a single thread. Connections are kept alive, and requests are parsed
+# incrementally as the data arrives. It provides the same run() and shutdown() methods as 
+# the threaded server.
+class AsyncNotificationServer:
 
-	# Handle JSON notifications 
-	def _handleJSON(self, data):
-		jsn =  json.loads(data.decode('utf-8'))
-		#print(jsn)
-
-		# check verification request
-		vrq = INT.getALLSubElementsJSON(jsn, 'vrq')
-		if len(vrq) == 0:										# TODO remove later when om2m corrects this
-			vrq = INT.getALLSubElementsJSON(jsn, 'm2m:vrq')
-		if len(vrq) > 0 and vrq[0] == True:
-			return 	# do nothing
-
-		# get the sur first
-		sur = INT.getALLSubElementsJSON(jsn, 'sur')
-		if len(sur) == 0:										# TODO remove later when om2m corrects this
-			sur = INT.getALLSubElementsJSON(jsn, 'm2m:sur')
-		if len(sur) > 0:
-			sur = sur[0]
-		else:
-			return 	# must have a subscription ID
-
-		# get resource
-		rep = INT.getALLSubElementsJSON(jsn, 'rep')
-		if len(rep) == 0:										# TODO remove later when om2m corrects this
-			rep = INT.getALLSubElementsJSON(jsn, 'm2m:rep')
-		if len(rep) > 0:
-			jsn = rep[0]
-			type = INT.getALLSubElementsJSON(jsn, 'ty')
-			if type and len(type) > 0:
-				resource = INT._newResourceFromType(type[0], None)
-				resource._parseJSON(jsn)
-				self._callCallback(resource, sur)
-
-
-	def _callCallback(self, resource, sur):
-		# get and call callback
-		if sur not in _subscriptionIDToParentResourceID:
-			return
-		parentResourceID = _subscriptionIDToParentResourceID[sur]
-		if not parentResourceID:
-			return
-		(_, _, callback) = _subscriptions[parentResourceID]
-		if not callback:
-			callback = _callback
-		callback(resource)
+	def __init__(self, address, reusePort=False, receive=None):
+		# Bind the socket already here, so that errors are raised in the calling thread
+		self.socket = socket.create_server(address, backlog=1024, reuse_port=reusePort)
+		self.receive = receive if receive else _receiveNotification
+		self.loop = asyncio.new_event_loop()
+		self.stopped = self.loop.create_future()
+		self.connections = set()
+
+
+	def run(self):
+		try:
+			self.loop.run_until_complete(self._serve())
+		finally:
+			self.loop.close()
+
+
+	# Stop the server. The run() method returns afterwards.
+	def shutdown(self):
+		self.loop.call_soon_threadsafe(lambda: self.stopped.done() or self.stopped.set_result(True))
+
+
+	async def _serve(self):
+		server = await self.loop.create_server(lambda: AsyncNotificationProtocol(self), sock=self.socket)
+		try:
+			await self.stopped
+		finally:
+			server.close()
+			for connection in list(self.connections):
+				connection.transport.close()
+			await server.wait_closed()
+
+
+# This class implements the handling of a single connection of the asyncio based server. 
+# All complete requests in the received data are processed at once, and their responses are
+# sent together.
+class AsyncNotificationProtocol(asyncio.Protocol):
+	maxHeaderSize = 65536
+
+	def __init__(self, server):
+		self.server = server
+		self.transport = None
+		self.buffer = bytearray()
+
+
+	def connection_made(self, transport):
+		self.transport = transport
+		self.server.connections.add(self)
+
+
+	def connection_lost(self, exc):
+		self.server.connections.discard(self)
+
+
+	def data_received(self, data):
+		self.buffer += data
+		responses = []
+		close = False
+		while not close:
+			end = self.buffer.find(b'\r\n\r\n')
+			if end < 0:
+				if len(self.buffer) > self.maxHeaderSize:
+					responses.append(b'HTTP/1.1 431 Request Header Fields Too Large\r\nContent-Length: 0\r\nConnection: close\r\n\r\n')
+					close = True
+				break
+			try:
+				(method, version, headers) = _parseHTTPHeader(bytes(self.buffer[:end]))
+				body = _parseHTTPBody(self.buffer, end + 4, headers)
+			except ValueError:
+				responses.append(b'HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n')
+				close = True
+				break
+			if body is None:			# wait for more data
+				break
+			(data, length) = body
+			del self.buffer[:length]
+			close = not _isHTTPKeepAlive(version, headers)
+			if method != 'POST':
+				response = b'HTTP/1.1 501 Not Implemented\r\n'
+			elif self.server.receive(headers.get('content-type'), data, headers.get('x-m2m-ri')):
+				response = b'HTTP/1.1 200 OK\r\nX-M2M-RSC: 2000\r\n'
+			else:						# Reject the notification when the queue is full.
+				response = b'HTTP/1.1 503 Service Unavailable\r\nX-M2M-RSC: 5000\r\n'
+			if close:
+				response += b'Connection: close\r\n'
+			responses.append(response + b'Content-Length: 0\r\n\r\n')
+		if responses:
+			self.transport.write(b''.join(responses))
+		if close:
+			self.transport.close()
+
+
+# This class implements a notification server that consists of several receiver processes.
+# The processes share the notification port (SO_REUSEPORT), so that the operating system 
+# distributes the connections among them. Each process runs an asyncio based server, decodes
+# the notifications, and puts them into a queue. The run() method of this class takes the
+# notifications from the queue and queues them for the callbacks in this process. It waits
+# while the dispatcher's queue is full, so that the queue between the processes fills up and
+# the receiver processes reject further notifications. Once the shutdown started it doesn't wait
+# anymore, and the notifications that don't fit into the dispatcher's queue are rejected.
+# Duplicates are detected by each receiver process, and again in this process for duplicates
+# that were received by different processes.
+class MultiProcessNotificationServer:
+
+	def __init__(self, address, processes, queueSize):
+		context = multiprocessing.get_context('fork')
+		self.queue = context.Queue(queueSize or 0)
+		self.rejected = context.Value('L', 0)
+		self.duplicates = context.Value('L', 0)
+		self.stopping = threading.Event()
+		status = context.Queue()
+		self.processes = [ context.Process(target=_runNotificationReceiver, args=(address, self.queue, self.rejected, self.duplicates, status), name='onem2mlib-notification-receiver-' + str(i), daemon=True) for i in range(processes) ]
+		for process in self.processes:
+			process.start()
+		# Wait until all processes are listening, or raise the error of a process
+		errors = [ error for error in [ status.get() for process in self.processes ] if error ]
+		if errors:
+			self.shutdown()
+			raise OSError(errors[0])
+
+
+	def run(self):
+		while True:
+			try:
+				item = self.queue.get(not self.stopping.is_set())	# drain the queue after the shutdown
+			except queue.Empty:
+				return
+			if item is None:
+				return
+			(key, notifications) = item
+			deduplicator = _deduplicator
+			if key and deduplicator and deduplicator.check(key):
+				with self.duplicates.get_lock():
+					self.duplicates.value += 1
+				continue
+			_queueNotifications(notifications, block=True, cancel=self.stopping)
+
+
+	# Stop the receiver processes. The run() method returns after the already received
+	# notifications are queued for the callbacks, or rejected when the dispatcher's queue is full.
+	# With a timeout the processes are only waited for until then.
+	def shutdown(self, timeout=None):
+		deadline = time.monotonic() + timeout if timeout is not None else None
+		self.stopping.set()
+		for process in self.processes:
+			if process.is_alive():
+				process.terminate()		# the receivers stop gracefully
+		for process in self.processes:
+			process.join(_remainingTime(deadline))
+		try:
+			self.queue.put(None, timeout=_remainingTime(deadline))
+		except queue.Full:
+			pass						# run() returns when the queue is drained
+
+
+# This class implements the receiving of notifications through the connection of a session's
+# transport, e.g. via MQTT or WebSocket. The notifications are received as requests to the session's
+# originator. The run() method only waits until the server is shut down.
+class TransportNotificationServer:
+
+	def __init__(self, session):
+		self.session = session
+		self.stopped = threading.Event()
+		session.transport._addRequestHandler(session, self.receive)	# connects, errors are raised here
+
+
+	def run(self):
+		self.stopped.wait()
+		self.session.transport._removeRequestHandler(self.session)
+
+
+	def shutdown(self):
+		self.stopped.set()
+
+
+	# Return the oneM2M response status code for a received notification
+	def receive(self, contentType, data, requestID):
+		if _receiveNotification(contentType, data, requestID):
+			return 2000		# OK
+		return 5000			# internal server error, the queue is full
+
+
+# The main function of a receiver process. All notifications of a request are passed on
+# together with their de-duplication key.
+def _runNotificationReceiver(address, notificationQueue, rejected, duplicates, status):
+	signal.signal(signal.SIGINT, signal.SIG_IGN)	# the parent process handles interrupts
+
+	def receive(contentType, data, requestID=None):
+		key = _deduplicationKey(requestID, data) if _deduplicator else None	# a copy of the parent's deduplicator
+		if key and _deduplicator.check(key):
+			with duplicates.get_lock():
+				duplicates.value += 1
+			return True
+		try:
+			notifications = _decodeNotification(contentType, data)
+		except Exception as e:
+			notifications = []
+		if not notifications:
+			return True
+		try:
+			notificationQueue.put_nowait((key, notifications))
+		except queue.Full:
+			with rejected.get_lock():
+				rejected.value += len(notifications)
+			if key:					# the CSE may send it again
+				_deduplicator.discard(key)
+			return False
+		return True
+
+	try:
+		server = AsyncNotificationServer(address, reusePort=True, receive=receive)
+	except OSError as e:
+		status.put(str(e))
+		return
+	signal.signal(signal.SIGTERM, lambda signum, frame: server.shutdown())
+	status.put(None)
+	server.run()
+
+
+# Parse the request line and the headers of an HTTP request. Header names are returned in 
+# lower case. A ValueError is raised for a malformed request.
+def _parseHTTPHeader(header):
+	lines = header.decode('iso-8859-1').split('\r\n')
+	request = lines[0].split()
+	if len(request) != 3:
+		raise ValueError('Malformed request line')
+	headers = {}
+	for line in lines[1:]:
+		(name, _, value) = line.partition(':')
+		headers[name.strip().lower()] = value.strip()
+	return (request[0], request[2], headers)
+
+
+# Return a tuple (body, length of the request) when the buffer contains the complete body of 
+# a request that starts at *start*, or None when more data is needed. The body is either sent 
+# with a Content-Length or in chunks.
+def _parseHTTPBody(buffer, start, headers):
+	if 'chunked' in headers.get('transfer-encoding', '').lower():
+		chunks = []
+		position = start
+		while True:
+			end = buffer.find(b'\r\n', position)
+			if end < 0:
+				return None
+			size = int(bytes(buffer[position:end]).split(b';')[0], 16)
+			if size == 0:
+				if len(buffer) < end + 4:		# no trailers are expected
+					return None
+				return (b''.join(chunks), end + 4)
+			if len(buffer) < end + 2 + size + 2:
+				return None
+			chunks.append(bytes(buffer[end + 2:end + 2 + size]))
+			position = end + 2 + size + 2
+	length = int(headers.get('content-length', 0))
+	if len(buffer) < start + length:
+		return None
+	return (bytes(buffer[start:start + length]), start + length)
+
+
+def _isHTTPKeepAlive(version, headers):
+	connection = headers.get('connection', '').lower()
+	if version == 'HTTP/1.0':
+		return connection == 'keep-alive'
+	return connection != 'close'
 
 
 ###############################################################################
@@ -403,5 +1553,9 @@ class HTTPNotificationHandler(BaseHTTPRequestHandler):
 __pdoc__                                     = {}
 __pdoc__['HTTPNotificationServer']			 = None
 __pdoc__['HTTPNotificationHandler']			 = None
+__pdoc__['AsyncNotificationServer']			 = None
+__pdoc__['AsyncNotificationProtocol']		 = None
+__pdoc__['MultiProcessNotificationServer']	 = None
+__pdoc__['TransportNotificationServer']		 = None
 __pdoc__['startNotificationServer']			 = None
 __pdoc__['stopNotificationServer']			 = None
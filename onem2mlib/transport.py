@@ -0,0 +1,1273 @@
+#
+#	transport.py
+#
+#	(c) 2018 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	This sub-module implements the protocol bindings that are used to send requests
+#	to a CSE over the Mca interface.
+#
+
+"""
+This sub-module implements the protocol bindings (transports) that are used to send
+requests to a CSE.
+
+Each `onem2mlib.Session` has a transport. By default the transport is chosen by the protocol
+of the session's address:
+
+- *http://* and *https://*: `onem2mlib.transport.HTTPTransport`, which keeps a pool of
+keep-alive connections.
+- *http+unix://*: `onem2mlib.transport.UnixSocketTransport`, which sends the http requests over
+a Unix domain socket to a CSE on the same host. The address has the form *http+unix://socketPath*,
+with the percent-encoded path of the socket, e.g. *http+unix://%2Fvar%2Frun%2Fcse.sock*.
+- *coap://*: `onem2mlib.transport.CoAPTransport`, which sends the requests as CoAP messages
+over UDP. This is useful for constrained devices and networks.
+- *mqtt://*: `onem2mlib.transport.MQTTTransport`, which sends the requests via an MQTT broker. 
+The address has the form *mqtt://host:port/cseID*. All sessions for the same broker share a 
+single broker connection. Notifications can also be received via MQTT, see the *server* argument
+of `onem2mlib.notifications.setupNotifications`(). This requires the 
+[paho-mqtt](https://www.eclipse.org/paho/) module.
+- *ws://* and *wss://*: `onem2mlib.transport.WebSocketTransport`, which multiplexes all requests
+over a single long-lived WebSocket connection to the CSE. Notifications are received over the same
+connection, so that no listening port is necessary.
+
+A transport can also be given explicitly when creating a session, e.g. to send non-confirmable
+CoAP requests:
+
+```python
+session = Session('coap://localhost:5683', 'admin:admin', transport=CoAPTransport(confirmable=False))
+```
+
+An embedded or a mock CSE can be called directly, i.e. without any network communication, with
+a `onem2mlib.transport.LocalTransport`:
+
+```python
+session = Session('http://localhost', 'admin:admin', transport=LocalTransport(myCSE.handleRequest))
+```
+
+Other protocol bindings can be added by implementing the `onem2mlib.transport.Transport` class.
+"""
+
+import base64, hashlib, http.client, json, os, random, socket, ssl, threading, time, urllib.parse
+import requests, requests.adapters
+from lxml import etree as ET
+
+try:
+	import paho.mqtt.client as mqtt
+except ImportError:
+	mqtt = None
+
+import onem2mlib.constants as CON
+import onem2mlib.exceptions as EXC
+import onem2mlib.internal as INT
+
+
+class Transport:
+	"""
+	The base class for all transports. A transport object may be shared by several sessions.
+	"""
+
+	def request(self, session, method, path, type=None, body=None):
+		"""
+		Send a request to the CSE of a *session* and return the response.
+
+		Args:
+
+		- *session*: The `onem2mlib.Session` for which the request is sent.
+		- *method*: String. The operation as an http method, ie. 'GET', 'POST', 'PUT', or 'DELETE'.
+		- *path*: String. The resource ID of the target resource, optionally with query arguments.
+		- *type*: Integer. The resource type for create and update requests. Optional.
+		- *body*: The already encoded content of the request. Optional.
+
+		The method returns a response object with the *status_code* (as http status code), *content*
+		and *text* attributes and a *json*() method. It raises an exception in case of a network error.
+		"""
+		raise EXC.NotSupportedError('Transport not implemented: ' + self.__class__.__name__)
+
+
+	def close(self, session):
+		"""
+		Close all connections of the transport for a *session*. The transport can still be used
+		afterwards.
+		"""
+		pass
+
+
+# Return a new transport for the protocol of an address
+def _transportForAddress(address):
+	scheme = urllib.parse.urlsplit(address).scheme.lower() if address else 'http'
+	if scheme in [ 'http', 'https' ]:
+		return HTTPTransport()
+	if scheme == 'http+unix':
+		return UnixSocketTransport()
+	if scheme == 'coap':
+		return CoAPTransport()
+	if scheme == 'mqtt':
+		return _sharedMQTTTransport(address)
+	if scheme in [ 'ws', 'wss' ]:
+		return _sharedWebSocketTransport()
+	raise EXC.NotSupportedError('Unsupported protocol: ' + scheme)
+
+
+# A minimal response object for responses that are not received through the requests
+# module. It provides the same attributes and methods that are used by the library.
+class _Response:
+	def __init__(self, status_code, content):
+		self.status_code = status_code
+		self.content = content if content is not None else b''
+
+	def __bool__(self):
+		return self.status_code < 400
+
+	@property
+	def text(self):
+		return self.content.decode('utf-8', errors='replace')
+
+	def json(self):
+		return json.loads(self.content.decode('utf-8'))
+
+
+# Return the URL of a resource on the CSE of a session
+def _getPath(session, path):
+	if path and path[0] == '/':
+		return session.address+'/~' + path
+	else:
+		return session.address+'/~/' + path
+
+
+# Return the path and query of a URL, as it is sent in the request line of an http request
+def _getRequestTarget(url):
+	return url.path + ('?' + url.query if url.query else '')
+
+
+###############################################################################
+#
+#	HTTP
+#
+
+class HTTPTransport(Transport):
+	"""
+	The http binding. Each session keeps its own pool of keep-alive connections, which is
+	configured by the session's *poolSize*, *maxConnectionsPerHost* and *idleTimeout* attributes.
+	"""
+
+	def request(self, session, method, path, type=None, body=None):
+		return _getConnection(session).request(method, _getPath(session, path), headers=_getHeaders(session, type), data=body, timeout=CON.NETWORK_REQUEST_TIMEOUT)
+
+
+	def close(self, session):
+		with session._connectionLock:
+			if session._connection:
+				session._connection.close()
+				session._connection = None
+
+
+# Return the pooled keep-alive connection of a session. It is created with the first
+# request, and it is re-created when it was idle for longer than the session's idleTimeout.
+def _getConnection(session):
+	with session._connectionLock:
+		now = time.monotonic()
+		if session._connection and session.idleTimeout and now - session._lastRequestTime > session.idleTimeout:
+			session._connection.close()
+			session._connection = None
+		if not session._connection:
+			adapter = requests.adapters.HTTPAdapter(pool_connections=session.poolSize, pool_maxsize=session.maxConnectionsPerHost)
+			session._connection = requests.Session()
+			session._connection.mount('http://', adapter)
+			session._connection.mount('https://', adapter)
+		session._lastRequestTime = now
+		return session._connection
+
+
+def _getHeaders(session, type=None):
+	headers = dict()
+	headers['X-M2M-Origin'] = session.originator
+	encoding = INT.contentType(session.encoding)
+
+	if type:
+		headers['Content-Type'] = encoding + ';ty=' + str(type)
+	else:
+		headers['Content-Type'] = encoding
+	headers['Accept'] = encoding
+	return headers
+
+
+###############################################################################
+#
+#	http over Unix domain sockets
+#
+
+# The http methods that can be sent again when the connection was lost before the response was received
+_IDEMPOTENT_METHODS = [ 'GET', 'PUT', 'DELETE' ]
+
+
+class UnixSocketTransport(Transport):
+	"""
+	The http binding over a Unix domain socket, for a CSE that runs on the same host. This avoids
+	the overhead of the TCP loopback interface. The requests are the same as for the 
+	`onem2mlib.transport.HTTPTransport`.
+
+	Keep-alive connections are re-used. At most the session's *poolSize* idle connections are kept,
+	and they are closed when they were idle for longer than the session's *idleTimeout*. When the CSE
+	closed a re-used connection then the request is sent again over a new connection, but a POST
+	request only when it wasn't sent yet.
+	"""
+
+	def __init__(self):
+		self._lock = threading.Lock()
+		self._connections = []		# idle connections as tuples (socketPath, connection, lastRequestTime)
+
+
+	def request(self, session, method, path, type=None, body=None):
+		url = urllib.parse.urlsplit(_getPath(session, path))
+		socketPath = urllib.parse.unquote(url.netloc)
+		if isinstance(body, str):
+			body = body.encode('utf-8')
+		(connection, reused) = self._getConnection(session, socketPath)
+		sent = False
+		try:
+			connection.request(method, _getRequestTarget(url), body=body, headers=_getHeaders(session, type))
+			sent = True
+			response = connection.getresponse()
+			content = response.read()
+		except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+			connection.close()
+			# A request that was sent may have been processed by the CSE, so only an idempotent
+			# request is sent again. Otherwise e.g. a resource could be created twice.
+			if not reused or (sent and method not in _IDEMPOTENT_METHODS):
+				raise
+			self.close(session)		# the CSE closed the idle connections, try again with a new one
+			return self.request(session, method, path, type, body)
+		except Exception:
+			connection.close()
+			raise
+		if response.will_close:
+			connection.close()
+		else:
+			self._releaseConnection(session, socketPath, connection)
+		return _Response(response.status, content)
+
+
+	def close(self, session):
+		with self._lock:
+			connections = self._connections
+			self._connections = []
+		for (_, connection, _) in connections:
+			connection.close()
+
+
+	# Return a tuple (connection, reused) with an idle connection to the socket, or a new one
+	def _getConnection(self, session, socketPath):
+		now = time.monotonic()
+		expired = []
+		result = None
+		with self._lock:
+			while self._connections:
+				(path, connection, lastRequestTime) = self._connections.pop()
+				if path != socketPath or (session.idleTimeout and now - lastRequestTime > session.idleTimeout):
+					expired.append(connection)
+				else:
+					result = (connection, True)
+					break
+		for connection in expired:
+			connection.close()
+		return result if result else (_UnixHTTPConnection(socketPath, CON.NETWORK_REQUEST_TIMEOUT), False)
+
+
+	def _releaseConnection(self, session, socketPath, connection):
+		with self._lock:
+			if len(self._connections) < max(session.poolSize, 1):
+				self._connections.append((socketPath, connection, time.monotonic()))
+				return
+		connection.close()
+
+
+# An http connection over a Unix domain socket
+class _UnixHTTPConnection(http.client.HTTPConnection):
+
+	def __init__(self, socketPath, timeout):
+		super().__init__('localhost', timeout=timeout)
+		self.socketPath = socketPath
+
+
+	def connect(self):
+		self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+		try:
+			self.sock.settimeout(self.timeout)
+			self.sock.connect(self.socketPath)
+		except OSError:
+			self.sock.close()
+			self.sock = None
+			raise
+
+
+###############################################################################
+#
+#	In-process
+#
+
+class LocalTransport(Transport):
+	"""
+	An in-process binding. The requests are not sent over a network, but they are passed
+	directly to a handler function, e.g. of an embedded or a mock CSE, in the calling thread.
+	This avoids all network latencies, and it makes tests and benchmarks deterministic.
+	"""
+
+	def __init__(self, handler):
+		"""
+		Initialize a LocalTransport object.
+
+		Args:
+
+		- *handler*: Function. It is called as *handler(method, path, headers, body)* for each request,
+			with the http method, the path and query of the request as for an http request (e.g. 
+			'/~/mn-cse/myAE?fu=1'), a dictionary with the http headers (e.g. *X-M2M-Origin* and
+			*Content-Type*), and the encoded content of the request or None. It must return a tuple 
+			(statusCode, content) with the http status code and the encoded content of the response.
+		"""
+		self.handler = handler
+		""" Function. The handler that is called for each request. """
+
+
+	def request(self, session, method, path, type=None, body=None):
+		url = urllib.parse.urlsplit(_getPath(session, path))
+		(statusCode, content) = self.handler(method, _getRequestTarget(url), _getHeaders(session, type), body)
+		return _Response(statusCode, content.encode('utf-8') if isinstance(content, str) else content)
+
+
+###############################################################################
+#
+#	CoAP
+#
+#	The messages are encoded according to RFC 7252 and RFC 7959 (block-wise transfers).
+#	The oneM2M request parameters are mapped to CoAP options as in oneM2M TS-0008.
+#
+
+_COAP_VERSION = 1
+_COAP_CON = 0
+_COAP_NON = 1
+_COAP_ACK = 2
+_COAP_RST = 3
+
+_COAP_METHODS = { 'GET' : 1, 'POST' : 2, 'PUT' : 3, 'DELETE' : 4 }
+_COAP_CONTINUE = (2 << 5) | 31								# 2.31 Continue
+
+_COAP_OPTION_URI_PATH = 11
+_COAP_OPTION_CONTENT_FORMAT = 12
+_COAP_OPTION_URI_QUERY = 15
+_COAP_OPTION_ACCEPT = 17
+_COAP_OPTION_BLOCK2 = 23
+_COAP_OPTION_BLOCK1 = 27
+_COAP_OPTION_ONEM2M_FR = 256								# originator
+_COAP_OPTION_ONEM2M_RQI = 257								# request identifier
+_COAP_OPTION_ONEM2M_TY = 267								# resource type
+
+_COAP_FORMAT_XML = 41										# application/xml
+_COAP_FORMAT_JSON = 50										# application/json
+_COAP_FORMAT_CBOR = 60										# application/cbor
+_COAP_FORMATS = { CON.Encoding_XML : _COAP_FORMAT_XML, CON.Encoding_JSON : _COAP_FORMAT_JSON, CON.Encoding_CBOR : _COAP_FORMAT_CBOR }
+
+_COAP_ACK_RANDOM_FACTOR = 1.5
+_COAP_MAX_MESSAGE_SIZE = 65536
+
+
+class CoAPTransport(Transport):
+	"""
+	The CoAP binding. Requests are sent over UDP, either as confirmable messages, which are
+	re-transmitted until they are acknowledged by the CSE, or as non-confirmable messages.
+	Large requests and responses are transferred in blocks.
+	"""
+
+	def __init__(self, confirmable=True, ackTimeout=CON.NETWORK_COAP_ACK_TIMEOUT, maxRetransmit=CON.NETWORK_COAP_MAX_RETRANSMIT, blockSize=CON.NETWORK_COAP_BLOCK_SIZE):
+		"""
+		Initialize a CoAPTransport object.
+
+		Args:
+
+		- *confirmable*: Boolean. If True then requests are sent as confirmable messages, otherwise
+			as non-confirmable messages. Optional, the default is True.
+		- *ackTimeout*: Number. The initial time in seconds to wait for the acknowledgement of a
+			confirmable message. The time is doubled for each re-transmission. Optional, the default is
+			`onem2mlib.constants.NETWORK_COAP_ACK_TIMEOUT`.
+		- *maxRetransmit*: Integer. The maximum number of re-transmissions of a confirmable message.
+			Optional, the default is `onem2mlib.constants.NETWORK_COAP_MAX_RETRANSMIT`.
+		- *blockSize*: Integer. The size of the blocks in which large requests are sent. This must be a 
+			power of 2 between 16 and 1024. The block size of large responses is chosen by the CSE.
+			Optional, the default is `onem2mlib.constants.NETWORK_COAP_BLOCK_SIZE`.
+		"""
+		if blockSize not in [ 16, 32, 64, 128, 256, 512, 1024 ]:
+			raise EXC.ConfigurationError('Wrong CoAP block size: ' + str(blockSize))
+
+		self.confirmable = confirmable
+		""" Boolean. Send confirmable (True) or non-confirmable (False) requests. """
+
+		self.ackTimeout = ackTimeout
+		""" Number. The initial time in seconds to wait for an acknowledgement. """
+
+		self.maxRetransmit = maxRetransmit
+		""" Integer. The maximum number of re-transmissions of a confirmable message. """
+
+		self.blockSize = blockSize
+		""" Integer. The size of the blocks for block-wise transfers. """
+
+		self._messageID = random.randrange(0x10000)
+		self._lock = threading.Lock()
+
+
+	def request(self, session, method, path, type=None, body=None):
+		url = urllib.parse.urlsplit(_getPath(session, path))
+		options = [ (_COAP_OPTION_URI_PATH, urllib.parse.unquote(segment).encode()) for segment in url.path.split('/')[1:] ]
+		if url.query:
+			options += [ (_COAP_OPTION_URI_QUERY, urllib.parse.unquote(argument).encode()) for argument in url.query.split('&') ]
+		contentFormat = _COAP_FORMATS.get(session.encoding, _COAP_FORMAT_JSON)
+		options.append((_COAP_OPTION_ACCEPT, _coapUInt(contentFormat)))
+		options.append((_COAP_OPTION_ONEM2M_FR, session.originator.encode()))
+		options.append((_COAP_OPTION_ONEM2M_RQI, os.urandom(8).hex().encode()))
+		if type and method == 'POST':
+			options.append((_COAP_OPTION_ONEM2M_TY, _coapUInt(type)))
+		if body:
+			options.append((_COAP_OPTION_CONTENT_FORMAT, _coapUInt(contentFormat)))
+			if isinstance(body, str):
+				body = body.encode('utf-8')
+
+		address = socket.getaddrinfo(url.hostname, url.port or 5683, type=socket.SOCK_DGRAM)[0]
+		with socket.socket(address[0], socket.SOCK_DGRAM) as sock:
+			sock.connect(address[4])
+			return self._exchange(sock, _COAP_METHODS[method], options, body)
+
+
+	# Send a request, in blocks if the body is too large, and receive the response, which
+	# may also be transferred in blocks.
+	def _exchange(self, sock, code, options, body):
+		deadline = time.monotonic() + CON.NETWORK_REQUEST_TIMEOUT
+		if body and len(body) > self.blockSize:
+			szx = self.blockSize.bit_length() - 5
+			number = 0
+			while True:
+				more = (number + 1) * self.blockSize < len(body)
+				block1 = (_COAP_OPTION_BLOCK1, _coapUInt(number << 4 | more << 3 | szx))
+				(responseCode, responseOptions, content) = self._send(sock, code, options + [ block1 ], body[number * self.blockSize:(number + 1) * self.blockSize], deadline)
+				if not more or responseCode != _COAP_CONTINUE:
+					break
+				number += 1
+		else:
+			(responseCode, responseOptions, content) = self._send(sock, code, options, body, deadline)
+		block2 = _coapBlock(responseOptions, _COAP_OPTION_BLOCK2)
+		while block2 and block2[1]:							# retrieve the remaining blocks of the response
+			options = [ option for option in options if option[0] != _COAP_OPTION_BLOCK2 ]
+			options.append((_COAP_OPTION_BLOCK2, _coapUInt((block2[0] + 1) << 4 | block2[2])))
+			(responseCode, responseOptions, payload) = self._send(sock, code, options, None, deadline)
+			block2 = _coapBlock(responseOptions, _COAP_OPTION_BLOCK2)
+			content += payload
+		return _Response(_coapStatus(responseCode), content)
+
+
+	# Send a single message and wait for the response. Confirmable messages are re-transmitted
+	# until they are acknowledged. A response that is sent separately from the acknowledgement
+	# is acknowledged if necessary. Raise a TimeoutError when no response is received in time.
+	def _send(self, sock, code, options, payload, deadline):
+		with self._lock:
+			self._messageID = (self._messageID + 1) & 0xffff
+			messageID = self._messageID
+		token = os.urandom(4)
+		message = _coapEncode(_COAP_CON if self.confirmable else _COAP_NON, code, messageID, token, options, payload)
+		timeout = self.ackTimeout * random.uniform(1, _COAP_ACK_RANDOM_FACTOR)
+		retransmissions = self.maxRetransmit if self.confirmable else 0
+		acknowledged = not self.confirmable
+		sock.send(message)
+		retransmit = time.monotonic() + timeout
+		while True:
+			now = time.monotonic()
+			if now >= deadline:
+				raise TimeoutError('CoAP request timed out')
+			if not acknowledged and now >= retransmit:
+				if retransmissions == 0:
+					raise TimeoutError('CoAP request was not acknowledged')
+				retransmissions -= 1
+				timeout *= 2
+				retransmit = now + timeout
+				sock.send(message)
+			sock.settimeout(max(0.001, min(deadline, retransmit if not acknowledged else deadline) - now))
+			try:
+				data = sock.recv(_COAP_MAX_MESSAGE_SIZE)
+				(responseType, responseCode, responseID, responseToken, responseOptions, responsePayload) = _coapDecode(data)
+			except (socket.timeout, ValueError, IndexError):	# ignore malformed messages
+				continue
+			if responseType == _COAP_RST and responseID == messageID:
+				raise ConnectionResetError('CoAP request was rejected')
+			if responseType == _COAP_ACK and responseID == messageID:
+				acknowledged = True
+				if responseCode == 0:						# empty ACK, the response follows separately
+					continue
+			elif responseType in [ _COAP_CON, _COAP_NON ]:
+				if responseType == _COAP_CON:				# acknowledge a separate response
+					sock.send(_coapEncode(_COAP_ACK, 0, responseID, b'', [], None))
+			else:
+				continue
+			if responseToken == token:
+				return (responseCode, responseOptions, responsePayload)
+
+
+# Encode a CoAP message. The options are a list of tuples (number, value).
+def _coapEncode(type, code, messageID, token, options, payload):
+	message = bytearray([ _COAP_VERSION << 6 | type << 4 | len(token), code, messageID >> 8, messageID & 0xff ])
+	message += token
+	last = 0
+	for (number, value) in sorted(options, key=lambda option: option[0]):
+		(delta, deltaExtension) = _coapOptionNibble(number - last)
+		(length, lengthExtension) = _coapOptionNibble(len(value))
+		message.append(delta << 4 | length)
+		message += deltaExtension + lengthExtension + value
+		last = number
+	if payload:
+		message.append(0xff)
+		message += payload
+	return bytes(message)
+
+
+# Return the 4 bit value and the extended bytes for an option delta or length
+def _coapOptionNibble(value):
+	if value < 13:
+		return (value, b'')
+	if value < 269:
+		return (13, bytes([ value - 13 ]))
+	return (14, (value - 269).to_bytes(2, 'big'))
+
+
+# Decode a CoAP message. Return a tuple (type, code, messageID, token, options, payload). The
+# options are returned as a dictionary of lists of values. A ValueError is raised for a malformed message.
+def _coapDecode(data):
+	if len(data) < 4 or data[0] >> 6 != _COAP_VERSION:
+		raise ValueError('Malformed CoAP message')
+	position = 4 + (data[0] & 0x0f)
+	token = bytes(data[4:position])
+	options = {}
+	number = 0
+	while position < len(data) and data[position] != 0xff:
+		nibbles = data[position]
+		(delta, position) = _coapOptionExtension(data, position + 1, nibbles >> 4)
+		(length, position) = _coapOptionExtension(data, position, nibbles & 0x0f)
+		number += delta
+		options.setdefault(number, []).append(bytes(data[position:position + length]))
+		position += length
+	payload = bytes(data[position + 1:]) if position < len(data) else b''
+	return ((data[0] >> 4) & 0x03, data[1], data[2] << 8 | data[3], token, options, payload)
+
+
+# Return an option delta or length from its 4 bit value and the extended bytes at the
+# position, and the position after the extended bytes.
+def _coapOptionExtension(data, position, nibble):
+	if nibble == 13:
+		return (data[position] + 13, position + 1)
+	if nibble == 14:
+		return (int.from_bytes(data[position:position + 2], 'big') + 269, position + 2)
+	if nibble == 15:
+		raise ValueError('Malformed CoAP option')
+	return (nibble, position)
+
+
+# Encode an unsigned integer option value with the minimal number of bytes
+def _coapUInt(value):
+	return value.to_bytes((value.bit_length() + 7) // 8, 'big')
+
+
+# Return a block option as a tuple (number, more, szx), or None if the option is not present
+def _coapBlock(options, number):
+	values = options.get(number)
+	if not values:
+		return None
+	value = int.from_bytes(values[0], 'big')
+	return (value >> 4, bool(value & 0x08), value & 0x07)
+
+
+# Return the http status code for a CoAP response code, e.g. 404 for 4.04. All 2.xx
+# success codes except 2.01 (Created) are mapped to 200.
+def _coapStatus(code):
+	(codeClass, detail) = (code >> 5, code & 0x1f)
+	if codeClass == 2:
+		return 201 if detail == 1 else 200
+	return codeClass * 100 + detail
+
+
+###############################################################################
+#
+#	Request and response primitives
+#
+#	The MQTT and the WebSocket bindings exchange oneM2M request and response primitives
+#	as defined in oneM2M TS-0004, which are correlated by their request identifier.
+#
+
+_PRIMITIVE_OPERATIONS = { 'POST' : 1, 'GET' : 2, 'PUT' : 3, 'DELETE' : 4 }
+_PRIMITIVE_STATUS = { 1000 : 202, 2001 : 201, 4004 : 404, 4005 : 405, 4008 : 408, 4015 : 415, 4101 : 403, 4103 : 403, 4105 : 409, 5001 : 501 }
+_PRIMITIVE_PARAMETERS = [ 'drt', 'rcn', 'rt', 'rp', 'rqet', 'rset', 'oet' ]	# all other query arguments are filter criteria
+
+
+# Return the request primitive for a request of a session, with a new request identifier
+def _requestPrimitive(session, method, path, type=None):
+	(target, _, query) = path.partition('?')
+	if not target.startswith('/'):
+		target = '/' + target
+	primitive = { 'op' : _PRIMITIVE_OPERATIONS[method], 'to' : target, 'fr' : session.originator, 'rqi' : os.urandom(8).hex() }
+	if type and method == 'POST':
+		primitive['ty'] = type
+	_primitiveQueryParameters(primitive, query)
+	return primitive
+
+
+# Return the response primitive for a received request primitive
+def _responsePrimitive(request, status):
+	return { 'rsc' : status, 'rqi' : request.get('rqi'), 'to' : request.get('fr'), 'fr' : request.get('to') }
+
+
+# Return the http status code for a oneM2M response status code
+def _primitiveStatus(rsc):
+	if rsc in _PRIMITIVE_STATUS:
+		return _PRIMITIVE_STATUS[rsc]
+	if rsc is None:
+		return 500
+	return { 2 : 200, 4 : 400, 5 : 500 }.get(rsc // 1000, 500)
+
+
+# Add the arguments of a query string to a request primitive. Repeated arguments, e.g.
+# several labels, are added as a list.
+def _primitiveQueryParameters(primitive, query):
+	if not query:
+		return
+	filterCriteria = {}
+	for (key, value) in urllib.parse.parse_qsl(query):
+		value = int(value) if value.isdigit() else value
+		target = primitive if key in _PRIMITIVE_PARAMETERS else filterCriteria
+		if key in target:
+			target[key] = (target[key] if isinstance(target[key], list) else [ target[key] ]) + [ value ]
+		else:
+			target[key] = value
+	if filterCriteria:
+		primitive['fc'] = filterCriteria
+
+
+# Encode a request or response primitive. The already encoded content is added as "pc".
+# CBOR primitives have the same structure as JSON primitives.
+def _encodePrimitive(primitive, content, encoding, name):
+	if encoding == CON.Encoding_XML:
+		root = ET.Element('{http://www.onem2m.org/xml/protocols}' + name, nsmap={ 'm2m' : 'http://www.onem2m.org/xml/protocols' })
+		for (key, value) in primitive.items():
+			if isinstance(value, dict):
+				element = ET.SubElement(root, key)
+				for (k, v) in value.items():
+					ET.SubElement(element, k).text = ' '.join([ str(i) for i in v ]) if isinstance(v, list) else str(v)
+			elif value is not None:
+				ET.SubElement(root, key).text = str(value)
+		if content:
+			ET.SubElement(root, 'pc').append(ET.fromstring(content))
+		return ET.tostring(root)
+	if content:
+		primitive = dict(primitive, pc=INT.decodeJSON(content, encoding))
+	if encoding == CON.Encoding_CBOR:
+		return INT.encodeJSON(primitive, encoding)
+	return json.dumps(primitive).encode('utf-8')
+
+
+# Decode a request or response primitive. Return a tuple (primitive, content), where the
+# primitive is a dictionary of the simple parameters, and the content is the encoded "pc".
+def _decodePrimitive(data, encoding):
+	if encoding == CON.Encoding_XML:
+		root = ET.fromstring(data)
+		primitive = { ET.QName(element).localname : element.text for element in root if ET.QName(element).localname != 'pc' }
+		pc = root.find('pc')
+		content = ET.tostring(pc[0]) if pc is not None and len(pc) > 0 else b''
+		return (primitive, content)
+	primitive = INT.decodeJSON(data, encoding)
+	if len(primitive) == 1 and list(primitive.keys())[0] in [ 'm2m:rqp', 'm2m:rsp' ]:
+		primitive = list(primitive.values())[0]
+	pc = primitive.pop('pc', None)
+	if pc is None:
+		return (primitive, b'')
+	if encoding == CON.Encoding_CBOR:
+		return (primitive, INT.encodeJSON(pc, encoding))
+	return (primitive, json.dumps(pc).encode('utf-8'))
+
+
+###############################################################################
+#
+#	MQTT
+#
+#	Requests and responses are exchanged as oneM2M primitives according to oneM2M TS-0010.
+#	They are published to the topics /oneM2M/req/<originator>/<receiver>/<json|xml|cbor> resp.
+#	/oneM2M/resp/<originator>/<receiver>/<json|xml|cbor>, and correlated by their request identifier.
+#
+
+_MQTT_QOS = 1
+_MQTT_ENCODINGS = { 'xml' : CON.Encoding_XML, 'json' : CON.Encoding_JSON, 'cbor' : CON.Encoding_CBOR }
+
+
+class MQTTTransport(Transport):
+	"""
+	The MQTT binding. All requests of all sessions that use the same MQTTTransport object are
+	sent over a single persistent connection to the broker. The connection is established with
+	the first request, and it is re-established automatically after a connection loss.
+
+	Sessions that are created with the same *mqtt://* address share a single MQTTTransport object.
+	"""
+
+	def __init__(self, host='localhost', port=1883, username=None, password=None, clientID=None, keepAlive=CON.NETWORK_MQTT_KEEPALIVE):
+		"""
+		Initialize an MQTTTransport object.
+
+		Args:
+
+		- *host*: String. The host name of the broker. Optional, the default is 'localhost'.
+		- *port*: Integer. The port of the broker. Optional, the default is 1883.
+		- *username*, *password*: String. The credentials for the broker, if necessary. Optional.
+		- *clientID*: String. The client identifier for the broker connection. Optional, the default
+			is a random identifier.
+		- *keepAlive*: Integer. The keep-alive interval in seconds of the broker connection. Optional,
+			the default is `onem2mlib.constants.NETWORK_MQTT_KEEPALIVE`.
+
+		This may throw a `onem2mlib.exceptions.NotSupportedError` exception when the *paho-mqtt*
+		module is not installed.
+		"""
+		if mqtt is None:
+			raise EXC.NotSupportedError('The MQTT binding requires the paho-mqtt module.')
+
+		self.host = host
+		""" String. The host name of the broker. """
+
+		self.port = port
+		""" Integer. The port of the broker. """
+
+		self.username = username
+		self.password = password
+		self.clientID = clientID if clientID else 'onem2mlib-' + os.urandom(6).hex()
+		self.keepAlive = keepAlive
+
+		self._client = None
+		self._lock = threading.Lock()
+		self._topics = set()		# subscribed topics, re-subscribed after a reconnect
+		self._pending = {}			# requestID -> [event, response]
+		self._handlers = {}			# receiverID -> handler for incoming requests
+
+
+	def request(self, session, method, path, type=None, body=None):
+		primitive = _requestPrimitive(session, method, path, type)
+		receiver = _mqttID(urllib.parse.urlsplit(session.address).path.strip('/') or primitive['to'].split('/')[1])
+		originator = _mqttID(session.originator)
+		format = _mqttFormat(session.encoding)
+		pending = [ threading.Event(), None ]
+		with self._lock:
+			self._pending[primitive['rqi']] = pending
+		try:
+			self._subscribe('/oneM2M/resp/' + originator + '/' + receiver + '/' + format)
+			self._client.publish('/oneM2M/req/' + originator + '/' + receiver + '/' + format, _encodePrimitive(primitive, body, session.encoding, 'rqp'), qos=_MQTT_QOS)
+			if not pending[0].wait(CON.NETWORK_REQUEST_TIMEOUT):
+				raise TimeoutError('MQTT request timed out')
+			return pending[1]
+		finally:
+			with self._lock:
+				self._pending.pop(primitive['rqi'], None)
+
+
+	def close(self, session):
+		pass		# the broker connection is shared with other sessions
+
+
+	def disconnect(self):
+		"""
+		Close the connection to the broker. It is established again with the next request.
+		"""
+		with self._lock:
+			client = self._client
+			self._client = None
+			self._topics.clear()
+		if client:
+			client.disconnect()
+			client.loop_stop()
+
+
+	# Return the URI under which requests for the originator of a session (e.g. notifications)
+	# can be sent to this client
+	def _uri(self, session):
+		return 'mqtt://' + self.host + ':' + str(self.port) + '/' + _mqttID(session.originator)
+
+
+	# Call the handler for requests that are published to the request topics of the originator
+	# of a session. The handler is called as handler(contentType, content, requestID), and it 
+	# returns a oneM2M response status code. It is called by the network thread and must not block.
+	def _addRequestHandler(self, session, handler):
+		receiver = _mqttID(session.originator)
+		with self._lock:
+			self._handlers[receiver] = handler
+		self._subscribe('/oneM2M/req/+/' + receiver + '/+')
+
+
+	def _removeRequestHandler(self, session):
+		receiver = _mqttID(session.originator)
+		with self._lock:
+			self._handlers.pop(receiver, None)
+			self._topics.discard('/oneM2M/req/+/' + receiver + '/+')
+			client = self._client
+		if client:
+			client.unsubscribe('/oneM2M/req/+/' + receiver + '/+')
+
+
+	# Return the connected client. It is created and connected when necessary.
+	def _connect(self):
+		with self._lock:
+			if not self._client:
+				if hasattr(mqtt, 'CallbackAPIVersion'):		# paho-mqtt >= 2.0
+					client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id=self.clientID)
+				else:
+					client = mqtt.Client(client_id=self.clientID)
+				if self.username:
+					client.username_pw_set(self.username, self.password)
+				client.on_connect = self._onConnect
+				client.on_message = self._onMessage
+				client.connect(self.host, self.port, self.keepAlive)
+				client.loop_start()
+				self._client = client
+			return self._client
+
+
+	def _subscribe(self, topic):
+		client = self._connect()
+		with self._lock:
+			if topic in self._topics:
+				return
+			self._topics.add(topic)
+		client.subscribe(topic, qos=_MQTT_QOS)
+
+
+	# Subscribe to all topics again after a reconnect
+	def _onConnect(self, client, userdata, flags, reasonCode, properties=None):
+		with self._lock:
+			topics = list(self._topics)
+		for topic in topics:
+			client.subscribe(topic, qos=_MQTT_QOS)
+
+
+	def _onMessage(self, client, userdata, message):
+		topic = message.topic.split('/')		# ['', 'oneM2M', 'req'|'resp', originator, receiver, format]
+		if len(topic) != 6:
+			return
+		encoding = _MQTT_ENCODINGS.get(topic[5], CON.Encoding_JSON)
+		try:
+			(primitive, content) = _decodePrimitive(message.payload, encoding)
+			status = _primitiveStatus(INT.toInt(primitive.get('rsc'))) if topic[2] == 'resp' else None
+		except Exception as e:		# ignore malformed messages
+			return
+		if topic[2] == 'resp':
+			with self._lock:
+				pending = self._pending.get(primitive.get('rqi'))
+			if pending:
+				pending[1] = _Response(status, content)
+				pending[0].set()
+		elif topic[2] == 'req':
+			with self._lock:
+				handler = self._handlers.get(topic[4])
+			if not handler:
+				return
+			status = handler(INT.contentType(encoding), content, primitive.get('rqi'))
+			client.publish('/oneM2M/resp/' + topic[3] + '/' + topic[4] + '/' + topic[5], _encodePrimitive(_responsePrimitive(primitive, status), None, encoding, 'rsp'), qos=_MQTT_QOS)
+
+
+_mqttTransports = {}
+_mqttTransportsLock = threading.Lock()
+
+
+# Return the shared transport for the broker of an mqtt:// address
+def _sharedMQTTTransport(address):
+	url = urllib.parse.urlsplit(address)
+	key = (url.hostname, url.port or 1883, url.username)
+	with _mqttTransportsLock:
+		if key not in _mqttTransports:
+			_mqttTransports[key] = MQTTTransport(url.hostname, url.port or 1883, url.username, url.password)
+		return _mqttTransports[key]
+
+
+# Return an ID as it is used in topics: without a leading slash, and slashes replaced by colons
+def _mqttID(id):
+	return id.lstrip('/').replace('/', ':')
+
+
+def _mqttFormat(encoding):
+	return { CON.Encoding_XML : 'xml', CON.Encoding_CBOR : 'cbor' }.get(encoding, 'json')
+
+
+###############################################################################
+#
+#	WebSocket
+#
+#	Requests and responses are exchanged as oneM2M primitives according to oneM2M TS-0020,
+#	in text frames (binary frames for CBOR) of a WebSocket connection (RFC 6455). The sub-protocol 
+#	oneM2M.R2.0.json, oneM2M.R2.0.xml or oneM2M.R2.0.cbor determines the serialization of all 
+#	primitives on a connection.
+#
+
+_WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+_WEBSOCKET_PROTOCOLS = { CON.Encoding_XML : 'oneM2M.R2.0.xml', CON.Encoding_JSON : 'oneM2M.R2.0.json', CON.Encoding_CBOR : 'oneM2M.R2.0.cbor' }
+
+_WEBSOCKET_CONTINUATION = 0x0
+_WEBSOCKET_TEXT = 0x1
+_WEBSOCKET_BINARY = 0x2
+_WEBSOCKET_CLOSE = 0x8
+_WEBSOCKET_PING = 0x9
+_WEBSOCKET_PONG = 0xa
+
+
+class WebSocketTransport(Transport):
+	"""
+	The WebSocket binding. All requests of all sessions that use the same WebSocketTransport 
+	object are sent over a single long-lived connection per CSE address and encoding. Many requests
+	can be outstanding on a connection at the same time; their responses are correlated by their
+	request identifier. The connection is established with the first request, and it is
+	re-established with the next request after a connection loss. A connection on which no pong
+	is received within the ping interval after a ping is regarded as lost.
+
+	The CSE can also send requests, e.g. notifications, over the same connection. Therefore,
+	an AE can receive notifications without a listening port, e.g. behind a NAT. See the *server*
+	argument of `onem2mlib.notifications.setupNotifications`(). A connection that receives such
+	requests is re-established in the background after a connection loss, and a request is sent
+	for the originator, so that the CSE associates the new connection with it.
+
+	Sessions that are created with a *ws://* or *wss://* address share a single WebSocketTransport object.
+	"""
+
+	def __init__(self, pingInterval=CON.NETWORK_WEBSOCKET_PING_INTERVAL, sslContext=None):
+		"""
+		Initialize a WebSocketTransport object.
+
+		Args:
+
+		- *pingInterval*: Number. The time in seconds after which a ping is sent on an idle connection
+			to keep it (and the NAT mappings on the way) alive. Optional, the default is 
+			`onem2mlib.constants.NETWORK_WEBSOCKET_PING_INTERVAL`.
+		- *sslContext*: ssl.SSLContext. The context for *wss://* connections. Optional, the default
+			is the default context of the *ssl* module.
+		"""
+		self.pingInterval = pingInterval
+		""" Number. The time in seconds after which a ping is sent on an idle connection. """
+
+		self.sslContext = sslContext
+
+		self._lock = threading.Lock()
+		self._connections = {}		# (address, encoding) -> _WebSocketConnection
+		self._pending = {}			# requestID -> [event, response, connection]
+		self._handlers = {}			# receiverID -> handler for incoming requests
+		self._handlerSessions = {}	# receiverID -> session whose connection receives the requests
+
+
+	def request(self, session, method, path, type=None, body=None):
+		primitive = _requestPrimitive(session, method, path, type)
+		connection = self._connect(session)
+		pending = [ threading.Event(), None, connection ]
+		with self._lock:
+			self._pending[primitive['rqi']] = pending
+		try:
+			connection.send(_encodePrimitive(primitive, body, session.encoding, 'rqp'))
+			if not pending[0].wait(CON.NETWORK_REQUEST_TIMEOUT):
+				raise TimeoutError('WebSocket request timed out')
+			if pending[1] is None:
+				raise ConnectionError('WebSocket connection closed')
+			return pending[1]
+		finally:
+			with self._lock:
+				self._pending.pop(primitive['rqi'], None)
+
+
+	def close(self, session):
+		pass		# the connection is shared with other sessions
+
+
+	def disconnect(self):
+		"""
+		Close all connections. They are established again with the next request.
+		"""
+		with self._lock:
+			connections = list(self._connections.values())
+			self._connections.clear()
+		for connection in connections:
+			connection.close()
+
+
+	# Return the URI under which requests for the originator of a session (e.g. notifications)
+	# can be sent to this client. This is the originator itself, and the CSE sends these requests
+	# over the connection on which the originator's requests are received.
+	def _uri(self, session):
+		return session.originator
+
+
+	# Call the handler for requests to the originator of a session. The handler is called as 
+	# handler(contentType, content, requestID), and it returns a oneM2M response status code.
+	# It is called by the receiving thread of a connection and must not block.
+	def _addRequestHandler(self, session, handler):
+		with self._lock:
+			self._handlers[session.originator.lstrip('/')] = handler
+			self._handlerSessions[session.originator.lstrip('/')] = session
+		self._connect(session)
+
+
+	def _removeRequestHandler(self, session):
+		with self._lock:
+			self._handlers.pop(session.originator.lstrip('/'), None)
+			self._handlerSessions.pop(session.originator.lstrip('/'), None)
+
+
+	# Return the open connection for a session. It is created and connected when necessary.
+	def _connect(self, session):
+		return self._connectKey((session.address, session.encoding))
+
+
+	# Return the open connection for an (address, encoding) key. The connection is established
+	# without holding the lock, so that a slow handshake doesn't block the other connections.
+	# If another thread connected in the meantime then its connection is used.
+	def _connectKey(self, key):
+		with self._lock:
+			connection = self._connections.get(key)
+			if connection and connection.connected:
+				return connection
+		connection = _WebSocketConnection(key[0], key[1], self.pingInterval, self.sslContext, self._onMessage, self._onClose)
+		with self._lock:
+			existing = self._connections.get(key)
+			if not existing or not existing.connected:
+				self._connections[key] = connection
+				return connection
+		connection.close()
+		return existing
+
+
+	def _onMessage(self, connection, data):
+		try:
+			(primitive, content) = _decodePrimitive(data, connection.encoding)
+			status = _primitiveStatus(INT.toInt(primitive.get('rsc'))) if 'rsc' in primitive else None
+		except Exception as e:		# ignore malformed messages
+			return
+		if status is not None:
+			with self._lock:
+				pending = self._pending.get(primitive.get('rqi'))
+			if pending:
+				pending[1] = _Response(status, content)
+				pending[0].set()
+			return
+		receiver = (primitive.get('to') or '').lstrip('/')
+		with self._lock:
+			handler = self._handlers.get(receiver) or self._handlers.get(receiver.rsplit('/', 1)[-1])
+		status = handler(INT.contentType(connection.encoding), content, primitive.get('rqi')) if handler else 4004
+		connection.send(_encodePrimitive(_responsePrimitive(primitive, status), None, connection.encoding, 'rsp'))
+
+
+	# Let all requests fail that are still waiting for a response on a closed connection. A lost 
+	# connection that receives requests is re-established, unless it was closed by disconnect().
+	def _onClose(self, connection):
+		key = (connection.address, connection.encoding)
+		with self._lock:
+			pendings = [ pending for pending in self._pending.values() if pending[2] is connection ]
+			reconnect = self._connections.get(key) is connection and self._handlerSessionsFor(key)
+		for pending in pendings:
+			pending[0].set()
+		if reconnect:
+			threading.Thread(target=self._reconnect, args=(key,), name='onem2mlib-websocket-reconnect', daemon=True).start()
+
+
+	# Return the sessions whose requests are received on the connection for an (address, encoding) key.
+	# The lock must be held.
+	def _handlerSessionsFor(self, key):
+		return [ session for session in self._handlerSessions.values() if (session.address, session.encoding) == key ]
+
+
+	# Re-establish a connection until it succeeds, or until no requests are received on it anymore.
+	# Afterwards a request is sent for each originator that receives requests on the connection,
+	# so that the CSE sends the requests for the originator over the new connection.
+	def _reconnect(self, key):
+		delay = CON.NETWORK_WEBSOCKET_RECONNECT_DELAY
+		while True:
+			time.sleep(delay)
+			with self._lock:
+				if not self._handlerSessionsFor(key):
+					return
+			try:
+				self._connectKey(key)
+				break
+			except Exception as e:
+				delay = min(delay * 2, CON.NETWORK_WEBSOCKET_RECONNECT_MAX_DELAY)
+		with self._lock:
+			sessions = self._handlerSessionsFor(key)
+		for session in sessions:
+			try:
+				self.request(session, 'GET', session.originator)	# retrieve the originator's AE
+			except Exception as e:
+				pass			# the connection is re-established again when it was lost
+
+
+# A single WebSocket connection to a CSE. The frames are received by a background thread,
+# which passes complete messages to the onMessage callback.
+class _WebSocketConnection:
+
+	def __init__(self, address, encoding, pingInterval, sslContext, onMessage, onClose):
+		self.address = address
+		self.encoding = encoding
+		self.connected = False
+		self._awaitingPong = False
+		self._opcode = _WEBSOCKET_BINARY if encoding == CON.Encoding_CBOR else _WEBSOCKET_TEXT
+		self._onMessage = onMessage
+		self._onClose = onClose
+		self._lock = threading.Lock()
+		self._buffer = bytearray()
+
+		url = urllib.parse.urlsplit(address)
+		secure = url.scheme.lower() == 'wss'
+		self._socket = socket.create_connection((url.hostname, url.port or (443 if secure else 80)), CON.NETWORK_REQUEST_TIMEOUT)
+		try:
+			if secure:
+				self._socket = (sslContext or ssl.create_default_context()).wrap_socket(self._socket, server_hostname=url.hostname)
+			self._handshake(url, _WEBSOCKET_PROTOCOLS.get(encoding, _WEBSOCKET_PROTOCOLS[CON.Encoding_JSON]))
+		except Exception:
+			self._socket.close()
+			raise
+		self._socket.settimeout(pingInterval)
+		self.connected = True
+		threading.Thread(target=self._receive, daemon=True).start()
+
+
+	# Upgrade the http connection to a WebSocket connection with the oneM2M sub-protocol
+	def _handshake(self, url, protocol):
+		key = base64.b64encode(os.urandom(16)).decode()
+		request =	'GET ' + (url.path or '/') + ('?' + url.query if url.query else '') + ' HTTP/1.1\r\n' + \
+					'Host: ' + url.netloc + '\r\n' + \
+					'Upgrade: websocket\r\n' + \
+					'Connection: Upgrade\r\n' + \
+					'Sec-WebSocket-Key: ' + key + '\r\n' + \
+					'Sec-WebSocket-Version: 13\r\n' + \
+					'Sec-WebSocket-Protocol: ' + protocol + '\r\n\r\n'
+		self._socket.sendall(request.encode())
+		while b'\r\n\r\n' not in self._buffer:
+			data = self._socket.recv(4096)
+			if not data or len(self._buffer) > 65536:
+				raise ConnectionError('WebSocket handshake failed')
+			self._buffer += data
+		(response, _, rest) = bytes(self._buffer).partition(b'\r\n\r\n')
+		self._buffer = bytearray(rest)			# frames that were sent directly after the handshake
+		lines = response.decode('latin-1').split('\r\n')
+		headers = { name.strip().lower() : value.strip() for (name, _, value) in [ line.partition(':') for line in lines[1:] ] }
+		accept = base64.b64encode(hashlib.sha1((key + _WEBSOCKET_GUID).encode()).digest()).decode()
+		if lines[0].split(' ')[1:2] != [ '101' ] or headers.get('sec-websocket-accept') != accept:
+			raise ConnectionError('WebSocket handshake failed: ' + lines[0])
+		if headers.get('sec-websocket-protocol') != protocol:
+			raise EXC.NotSupportedError('WebSocket sub-protocol not supported by the CSE: ' + protocol)
+
+
+	# Send a message as a single, masked frame. Primitives are sent as text frames, or binary frames for CBOR.
+	def send(self, payload, opcode=None):
+		opcode = opcode if opcode is not None else self._opcode
+		length = len(payload)
+		if length < 126:
+			header = bytes([ 0x80 | opcode, 0x80 | length ])
+		elif length < 0x10000:
+			header = bytes([ 0x80 | opcode, 0x80 | 126 ]) + length.to_bytes(2, 'big')
+		else:
+			header = bytes([ 0x80 | opcode, 0x80 | 127 ]) + length.to_bytes(8, 'big')
+		mask = os.urandom(4)
+		with self._lock:
+			if not self.connected:
+				raise ConnectionError('WebSocket connection closed')
+			self._socket.sendall(header + mask + _webSocketMask(payload, mask))
+
+
+	def close(self):
+		try:
+			self.send(b'', _WEBSOCKET_CLOSE)
+		except OSError:
+			pass
+		self._shutdown()
+
+
+	def _shutdown(self):
+		with self._lock:
+			if not self.connected:
+				return
+			self.connected = False
+		try:
+			self._socket.shutdown(socket.SHUT_RDWR)
+		except OSError:
+			pass
+		self._socket.close()
+		self._onClose(self)
+
+
+	# Receive frames until the connection is closed. Fragmented messages are re-assembled,
+	# and pings are answered.
+	def _receive(self):
+		message = bytearray()
+		try:
+			while True:
+				(final, opcode, payload) = self._receiveFrame()
+				if opcode == _WEBSOCKET_PING:
+					self.send(payload, _WEBSOCKET_PONG)
+				elif opcode == _WEBSOCKET_PONG:
+					self._awaitingPong = False
+				elif opcode == _WEBSOCKET_CLOSE:
+					self.close()
+					return
+				elif opcode in [ _WEBSOCKET_TEXT, _WEBSOCKET_BINARY, _WEBSOCKET_CONTINUATION ]:
+					message += payload
+					if final:
+						self._onMessage(self, bytes(message))
+						message = bytearray()
+		except Exception as e:
+			pass
+		self._shutdown()
+
+
+	# Receive a single frame and return a tuple (final, opcode, payload)
+	def _receiveFrame(self):
+		header = self._read(2)
+		length = header[1] & 0x7f
+		if length == 126:
+			length = int.from_bytes(self._read(2), 'big')
+		elif length == 127:
+			length = int.from_bytes(self._read(8), 'big')
+		mask = self._read(4) if header[1] & 0x80 else None
+		payload = self._read(length)
+		if mask:
+			payload = _webSocketMask(payload, mask)
+		return (bool(header[0] & 0x80), header[0] & 0x0f, payload)
+
+
+	# Read a number of bytes. A ping is sent when nothing is received within the ping interval,
+	# and the connection is regarded as lost when the pong is not received within the next interval.
+	def _read(self, count):
+		while len(self._buffer) < count:
+			try:
+				data = self._socket.recv(65536)
+			except socket.timeout:
+				if self._awaitingPong:
+					raise ConnectionError('WebSocket ping was not answered')
+				self._awaitingPong = True
+				self.send(b'', _WEBSOCKET_PING)
+				continue
+			if not data:
+				raise ConnectionError('WebSocket connection closed')
+			self._buffer += data
+		data = bytes(self._buffer[:count])
+		del self._buffer[:count]
+		return data
+
+
+# Mask or unmask the payload of a frame
+def _webSocketMask(data, mask):
+	length = len(data)
+	if not length:
+		return b''
+	key = (mask * (length // 4 + 1))[:length]
+	return (int.from_bytes(data, 'big') ^ int.from_bytes(key, 'big')).to_bytes(length, 'big')
+
+
+_webSocketTransport = None
+_webSocketTransportLock = threading.Lock()
+
+
+# Return the shared transport for ws:// and wss:// addresses
+def _sharedWebSocketTransport():
+	global _webSocketTransport
+	with _webSocketTransportLock:
+		if not _webSocketTransport:
+			_webSocketTransport = WebSocketTransport()
+		return _webSocketTransport
@@ -13,6 +13,10 @@ import onem2mlib.constants as CON
 
 host		= 'http://localhost:8282'
 rhost		= 'http://localhost:8080'
+chost		= 'coap://localhost:5683'
+mhost		= 'mqtt://localhost:1883/mn-cse'
+whost		= 'ws://localhost:8888'
+uhost		= 'http+unix://%2Fvar%2Frun%2Fmn-cse.sock'
 originator	= 'admin:admin'
 #encoding	= CON.Encoding_XML
 encoding	= CON.Encoding_JSON
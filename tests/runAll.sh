@@ -9,8 +9,17 @@ python3 test_contentInstance.py
 python3 test_group.py
 python3 test_accessControlPolicy.py
 python3 test_discovery.py
+python3 test_cbor.py
+python3 test_cache.py
 python3 test_subscription.py
 python3 test_notification.py
+python3 test_coap.py
+python3 test_coapMessages.py
+python3 test_mqtt.py
+python3 test_mqttPrimitives.py
+python3 test_websocket.py
+python3 test_unixSocket.py
+python3 test_localTransport.py
 python3 test_remoteCSE.py
 
 endtime=`date +%s`
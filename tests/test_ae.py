@@ -131,6 +131,18 @@ class TestAE(unittest.TestCase):
 		self.assertTrue(len(cnts) == 2) 
 
 
+	def test_containersInAEWithDiscovery(self):
+		# Same result without retrieving the child resources in a single request
+		supportsResultContent = TestAE.session._supportsResultContent
+		cnts = TestAE.ae.containers()
+		TestAE.session._supportsResultContent = False
+		discoveredCnts = TestAE.ae.containers()
+		TestAE.session._supportsResultContent = supportsResultContent
+		self.assertEqual(len(discoveredCnts), 2)
+		self.assertEqual([ cnt.resourceID for cnt in cnts ], [ cnt.resourceID for cnt in discoveredCnts ])
+		self.assertEqual([ cnt.resourceName for cnt in cnts ], [ cnt.resourceName for cnt in discoveredCnts ])
+
+
 	def test_flexContainersInAE(self):
 		print('TODO: Implement flexContainer tests... ', end='', flush=True)
 
@@ -199,6 +211,7 @@ if __name__ == '__main__':
 	suite.addTest(TestAE('test_retrieveAE'))
 	suite.addTest(TestAE('test_updateAE'))
 	suite.addTest(TestAE('test_containersInAE'))
+	suite.addTest(TestAE('test_containersInAEWithDiscovery'))
 	suite.addTest(TestAE('test_flexContainersInAE'))
 	suite.addTest(TestAE('test_groupsInAE'))
 	suite.addTest(TestAE('test_getAE'))
@@ -0,0 +1,153 @@
+#!/usr/local/bin/python3
+
+#
+#	test_aio.py
+#
+#	(c) 2018 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	Unit test for the asyncio interface.
+#
+
+import unittest
+import os, sys, asyncio
+sys.path.append('..')
+
+from onem2mlib import *
+import onem2mlib.constants as CON
+import onem2mlib.utilities as UT
+from onem2mlib.aio import AsyncSession
+from conf import *
+
+
+class TestAio(unittest.TestCase):
+	loop = asyncio.new_event_loop()
+	session = None
+	cse = None
+	ae = None
+	cnt = None
+
+
+	@classmethod
+	def setUpClass(cls):
+		TestAio.session = AsyncSession(host, originator, encoding)
+		TestAio.cse = CSEBase(TestAio.session, CSE_ID, instantly=False)
+		if not TestAio._run(TestAio.session.retrieve(TestAio.cse)):
+			print('*** Cannot retrieve CSE "' + CSE_ID + '".')
+			exit()
+		if TestAio._run(TestAio.session.findSubResource(TestAio.cse, CON.Type_AE, AE_NAME)):
+			print('*** AE with name "' + AE_NAME + '" already present in CSE. Please remove it first.')
+			exit()
+
+
+	@classmethod
+	def tearDownClass(cls):
+		if TestAio.ae:
+			TestAio._run(TestAio.session.delete(TestAio.ae))
+			TestAio.ae = None
+		TestAio._run(TestAio.session.aclose())
+
+
+	def test_init(self):
+		self.assertIsNotNone(TestAio.session)
+		self.assertIsNotNone(TestAio.cse)
+		self.assertIsNotNone(TestAio.cse.resourceName)
+		self.assertEqual(TestAio.session.maxConcurrentRequests, CON.NETWORK_MAX_CONCURRENT_REQUESTS)
+		self.assertEqual(TestAio.session.maxParallelRequests, CON.NETWORK_MAX_PARALLEL_REQUESTS)
+
+
+	def test_createAE(self):
+		TestAio.ae = AE(TestAio.cse, resourceName=AE_NAME, instantly=False)
+		self.assertTrue(TestAio._run(TestAio.session.create(TestAio.ae)))
+		self.assertIsNotNone(TestAio.ae.resourceID)
+
+
+	def test_createContainers(self):
+		self.assertIsNotNone(TestAio.ae)
+		containers = [ Container(TestAio.ae, resourceName=CNT_NAME+str(i), instantly=False) for i in range(10) ]
+		results = TestAio._run(TestAio._gather([ TestAio.session.create(cnt) for cnt in containers ]))
+		self.assertTrue(all(results))
+		TestAio.cnt = containers[0]
+
+
+	def test_subResources(self):
+		self.assertIsNotNone(TestAio.ae)
+		containers = TestAio._run(TestAio.session.subResources(TestAio.ae, CON.Type_Container))
+		self.assertEqual(len(containers), 10)
+		for cnt in containers:
+			self.assertIsInstance(cnt, Container)
+			self.assertIsNotNone(cnt.resourceID)
+
+
+	def test_findSubResource(self):
+		self.assertIsNotNone(TestAio.ae)
+		cnt = TestAio._run(TestAio.session.findSubResource(TestAio.ae, CON.Type_Container, CNT_NAME+'0'))
+		self.assertIsNotNone(cnt)
+		self.assertEqual(cnt.resourceID, TestAio.cnt.resourceID)
+
+
+	def test_updateContainer(self):
+		self.assertIsNotNone(TestAio.cnt)
+		TestAio.cnt.maxNrOfInstances = CNT_MNI
+		self.assertTrue(TestAio._run(TestAio.session.update(TestAio.cnt)))
+		self.assertEqual(TestAio.cnt.maxNrOfInstances, CNT_MNI)
+
+
+	def test_contentInstance(self):
+		self.assertIsNotNone(TestAio.cnt)
+		cin = ContentInstance(TestAio.cnt, content=CIN_CONTENT, labels=CIN_LABELS, instantly=False)
+		self.assertTrue(TestAio._run(TestAio.session.create(cin)))
+		self.assertTrue(TestAio._run(TestAio.session.retrieve(TestAio.cnt)))
+		latest = TestAio._run(TestAio.session.latestContentInstance(TestAio.cnt))
+		self.assertIsNotNone(latest)
+		self.assertEqual(latest.content, CIN_CONTENT)
+
+
+	def test_discover(self):
+		self.assertIsNotNone(TestAio.ae)
+		cins = TestAio._run(TestAio.session.discover(TestAio.ae, [UT.newLabelFilterCriteria(CIN_LABELS[0])]))
+		self.assertEqual(len(cins), 1)
+		self.assertIsInstance(cins[0], ContentInstance)
+
+
+	def test_close(self):
+		# close() is synchronous like for a Session, aclose() also closes the async connections
+		self.assertIsNone(TestAio.session.close())
+		TestAio._run(TestAio.session.aclose())
+		self.assertIsNotNone(TestAio._run(TestAio.session.findSubResource(TestAio.cse, CON.Type_AE, AE_NAME)))
+
+
+	def test_deleteContainer(self):
+		self.assertIsNotNone(TestAio.cnt)
+		self.assertTrue(TestAio._run(TestAio.session.delete(TestAio.cnt)))
+		self.assertIsNone(TestAio._run(TestAio.session.findSubResource(TestAio.ae, CON.Type_Container, CNT_NAME+'0')))
+
+
+	def test_finit(self):
+		self.assertIsNotNone(TestAio.ae)
+		self.assertTrue(TestAio._run(TestAio.session.delete(TestAio.ae)))
+		TestAio.ae = None
+
+
+	def _run(coroutine):
+		return TestAio.loop.run_until_complete(coroutine)
+
+
+	async def _gather(coroutines):
+		return await asyncio.gather(*coroutines)
+
+
+if __name__ == '__main__':
+	suite = unittest.TestSuite()
+	suite.addTest(TestAio('test_init'))
+	suite.addTest(TestAio('test_createAE'))
+	suite.addTest(TestAio('test_createContainers'))
+	suite.addTest(TestAio('test_subResources'))
+	suite.addTest(TestAio('test_findSubResource'))
+	suite.addTest(TestAio('test_updateContainer'))
+	suite.addTest(TestAio('test_contentInstance'))
+	suite.addTest(TestAio('test_discover'))
+	suite.addTest(TestAio('test_close'))
+	suite.addTest(TestAio('test_deleteContainer'))
+	suite.addTest(TestAio('test_finit'))
+	unittest.TextTestRunner(verbosity=2, failfast=True).run(suite)
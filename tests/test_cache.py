@@ -0,0 +1,111 @@
+#!/usr/local/bin/python3
+
+#
+#	test_cache.py
+#
+#	(c) 2018 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	Unit test for the resource cache of a session.
+#
+
+import unittest
+import os, sys, time
+sys.path.append('..')
+
+from onem2mlib import *
+from conf import *
+
+
+class TestCache(unittest.TestCase):
+	session = None
+	cse = None
+	ae = None
+	cnt = None
+
+
+	@classmethod
+	def setUpClass(cls):
+		TestCache.session = Session(host, originator, encoding, cacheSize=10, cacheTTL=60)
+		TestCache.cse = CSEBase(TestCache.session, CSE_ID)
+		if TestCache.cse.findAE(AE_NAME):
+			print('*** AE with name "' + AE_NAME + '" already present in CSE. Please remove it first.')
+			exit()
+		TestCache.ae = AE(TestCache.cse, resourceName=AE_NAME)
+
+
+	@classmethod
+	def tearDownClass(cls):
+		if TestCache.ae:
+			TestCache.ae.deleteFromCSE()
+			TestCache.ae = None
+
+
+	def test_init(self):
+		self.assertIsNotNone(TestCache.session)
+		self.assertEqual(TestCache.session.cacheSize, 10)
+		self.assertEqual(TestCache.session.cacheTTL, 60)
+		self.assertIsNotNone(TestCache.ae)
+		self.assertIsNotNone(TestCache.ae.resourceID)
+
+
+	def test_findContainer(self):
+		TestCache.cnt = TestCache.ae.addContainer(CNT_NAME)
+		self.assertIsNotNone(TestCache.cnt)
+		cnt = TestCache.ae.findContainer(CNT_NAME)
+		self.assertIs(cnt, TestCache.cnt)
+		self.assertIs(TestCache.ae.findContainer(CNT_NAME), cnt)
+		self.assertIs(retrieveResourceFromCSE(TestCache.ae, cnt.resourceID), cnt)
+
+
+	def test_revalidate(self):
+		self.assertIsNotNone(TestCache.cnt)
+		stateTag = TestCache.cnt.stateTag
+		self.assertIsNotNone(TestCache.cnt.addContent(CIN_CONTENT))
+		cnt = TestCache.ae.findContainer(CNT_NAME)	# parent was invalidated by the creation
+		self.assertIs(cnt, TestCache.cnt)
+		self.assertGreater(cnt.stateTag, stateTag)
+		self.assertEqual(cnt.currentNrOfInstances, 1)
+
+
+	def test_update(self):
+		self.assertIsNotNone(TestCache.cnt)
+		cnt = Container(TestCache.ae, resourceName=CNT_NAME)	# another instance of the same resource
+		cnt.maxNrOfInstances = CNT_MNI
+		self.assertTrue(cnt.updateInCSE())
+		self.assertEqual(TestCache.cnt.maxNrOfInstances, CNT_MNI)	# the cached instance is updated as well
+		self.assertIs(TestCache.ae.findContainer(CNT_NAME), TestCache.cnt)
+
+
+	def test_delete(self):
+		self.assertIsNotNone(TestCache.cnt)
+		self.assertTrue(TestCache.cnt.deleteFromCSE())
+		self.assertIsNone(TestCache.ae.findContainer(CNT_NAME))
+		TestCache.cnt = None
+
+
+	def test_disabled(self):
+		session = Session(host, originator, encoding)
+		self.assertEqual(session.cacheSize, CON.CACHE_SIZE)
+		cse = CSEBase(session, CSE_ID)
+		ae = cse.findAE(AE_NAME)
+		self.assertIsNotNone(ae)
+		self.assertIsNot(cse.findAE(AE_NAME), ae)
+
+
+	def test_finit(self):
+		self.assertIsNotNone(TestCache.ae)
+		self.assertTrue(TestCache.ae.deleteFromCSE())
+		TestCache.ae = None
+
+
+if __name__ == '__main__':
+	suite = unittest.TestSuite()
+	suite.addTest(TestCache('test_init'))
+	suite.addTest(TestCache('test_findContainer'))
+	suite.addTest(TestCache('test_revalidate'))
+	suite.addTest(TestCache('test_update'))
+	suite.addTest(TestCache('test_delete'))
+	suite.addTest(TestCache('test_disabled'))
+	suite.addTest(TestCache('test_finit'))
+	unittest.TextTestRunner(verbosity=2, failfast=True).run(suite)
@@ -0,0 +1,106 @@
+#!/usr/local/bin/python3
+
+#
+#	test_cbor.py
+#
+#	(c) 2018 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	Unit test for the CBOR encoding. This requires a CSE that supports CBOR, as well as
+#	the cbor2 module.
+#
+
+import unittest
+import os, sys
+sys.path.append('..')
+
+from onem2mlib import *
+import onem2mlib.constants as CON
+import onem2mlib.exceptions as EXC
+from conf import *
+
+
+class TestCBOR(unittest.TestCase):
+	session = None
+	cse = None
+	ae = None
+	cnt = None
+
+
+	@classmethod
+	def setUpClass(cls):
+		TestCBOR.session = Session(host, originator, CON.Encoding_CBOR)
+		TestCBOR.cse = CSEBase(TestCBOR.session, CSE_ID)
+		if TestCBOR.cse.findAE(AE_NAME):
+			print('*** AE with name "' + AE_NAME + '" already present in CSE. Please remove it first.')
+			exit()
+
+
+	@classmethod
+	def tearDownClass(cls):
+		if TestCBOR.ae:
+			TestCBOR.ae.deleteFromCSE()
+			TestCBOR.ae = None
+
+
+	def test_init(self):
+		self.assertIsNotNone(TestCBOR.session)
+		self.assertEqual(TestCBOR.session.encoding, CON.Encoding_CBOR)
+		self.assertIsNotNone(TestCBOR.cse)
+		self.assertEqual(TestCBOR.cse.resourceID, CSE_ID)
+		self.assertEqual(TestCBOR.cse.resourceName, CSE_NAME)
+
+
+	def test_createAE(self):
+		TestCBOR.ae = AE(TestCBOR.cse, resourceName=AE_NAME, labels=AE_LABELS)
+		self.assertIsNotNone(TestCBOR.ae)
+		self.assertIsNotNone(TestCBOR.ae.resourceID)
+		self.assertEqual(TestCBOR.ae.resourceName, AE_NAME)
+		self.assertEqual(TestCBOR.ae.labels, AE_LABELS)
+
+
+	def test_createContainer(self):
+		TestCBOR.cnt = TestCBOR.ae.addContainer(CNT_NAME)
+		self.assertIsNotNone(TestCBOR.cnt)
+		self.assertIsNotNone(TestCBOR.cnt.resourceID)
+
+
+	def test_addContent(self):
+		cin = TestCBOR.cnt.addContent(CIN_CONTENT)
+		self.assertIsNotNone(cin)
+		self.assertEqual(cin.content, CIN_CONTENT)
+
+
+	def test_addBinaryContent(self):
+		# binary content is encoded as a CBOR byte string
+		content = bytes(range(256))
+		cin = TestCBOR.cnt.addContent(content)
+		self.assertIsNotNone(cin)
+		self.assertEqual(cin.content, content)
+		cins = TestCBOR.cnt.contentInstances()
+		self.assertEqual(len(cins), 2)
+		self.assertEqual(cins[1].content, content)
+
+
+	def test_discovery(self):
+		cnts = TestCBOR.ae.containers()
+		self.assertEqual(len(cnts), 1)
+		self.assertEqual(cnts[0].resourceID, TestCBOR.cnt.resourceID)
+
+
+	def test_finit(self):
+		self.assertIsNotNone(TestCBOR.ae)
+		self.assertTrue(TestCBOR.ae.deleteFromCSE())
+		TestCBOR.ae = None
+
+
+if __name__ == '__main__':
+	suite = unittest.TestSuite()
+	suite.addTest(TestCBOR('test_init'))
+	suite.addTest(TestCBOR('test_createAE'))
+	suite.addTest(TestCBOR('test_createContainer'))
+	suite.addTest(TestCBOR('test_addContent'))
+	suite.addTest(TestCBOR('test_addBinaryContent'))
+	suite.addTest(TestCBOR('test_discovery'))
+	suite.addTest(TestCBOR('test_finit'))
+	unittest.TextTestRunner(verbosity=2, failfast=True).run(suite)
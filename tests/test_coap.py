@@ -0,0 +1,106 @@
+#!/usr/local/bin/python3
+
+#
+#	test_coap.py
+#
+#	(c) 2018 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	Unit test for the CoAP transport. This requires a CSE that supports CoAP at *chost*.
+#
+
+import unittest
+import os, sys
+sys.path.append('..')
+
+from onem2mlib import *
+import onem2mlib.constants as CON
+import onem2mlib.exceptions as EXC
+import onem2mlib.transport as TRN
+from conf import *
+
+
+class TestCoAP(unittest.TestCase):
+	session = None
+	cse = None
+	ae = None
+	cnt = None
+
+
+	@classmethod
+	def setUpClass(cls):
+		TestCoAP.session = Session(chost, originator, encoding)
+		TestCoAP.cse = CSEBase(TestCoAP.session, CSE_ID)
+		if TestCoAP.cse.findAE(AE_NAME):
+			print('*** AE with name "' + AE_NAME + '" already present in CSE. Please remove it first.')
+			exit()
+
+
+	@classmethod
+	def tearDownClass(cls):
+		if TestCoAP.ae:
+			TestCoAP.ae.deleteFromCSE()
+			TestCoAP.ae = None
+
+
+	def test_init(self):
+		self.assertIsNotNone(TestCoAP.session)
+		self.assertIsInstance(TestCoAP.session.transport, TRN.CoAPTransport)
+		self.assertTrue(TestCoAP.session.transport.confirmable)
+		self.assertIsNotNone(TestCoAP.cse)
+		self.assertEqual(TestCoAP.cse.resourceID, CSE_ID)
+
+
+	def test_createAE(self):
+		TestCoAP.ae = AE(TestCoAP.cse, resourceName=AE_NAME)
+		self.assertIsNotNone(TestCoAP.ae)
+		self.assertIsNotNone(TestCoAP.ae.resourceID)
+		self.assertEqual(TestCoAP.ae.resourceName, AE_NAME)
+
+
+	def test_createContainer(self):
+		TestCoAP.cnt = TestCoAP.ae.addContainer(CNT_NAME)
+		self.assertIsNotNone(TestCoAP.cnt)
+		self.assertIsNotNone(TestCoAP.cnt.resourceID)
+
+
+	def test_largeContent(self):
+		# larger than a block, so the request and the responses are transferred in blocks
+		content = CIN_CONTENT * 200
+		cin = TestCoAP.cnt.addContent(content)
+		self.assertIsNotNone(cin)
+		self.assertEqual(cin.content, content)
+		cins = TestCoAP.cnt.contentInstances()
+		self.assertEqual(len(cins), 1)
+		self.assertEqual(cins[0].content, content)
+
+
+	def test_nonConfirmable(self):
+		session = Session(chost, originator, encoding, transport=TRN.CoAPTransport(confirmable=False))
+		self.assertFalse(session.transport.confirmable)
+		ae = CSEBase(session, CSE_ID).findAE(AE_NAME)
+		self.assertIsNotNone(ae)
+		self.assertEqual(ae.resourceID, TestCoAP.ae.resourceID)
+
+
+	def test_unsupportedProtocol(self):
+		with self.assertRaises(EXC.NotSupportedError):
+			Session('ftp://localhost', originator, encoding)
+
+
+	def test_finit(self):
+		self.assertIsNotNone(TestCoAP.ae)
+		self.assertTrue(TestCoAP.ae.deleteFromCSE())
+		TestCoAP.ae = None
+
+
+if __name__ == '__main__':
+	suite = unittest.TestSuite()
+	suite.addTest(TestCoAP('test_init'))
+	suite.addTest(TestCoAP('test_createAE'))
+	suite.addTest(TestCoAP('test_createContainer'))
+	suite.addTest(TestCoAP('test_largeContent'))
+	suite.addTest(TestCoAP('test_nonConfirmable'))
+	suite.addTest(TestCoAP('test_unsupportedProtocol'))
+	suite.addTest(TestCoAP('test_finit'))
+	unittest.TextTestRunner(verbosity=2, failfast=True).run(suite)
@@ -0,0 +1,216 @@
+#!/usr/local/bin/python3
+
+#
+#	test_coapMessages.py
+#
+#	(c) 2018 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	Unit test for the CoAP message encoding and the message exchange of the CoAP transport.
+#	This doesn't require a CSE. The requests are answered by a minimal CoAP server on localhost.
+#
+
+import unittest
+import os, sys, time, socket, threading
+sys.path.append('..')
+
+from onem2mlib import *
+import onem2mlib.constants as CON
+import onem2mlib.transport as TRN
+from conf import *
+
+
+# A minimal CoAP server that answers requests by calling its *handler*. The handler is
+# called with the decoded request, and it returns a list of messages to send back.
+class CoAPStandIn:
+
+	def __init__(self):
+		self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+		self.socket.bind(('127.0.0.1', 0))
+		self.address = 'coap://127.0.0.1:' + str(self.socket.getsockname()[1])
+		self.handler = None
+		self.received = []
+		self.thread = threading.Thread(target=self._run, daemon=True)
+		self.thread.start()
+
+
+	def close(self):
+		self.socket.close()
+
+
+	def _run(self):
+		while True:
+			try:
+				(data, address) = self.socket.recvfrom(65536)
+			except OSError:
+				return
+			message = TRN._coapDecode(data)
+			self.received.append(message)
+			if self.handler:
+				for response in self.handler(message):
+					self.socket.sendto(response, address)
+
+
+# Return the piggybacked response to a request
+def piggybacked(request, code, options=[], payload=None):
+	(type, _, messageID, token, _, _) = request
+	return TRN._coapEncode(TRN._COAP_ACK if type == TRN._COAP_CON else TRN._COAP_NON, code, messageID, token, options, payload)
+
+
+# CoAP response codes
+Content = (2 << 5) | 5			# 2.05
+Created = (2 << 5) | 1			# 2.01
+NotFound = (4 << 5) | 4			# 4.04
+
+
+class TestCoAPMessages(unittest.TestCase):
+	standIn = None
+	session = None
+
+	# A request with the oneM2M options, which need extended option deltas
+	message = bytes([ 0x42, 0x01, 0x12, 0x34, 0xab, 0xcd,		# CON, GET, message ID, token
+					  0xb1, 0x61,								# Uri-Path (11) "a"
+					  0xd2, 0xe8, 0x6f, 0x72,					# oneM2M-FR (256), delta 245 = 13 + 232
+					  0x11, 0x31,								# oneM2M-RQI (257), delta 1
+					  0xa1, 0x02,								# oneM2M-TY (267), delta 10
+					  0xff, 0x68, 0x69 ])						# payload "hi"
+
+
+	@classmethod
+	def setUpClass(cls):
+		TestCoAPMessages.standIn = CoAPStandIn()
+		TestCoAPMessages.session = Session(TestCoAPMessages.standIn.address, originator, encoding, transport=TRN.CoAPTransport(ackTimeout=0.1, maxRetransmit=2, blockSize=16))
+
+
+	@classmethod
+	def tearDownClass(cls):
+		if TestCoAPMessages.standIn:
+			TestCoAPMessages.standIn.close()
+			TestCoAPMessages.standIn = None
+
+
+	def setUp(self):
+		TestCoAPMessages.standIn.received.clear()
+
+
+	def request(self, handler, method='GET', body=None):
+		TestCoAPMessages.standIn.handler = handler
+		return TestCoAPMessages.session.transport.request(TestCoAPMessages.session, method, CSE_ID, body=body)
+
+
+	def test_encode(self):
+		options = [ (TRN._COAP_OPTION_ONEM2M_TY, b'\x02'), (TRN._COAP_OPTION_URI_PATH, b'a'), (TRN._COAP_OPTION_ONEM2M_RQI, b'1'), (TRN._COAP_OPTION_ONEM2M_FR, b'or') ]
+		self.assertEqual(TRN._coapEncode(TRN._COAP_CON, 1, 0x1234, b'\xab\xcd', options, b'hi'), TestCoAPMessages.message)
+
+
+	def test_encodeLargeOptions(self):
+		message = TRN._coapEncode(TRN._COAP_NON, 1, 1, b'', [ (300, b'x' * 20) ], None)
+		self.assertEqual(message, bytes([ 0x50, 0x01, 0x00, 0x01, 0xed, 0x00, 0x1f, 0x07 ]) + b'x' * 20)	# delta 269 + 31, length 13 + 7
+		self.assertEqual(TRN._coapDecode(message), (TRN._COAP_NON, 1, 1, b'', { 300 : [ b'x' * 20 ] }, b''))
+
+
+	def test_decode(self):
+		(type, code, messageID, token, options, payload) = TRN._coapDecode(TestCoAPMessages.message)
+		self.assertEqual(type, TRN._COAP_CON)
+		self.assertEqual(code, 1)
+		self.assertEqual(messageID, 0x1234)
+		self.assertEqual(token, b'\xab\xcd')
+		self.assertEqual(options, { 11 : [ b'a' ], 256 : [ b'or' ], 257 : [ b'1' ], 267 : [ b'\x02' ] })
+		self.assertEqual(payload, b'hi')
+
+
+	def test_decodeMalformed(self):
+		self.assertRaises(ValueError, TRN._coapDecode, b'\x00\x01')
+		self.assertRaises(ValueError, TRN._coapDecode, bytes([ 0x00, 0x01, 0x00, 0x01 ]))		# version 0
+		self.assertRaises(ValueError, TRN._coapDecode, bytes([ 0x40, 0x01, 0x00, 0x01, 0xf1, 0x00 ]))	# delta nibble 15
+
+
+	def test_request(self):
+		response = self.request(lambda request: [ piggybacked(request, Content, [], b'{}') ])
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response.content, b'{}')
+		options = TestCoAPMessages.standIn.received[0][4]
+		self.assertEqual(options[TRN._COAP_OPTION_URI_PATH], [ b'~', CSE_ID.encode() ])
+		self.assertEqual(options[TRN._COAP_OPTION_ONEM2M_FR], [ originator.encode() ])
+		self.assertIn(TRN._COAP_OPTION_ONEM2M_RQI, options)
+		self.assertEqual(self.request(lambda request: [ piggybacked(request, NotFound) ]).status_code, 404)
+
+
+	def test_block1(self):
+		body = bytes(range(40))
+		received = bytearray()
+		def handler(request):
+			(number, more, szx) = TRN._coapBlock(request[4], TRN._COAP_OPTION_BLOCK1)
+			self.assertEqual(szx, 0)			# 16 bytes
+			self.assertEqual(number * 16, len(received))
+			received.extend(request[5])
+			block1 = [ (TRN._COAP_OPTION_BLOCK1, request[4][TRN._COAP_OPTION_BLOCK1][0]) ]
+			return [ piggybacked(request, TRN._COAP_CONTINUE if more else Created, block1, None if more else b'{}') ]
+		response = self.request(handler, 'POST', body)
+		self.assertEqual(response.status_code, 201)
+		self.assertEqual(bytes(received), body)
+		self.assertEqual(len(TestCoAPMessages.standIn.received), 3)
+
+
+	def test_block2(self):
+		content = bytes(range(40))
+		def handler(request):
+			block2 = TRN._coapBlock(request[4], TRN._COAP_OPTION_BLOCK2)
+			number = block2[0] if block2 else 0
+			more = (number + 1) * 16 < len(content)
+			options = [ (TRN._COAP_OPTION_BLOCK2, TRN._coapUInt(number << 4 | more << 3)) ]
+			return [ piggybacked(request, Content, options, content[number * 16:(number + 1) * 16]) ]
+		response = self.request(handler)
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response.content, content)
+		self.assertEqual(len(TestCoAPMessages.standIn.received), 3)
+
+
+	def test_separateResponse(self):
+		def handler(request):
+			(type, _, messageID, token, _, _) = request
+			if type == TRN._COAP_ACK:
+				return []
+			return [ TRN._coapEncode(TRN._COAP_ACK, 0, messageID, b'', [], None),						# empty ACK
+					 TRN._coapEncode(TRN._COAP_CON, Content, (messageID + 1) & 0xffff, token, [], b'{}') ]	# separate response
+		response = self.request(handler)
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response.content, b'{}')
+		time.sleep(0.1)
+		# the separate response must be acknowledged
+		acks = [ message for message in TestCoAPMessages.standIn.received if message[0] == TRN._COAP_ACK ]
+		self.assertEqual(len(acks), 1)
+		self.assertEqual(acks[0][2], (TestCoAPMessages.standIn.received[0][2] + 1) & 0xffff)
+
+
+	def test_retransmission(self):
+		def handler(request):
+			if len(TestCoAPMessages.standIn.received) < 2:		# lose the first message
+				return []
+			return [ piggybacked(request, Content, [], b'{}') ]
+		response = self.request(handler)
+		self.assertEqual(response.status_code, 200)
+		received = TestCoAPMessages.standIn.received
+		self.assertEqual(len(received), 2)
+		self.assertEqual(received[0], received[1])		# the same message, with the same message ID
+
+
+	def test_timeout(self):
+		self.assertRaises(TimeoutError, self.request, lambda request: [])
+		self.assertEqual(len(TestCoAPMessages.standIn.received), 3)	# the message and two re-transmissions
+
+
+if __name__ == '__main__':
+	suite = unittest.TestSuite()
+	suite.addTest(TestCoAPMessages('test_encode'))
+	suite.addTest(TestCoAPMessages('test_encodeLargeOptions'))
+	suite.addTest(TestCoAPMessages('test_decode'))
+	suite.addTest(TestCoAPMessages('test_decodeMalformed'))
+	suite.addTest(TestCoAPMessages('test_request'))
+	suite.addTest(TestCoAPMessages('test_block1'))
+	suite.addTest(TestCoAPMessages('test_block2'))
+	suite.addTest(TestCoAPMessages('test_separateResponse'))
+	suite.addTest(TestCoAPMessages('test_retransmission'))
+	suite.addTest(TestCoAPMessages('test_timeout'))
+
+	unittest.TextTestRunner(verbosity=2, failfast=True).run(suite)
@@ -117,6 +117,48 @@ class TestDiscovery(unittest.TestCase):
 		self.assertTrue(TestDiscovery._checkResourceInList(cins, CIN_NAME+'3'))
 
 
+	def test_discoverParallel(self):
+		self.assertIsNotNone(TestDiscovery.ae)
+		TestDiscovery.session.maxParallelRequests = 1
+		serial = TestDiscovery.ae.discover( [UT.newTypeFilterCriteria(CON.Type_ContentInstance)] )
+		TestDiscovery.session.maxParallelRequests = CON.NETWORK_MAX_PARALLEL_REQUESTS
+		parallel = TestDiscovery.ae.discover( [UT.newTypeFilterCriteria(CON.Type_ContentInstance)] )
+		self.assertEqual(len(serial), 4)
+		self.assertEqual([ cin.resourceID for cin in serial ], [ cin.resourceID for cin in parallel ])
+
+
+	def test_discoverLimitOffset(self):
+		self.assertIsNotNone(TestDiscovery.ae)
+		cins = TestDiscovery.ae.discover( [UT.newTypeFilterCriteria(CON.Type_ContentInstance)] )
+		limited = TestDiscovery.ae.discover( [UT.newTypeFilterCriteria(CON.Type_ContentInstance)], limit=2, offset=1 )
+		self.assertEqual(len(limited), 2)
+		self.assertEqual([ cin.resourceID for cin in limited ], [ cin.resourceID for cin in cins[1:3] ])
+
+
+	def test_iterDiscover(self):
+		self.assertIsNotNone(TestDiscovery.ae)
+		cins = TestDiscovery.ae.discover( [UT.newTypeFilterCriteria(CON.Type_ContentInstance)] )
+		iterated = list(TestDiscovery.ae.iterDiscover( [UT.newTypeFilterCriteria(CON.Type_ContentInstance)], pageSize=3 ))
+		self.assertEqual(len(iterated), 4)
+		for cin in iterated:
+			self.assertIsInstance(cin, ContentInstance)
+		self.assertEqual([ cin.resourceID for cin in cins ], [ cin.resourceID for cin in iterated ])
+		iterated = list(TestDiscovery.ae.iterDiscover( [UT.newTypeFilterCriteria(CON.Type_ContentInstance)], pageSize=2 ))
+		self.assertEqual([ cin.resourceID for cin in cins ], [ cin.resourceID for cin in iterated ])
+
+
+	def test_discoverLevel(self):
+		self.assertIsNotNone(TestDiscovery.ae)
+		self.assertEqual(len(TestDiscovery.ae.discover( [UT.newTypeFilterCriteria(CON.Type_ContentInstance)], level=1 )), 0)
+		cins = TestDiscovery.ae.discover( [UT.newTypeFilterCriteria(CON.Type_ContentInstance)], level=2 )
+		self.assertEqual(len(cins), 4)
+		for cin in cins:
+			self.assertIsInstance(cin, ContentInstance)
+		cnts = TestDiscovery.ae.discover( [UT.newTypeFilterCriteria(CON.Type_Container)], level=1 )
+		self.assertEqual(len(cnts), 1)
+		self.assertEqual(cnts[0].resourceID, TestDiscovery.cnt.resourceID)
+
+
 	def test_finit(self):
 		self.assertIsNotNone(TestDiscovery.ae)
 		self.assertTrue(TestDiscovery.ae.deleteFromCSE())
@@ -138,6 +180,10 @@ if __name__ == '__main__':
 	suite.addTest(TestDiscovery('test_discoverLabel1'))
 	suite.addTest(TestDiscovery('test_discoverLabel2'))
 	suite.addTest(TestDiscovery('test_discoverLabel3'))
+	suite.addTest(TestDiscovery('test_discoverParallel'))
+	suite.addTest(TestDiscovery('test_discoverLimitOffset'))
+	suite.addTest(TestDiscovery('test_iterDiscover'))
+	suite.addTest(TestDiscovery('test_discoverLevel'))
 	suite.addTest(TestDiscovery('test_finit'))
 
 	unittest.TextTestRunner(verbosity=2, failfast=True).run(suite)
@@ -0,0 +1,95 @@
+#!/usr/local/bin/python3
+
+#
+#	test_localTransport.py
+#
+#	(c) 2018 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	Unit test for the in-process transport. The requests are passed to a handler function,
+#	which forwards them to the CSE at *host*.
+#
+
+import unittest
+import os, sys
+import requests
+sys.path.append('..')
+
+from onem2mlib import *
+import onem2mlib.constants as CON
+import onem2mlib.transport as TRN
+from conf import *
+
+
+class TestLocalTransport(unittest.TestCase):
+	session = None
+	cse = None
+	ae = None
+	requests = []
+
+
+	@classmethod
+	def setUpClass(cls):
+		TestLocalTransport.session = Session('http://localhost', originator, encoding, transport=TRN.LocalTransport(TestLocalTransport.handler))
+		TestLocalTransport.cse = CSEBase(TestLocalTransport.session, CSE_ID)
+		if TestLocalTransport.cse.findAE(AE_NAME):
+			print('*** AE with name "' + AE_NAME + '" already present in CSE. Please remove it first.')
+			exit()
+
+
+	@classmethod
+	def tearDownClass(cls):
+		if TestLocalTransport.ae:
+			TestLocalTransport.ae.deleteFromCSE()
+			TestLocalTransport.ae = None
+
+
+	# The handler of the transport. It records and forwards each request to the CSE.
+	def handler(method, path, headers, body):
+		TestLocalTransport.requests.append((method, path, headers))
+		response = requests.request(method, host + path, headers=headers, data=body)
+		return (response.status_code, response.content)
+
+
+	def test_init(self):
+		self.assertIsNotNone(TestLocalTransport.session)
+		self.assertIsInstance(TestLocalTransport.session.transport, TRN.LocalTransport)
+		self.assertIsNotNone(TestLocalTransport.cse)
+		self.assertEqual(TestLocalTransport.cse.resourceID, CSE_ID)
+		(method, path, headers) = TestLocalTransport.requests[0]
+		self.assertEqual(method, 'GET')
+		self.assertEqual(path, '/~/' + CSE_ID)
+		self.assertEqual(headers['X-M2M-Origin'], originator)
+
+
+	def test_createAE(self):
+		TestLocalTransport.ae = AE(TestLocalTransport.cse, resourceName=AE_NAME)
+		self.assertIsNotNone(TestLocalTransport.ae)
+		self.assertIsNotNone(TestLocalTransport.ae.resourceID)
+		self.assertEqual(TestLocalTransport.ae.resourceName, AE_NAME)
+		(method, path, headers) = TestLocalTransport.requests[-1]
+		self.assertEqual(method, 'POST')
+		self.assertTrue(headers['Content-Type'].endswith(';ty=' + str(CON.Type_AE)))
+
+
+	def test_addContent(self):
+		cnt = TestLocalTransport.ae.addContainer(CNT_NAME)
+		self.assertIsNotNone(cnt)
+		self.assertIsNotNone(cnt.addContent(CIN_CONTENT))
+		self.assertEqual(cnt.contentInstances()[0].content, CIN_CONTENT)
+
+
+	def test_finit(self):
+		self.assertIsNotNone(TestLocalTransport.ae)
+		self.assertTrue(TestLocalTransport.ae.deleteFromCSE())
+		TestLocalTransport.ae = None
+		self.assertEqual(TestLocalTransport.requests[-1][0], 'DELETE')
+
+
+if __name__ == '__main__':
+	suite = unittest.TestSuite()
+	suite.addTest(TestLocalTransport('test_init'))
+	suite.addTest(TestLocalTransport('test_createAE'))
+	suite.addTest(TestLocalTransport('test_addContent'))
+	suite.addTest(TestLocalTransport('test_finit'))
+	unittest.TextTestRunner(verbosity=2, failfast=True).run(suite)
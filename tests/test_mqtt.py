@@ -0,0 +1,129 @@
+#!/usr/local/bin/python3
+
+#
+#	test_mqtt.py
+#
+#	(c) 2018 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	Unit test for the MQTT transport. This requires an MQTT broker and a CSE that is
+#	connected to it, see *mhost*, as well as the paho-mqtt module.
+#
+
+import unittest
+import os, sys, time
+sys.path.append('..')
+
+from onem2mlib import *
+import onem2mlib.constants as CON
+import onem2mlib.exceptions as EXC
+import onem2mlib.notifications as NOT
+import onem2mlib.transport as TRN
+from conf import *
+
+
+class TestMQTT(unittest.TestCase):
+	session = None
+	cse = None
+	ae = None
+	cnt = None
+	callbackResource = None
+
+
+	@classmethod
+	def setUpClass(cls):
+		TestMQTT.session = Session(mhost, originator, encoding)
+		TestMQTT.cse = CSEBase(TestMQTT.session, CSE_ID)
+		if TestMQTT.cse.findAE(AE_NAME):
+			print('*** AE with name "' + AE_NAME + '" already present in CSE. Please remove it first.')
+			exit()
+
+
+	@classmethod
+	def tearDownClass(cls):
+		NOT.shutdownNotifications()
+		if TestMQTT.ae:
+			TestMQTT.ae.deleteFromCSE()
+			TestMQTT.ae = None
+
+
+	def test_init(self):
+		self.assertIsNotNone(TestMQTT.session)
+		self.assertIsInstance(TestMQTT.session.transport, TRN.MQTTTransport)
+		self.assertIsNotNone(TestMQTT.cse)
+		self.assertEqual(TestMQTT.cse.resourceID, CSE_ID)
+
+
+	def test_createAE(self):
+		TestMQTT.ae = AE(TestMQTT.cse, resourceName=AE_NAME)
+		self.assertIsNotNone(TestMQTT.ae)
+		self.assertIsNotNone(TestMQTT.ae.resourceID)
+		self.assertEqual(TestMQTT.ae.resourceName, AE_NAME)
+
+
+	def test_createContainer(self):
+		TestMQTT.cnt = TestMQTT.ae.addContainer(CNT_NAME)
+		self.assertIsNotNone(TestMQTT.cnt)
+		self.assertIsNotNone(TestMQTT.cnt.resourceID)
+
+
+	def test_discovery(self):
+		# the filter criteria are sent as part of the request primitive
+		cnts = TestMQTT.ae.containers()
+		self.assertEqual(len(cnts), 1)
+		self.assertEqual(cnts[0].resourceID, TestMQTT.cnt.resourceID)
+
+
+	def test_sharedConnection(self):
+		session = Session(mhost, originator, encoding)
+		self.assertIs(session.transport, TestMQTT.session.transport)
+		ae = CSEBase(session, CSE_ID).findAE(AE_NAME)
+		self.assertIsNotNone(ae)
+		self.assertEqual(ae.resourceID, TestMQTT.ae.resourceID)
+
+
+	def test_setupNotifications(self):
+		with self.assertRaises(EXC.ConfigurationError):
+			NOT.setupNotifications(None, server=CON.Sub_server_mqtt)
+		self.assertTrue(NOT.setupNotifications(None, server=CON.Sub_server_mqtt, session=TestMQTT.session))
+		self.assertTrue(NOT.getNotificationURI().startswith('mqtt://'))
+
+
+	# define a callback function
+	def callback(self, resource):
+		TestMQTT.callbackResource = resource
+
+
+	def test_notify(self):
+		self.assertTrue(TestMQTT.cnt.subscribe(self.callback))
+		cin = TestMQTT.cnt.addContent(CIN_CONTENT)
+		self.assertIsNotNone(cin)
+		time.sleep(delayInSec)
+		self.assertIsNotNone(TestMQTT.callbackResource)
+		self.assertEqual(TestMQTT.callbackResource.resourceID, cin.resourceID)
+		self.assertEqual(TestMQTT.callbackResource.content, CIN_CONTENT)
+
+
+	def test_shutdownNotifications(self):
+		NOT.shutdownNotifications()
+		self.assertIsNone(NOT.getNotificationURI())
+
+
+	def test_finit(self):
+		self.assertIsNotNone(TestMQTT.ae)
+		self.assertTrue(TestMQTT.ae.deleteFromCSE())
+		TestMQTT.ae = None
+
+
+if __name__ == '__main__':
+	suite = unittest.TestSuite()
+	suite.addTest(TestMQTT('test_init'))
+	suite.addTest(TestMQTT('test_createAE'))
+	suite.addTest(TestMQTT('test_createContainer'))
+	suite.addTest(TestMQTT('test_discovery'))
+	suite.addTest(TestMQTT('test_sharedConnection'))
+	suite.addTest(TestMQTT('test_setupNotifications'))
+	suite.addTest(TestMQTT('test_notify'))
+	suite.addTest(TestMQTT('test_shutdownNotifications'))
+	suite.addTest(TestMQTT('test_finit'))
+	unittest.TextTestRunner(verbosity=2, failfast=True).run(suite)
@@ -0,0 +1,211 @@
+#!/usr/local/bin/python3
+
+#
+#	test_mqttPrimitives.py
+#
+#	(c) 2018 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	Unit test for the request and response primitives and the topics of the MQTT transport.
+#	This doesn't require a broker or a CSE, but the paho-mqtt module. The broker connection
+#	is replaced by a client that answers the published requests itself.
+#
+
+import unittest
+import os, sys, threading
+sys.path.append('..')
+
+from onem2mlib import *
+import onem2mlib.constants as CON
+import onem2mlib.exceptions as EXC
+import onem2mlib.internal as INT
+import onem2mlib.transport as TRN
+from conf import *
+
+
+# A received MQTT message
+class Message:
+	def __init__(self, topic, payload):
+		self.topic = topic
+		self.payload = payload
+
+
+# A client in place of the broker connection. It records the published messages, and it
+# answers requests with a response primitive on the response topic, as a CSE would do.
+class StandInClient:
+
+	def __init__(self, transport, rsc=2000, content=b'{"m2m:cb":{"ri":"' + CSE_ID.encode() + b'"}}'):
+		self.transport = transport
+		self.rsc = rsc
+		self.content = content
+		self.published = []
+		self.subscribed = []
+
+
+	def subscribe(self, topic, qos=0):
+		self.subscribed.append(topic)
+
+
+	def unsubscribe(self, topic):
+		self.subscribed.remove(topic)
+
+
+	def publish(self, topic, payload, qos=0):
+		self.published.append((topic, payload))
+		elements = topic.split('/')
+		if elements[2] != 'req':
+			return
+		encoding = TRN._MQTT_ENCODINGS[elements[5]]
+		(request, _) = TRN._decodePrimitive(payload, encoding)
+		response = TRN._encodePrimitive(TRN._responsePrimitive(request, self.rsc), self.content, encoding, 'rsp')
+		message = Message('/oneM2M/resp/' + elements[3] + '/' + elements[4] + '/' + elements[5], response)
+		threading.Thread(target=self.transport._onMessage, args=(self, None, message)).start()
+
+
+class TestMQTTPrimitives(unittest.TestCase):
+
+
+	@classmethod
+	def setUpClass(cls):
+		try:
+			TestMQTTPrimitives.transport = TRN.MQTTTransport()
+		except EXC.NotSupportedError:
+			raise unittest.SkipTest('The paho-mqtt module is not installed')
+
+
+	def newSession(self, encoding=CON.Encoding_JSON, **kwargs):
+		TestMQTTPrimitives.transport._client = StandInClient(TestMQTTPrimitives.transport, **kwargs)
+		TestMQTTPrimitives.transport._topics.clear()
+		return Session('mqtt://localhost:1883/' + CSE_ID, '/' + CSE_ID + '/CAE1', encoding, transport=TestMQTTPrimitives.transport)
+
+
+	def test_requestPrimitive(self):
+		session = Session('mqtt://localhost:1883/' + CSE_ID, originator, encoding, transport=TestMQTTPrimitives.transport)
+		primitive = TRN._requestPrimitive(session, 'GET', CSE_ID + '?fu=1&drt=2&ty=4&lbl=a&lbl=b')
+		self.assertEqual(primitive['op'], 2)
+		self.assertEqual(primitive['to'], '/' + CSE_ID)
+		self.assertEqual(primitive['fr'], originator)
+		self.assertEqual(primitive['drt'], 2)
+		self.assertEqual(primitive['fc'], { 'fu' : 1, 'ty' : 4, 'lbl' : [ 'a', 'b' ] })
+		self.assertEqual(len(primitive['rqi']), 16)
+		primitive = TRN._requestPrimitive(session, 'POST', '/' + CSE_ID, CON.Type_AE)
+		self.assertEqual(primitive['op'], 1)
+		self.assertEqual(primitive['ty'], CON.Type_AE)
+		self.assertNotIn('ty', TRN._requestPrimitive(session, 'PUT', CSE_ID, CON.Type_AE))
+
+
+	def test_primitiveStatus(self):
+		self.assertEqual(TRN._primitiveStatus(2000), 200)
+		self.assertEqual(TRN._primitiveStatus(2001), 201)
+		self.assertEqual(TRN._primitiveStatus(2002), 200)
+		self.assertEqual(TRN._primitiveStatus(4004), 404)
+		self.assertEqual(TRN._primitiveStatus(4000), 400)
+		self.assertEqual(TRN._primitiveStatus(5000), 500)
+		self.assertEqual(TRN._primitiveStatus(None), 500)
+
+
+	def test_encodeDecodeJSON(self):
+		primitive = { 'op' : 1, 'to' : '/' + CSE_ID, 'fr' : originator, 'rqi' : '1234', 'ty' : 2 }
+		data = TRN._encodePrimitive(primitive, b'{"m2m:ae":{"rn":"x"}}', CON.Encoding_JSON, 'rqp')
+		self.assertEqual(INT.decodeJSON(data)['pc'], { 'm2m:ae' : { 'rn' : 'x' } })
+		(decoded, content) = TRN._decodePrimitive(data, CON.Encoding_JSON)
+		self.assertEqual(decoded, primitive)
+		self.assertEqual(INT.decodeJSON(content), { 'm2m:ae' : { 'rn' : 'x' } })
+		# a primitive that is wrapped in m2m:rsp, and without content
+		(decoded, content) = TRN._decodePrimitive(b'{"m2m:rsp":{"rsc":2000,"rqi":"1234"}}', CON.Encoding_JSON)
+		self.assertEqual(decoded, { 'rsc' : 2000, 'rqi' : '1234' })
+		self.assertEqual(content, b'')
+
+
+	def test_encodeDecodeXML(self):
+		primitive = { 'op' : 2, 'to' : '/' + CSE_ID, 'fr' : originator, 'rqi' : '1234', 'fc' : { 'lbl' : [ 'a', 'b' ] } }
+		data = TRN._encodePrimitive(primitive, b'<m2m:ae xmlns:m2m="http://www.onem2m.org/xml/protocols"><rn>x</rn></m2m:ae>', CON.Encoding_XML, 'rqp')
+		self.assertIn(b'<fc><lbl>a b</lbl></fc>', data)
+		(decoded, content) = TRN._decodePrimitive(data, CON.Encoding_XML)
+		self.assertEqual(decoded['op'], '2')
+		self.assertEqual(decoded['rqi'], '1234')
+		self.assertIn(b'<rn>x</rn>', content)
+
+
+	def test_encodeDecodeCBOR(self):
+		if INT.cbor2 is None:
+			self.skipTest('The cbor2 module is not installed')
+		primitive = { 'rsc' : 2000, 'rqi' : '1234', 'to' : originator, 'fr' : '/' + CSE_ID }
+		content = INT.encodeJSON({ 'm2m:cin' : { 'con' : b'\x00\x01' } }, CON.Encoding_CBOR)
+		data = TRN._encodePrimitive(primitive, content, CON.Encoding_CBOR, 'rsp')
+		(decoded, decodedContent) = TRN._decodePrimitive(data, CON.Encoding_CBOR)
+		self.assertEqual(decoded, primitive)
+		self.assertEqual(INT.decodeJSON(decodedContent, CON.Encoding_CBOR), { 'm2m:cin' : { 'con' : b'\x00\x01' } })
+
+
+	def test_topicIDs(self):
+		self.assertEqual(TRN._mqttID('/' + CSE_ID + '/CAE1'), CSE_ID + ':CAE1')
+		self.assertEqual(TRN._mqttID('CAE1'), 'CAE1')
+		self.assertEqual(TRN._mqttFormat(CON.Encoding_JSON), 'json')
+		self.assertEqual(TRN._mqttFormat(CON.Encoding_XML), 'xml')
+		self.assertEqual(TRN._mqttFormat(CON.Encoding_CBOR), 'cbor')
+		session = self.newSession()
+		self.assertEqual(TestMQTTPrimitives.transport._uri(session), 'mqtt://localhost:1883/' + CSE_ID + ':CAE1')
+
+
+	def test_request(self):
+		session = self.newSession()
+		response = TestMQTTPrimitives.transport.request(session, 'GET', CSE_ID)
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response.json(), { 'm2m:cb' : { 'ri' : CSE_ID } })
+		client = TestMQTTPrimitives.transport._client
+		self.assertEqual(client.subscribed, [ '/oneM2M/resp/' + CSE_ID + ':CAE1/' + CSE_ID + '/json' ])
+		self.assertEqual(client.published[0][0], '/oneM2M/req/' + CSE_ID + ':CAE1/' + CSE_ID + '/json')
+		# the response topic is only subscribed once
+		self.assertEqual(TestMQTTPrimitives.transport.request(session, 'DELETE', CSE_ID).status_code, 200)
+		self.assertEqual(len(client.subscribed), 1)
+
+
+	def test_requestError(self):
+		session = self.newSession(CON.Encoding_XML, rsc=4004, content=None)
+		response = TestMQTTPrimitives.transport.request(session, 'GET', CSE_ID + '/unknown')
+		self.assertEqual(response.status_code, 404)
+		self.assertEqual(TestMQTTPrimitives.transport._client.published[0][0], '/oneM2M/req/' + CSE_ID + ':CAE1/' + CSE_ID + '/xml')
+
+
+	def test_requestHandler(self):
+		session = self.newSession()
+		received = []
+		def handler(contentType, content, requestID):
+			received.append((contentType, content, requestID))
+			return 2000
+		TestMQTTPrimitives.transport._addRequestHandler(session, handler)
+		client = TestMQTTPrimitives.transport._client
+		self.assertEqual(client.subscribed, [ '/oneM2M/req/+/' + CSE_ID + ':CAE1/+' ])
+		# a notification from the CSE to the originator of the session
+		request = { 'op' : 5, 'to' : '/' + CSE_ID + '/CAE1', 'fr' : '/' + CSE_ID, 'rqi' : 'ntf1' }
+		data = TRN._encodePrimitive(request, b'{"m2m:sgn":{"sur":"sub"}}', CON.Encoding_JSON, 'rqp')
+		TestMQTTPrimitives.transport._onMessage(client, None, Message('/oneM2M/req/' + CSE_ID + '/' + CSE_ID + ':CAE1/json', data))
+		self.assertEqual(len(received), 1)
+		self.assertEqual(received[0][0], 'application/json')
+		self.assertEqual(INT.decodeJSON(received[0][1]), { 'm2m:sgn' : { 'sur' : 'sub' } })
+		self.assertEqual(received[0][2], 'ntf1')
+		# the response is published on the response topic of the CSE
+		(topic, payload) = client.published[0]
+		self.assertEqual(topic, '/oneM2M/resp/' + CSE_ID + '/' + CSE_ID + ':CAE1/json')
+		(response, _) = TRN._decodePrimitive(payload, CON.Encoding_JSON)
+		self.assertEqual(response['rsc'], 2000)
+		self.assertEqual(response['rqi'], 'ntf1')
+		TestMQTTPrimitives.transport._removeRequestHandler(session)
+		self.assertEqual(client.subscribed, [])
+		self.assertNotIn('/oneM2M/req/+/' + CSE_ID + ':CAE1/+', TestMQTTPrimitives.transport._topics)
+
+
+if __name__ == '__main__':
+	suite = unittest.TestSuite()
+	suite.addTest(TestMQTTPrimitives('test_requestPrimitive'))
+	suite.addTest(TestMQTTPrimitives('test_primitiveStatus'))
+	suite.addTest(TestMQTTPrimitives('test_encodeDecodeJSON'))
+	suite.addTest(TestMQTTPrimitives('test_encodeDecodeXML'))
+	suite.addTest(TestMQTTPrimitives('test_encodeDecodeCBOR'))
+	suite.addTest(TestMQTTPrimitives('test_topicIDs'))
+	suite.addTest(TestMQTTPrimitives('test_request'))
+	suite.addTest(TestMQTTPrimitives('test_requestError'))
+	suite.addTest(TestMQTTPrimitives('test_requestHandler'))
+
+	unittest.TextTestRunner(verbosity=2, failfast=True).run(suite)
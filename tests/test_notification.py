@@ -10,7 +10,8 @@
 #
 
 import unittest
-import os, sys, time
+import os, sys, time, tempfile, threading
+import requests
 sys.path.append('..')
 
 from onem2mlib import *
@@ -29,6 +30,7 @@ class TestNotification(unittest.TestCase):
 	cin = None
 
 	callbackResource = None
+	callbackResources = None
 
 
 	@classmethod
@@ -93,6 +95,114 @@ class TestNotification(unittest.TestCase):
 		self.assertIsNotNone(TestNotification.callbackResource)
 		self.assertEqual(TestNotification.callbackResource.resourceID, TestNotification.cin.resourceID)
 		self.assertEqual(TestNotification.callbackResource.content, CIN_CONTENT)
+		self.assertIsInstance(TestNotification.callbackResource, ContentInstance)
+
+
+	def test_notificationStatistics(self):
+		statistics = NOT.getNotificationStatistics()
+		self.assertGreaterEqual(statistics['processed'], 1)
+		self.assertEqual(statistics['queued'], 0)
+		self.assertEqual(statistics['rejected'], 0)
+		self.assertEqual(statistics['errors'], 0)
+
+
+	def test_notifyUnknownSubscription(self):
+		# send a notification for a subscription that is not known
+		dropped = NOT.getNotificationStatistics()['dropped']
+		TestNotification.callbackResource = None
+		notification = { 'm2m:sgn' : { 'sur' : '/unknown/subscription', 'nev' : { 'rep' : { 'm2m:cin' : { 'ty' : CON.Type_ContentInstance, 'ri' : 'unknown', 'con' : CIN_CONTENT } }, 'net' : 3 } } }
+		response = requests.post(NOT.getNotificationURI(), json=notification)
+		self.assertEqual(response.status_code, 200)
+		time.sleep(delayInSec)
+		self.assertIsNone(TestNotification.callbackResource)
+		self.assertEqual(NOT.getNotificationStatistics()['dropped'], dropped + 1)
+
+
+	def test_notifyDuplicate(self):
+		# send the same notification twice with the same request identifier
+		statistics = NOT.getNotificationStatistics()
+		notification = { 'm2m:sgn' : { 'sur' : '/unknown/subscription', 'nev' : { 'rep' : { 'm2m:cin' : { 'ty' : CON.Type_ContentInstance, 'ri' : 'unknown', 'con' : CIN_CONTENT } }, 'net' : 3 } } }
+		for i in range(2):
+			response = requests.post(NOT.getNotificationURI(), json=notification, headers={ 'X-M2M-RI' : 'duplicate' })
+			self.assertEqual(response.status_code, 200)
+		time.sleep(delayInSec)
+		self.assertEqual(NOT.getNotificationStatistics()['dropped'], statistics['dropped'] + 1)
+		self.assertEqual(NOT.getNotificationStatistics()['duplicates'], statistics['duplicates'] + 1)
+
+
+	# define a batch callback function
+	def batchCallback(self, resources):
+		TestNotification.callbackResources = resources
+
+
+	def test_subscribeBatch(self):
+		# replace the subscription with one that batches notifications
+		self.assertTrue(NOT.removeSubscription(TestNotification.cnt))
+		self.assertTrue(TestNotification.cnt.subscribe(batchNotify=BatchNotify(2, 'PT10S'), batchCallback=self.batchCallback))
+		sub = NOT._subscriptions[TestNotification.cnt.resourceID].subscription
+		self.assertIsNotNone(sub.batchNotify)
+		self.assertEqual(sub.batchNotify.number, 2)
+
+
+	def test_notifyBatch(self):
+		# create two new contentInstances to trigger a batch notification
+		cin1 = TestNotification.cnt.addContent(CIN_CONTENT)
+		cin2 = TestNotification.cnt.addContent(CIN_CONTENT)
+		self.assertIsNotNone(cin1)
+		self.assertIsNotNone(cin2)
+		# Wait a moment
+		time.sleep(delayInSec)
+		# and check whether the batch callback happened
+		self.assertIsNotNone(TestNotification.callbackResources)
+		self.assertEqual([ r.resourceID for r in TestNotification.callbackResources ], [ cin1.resourceID, cin2.resourceID ])
+
+
+	def test_addRemoveSubscriptions(self):
+		cnts = [ Container(TestNotification.ae) for i in range(5) ]
+		self.assertEqual(NOT.addSubscriptions(cnts, workers=3, callback=self.callback), [ True ] * 5)
+		for cnt in cnts:
+			self.assertTrue(NOT.hasSubscription(cnt))
+		self.assertEqual(NOT.removeSubscriptions(cnts, workers=3, timeout=delayInSec*10), [ True ] * 5)
+		for cnt in cnts:
+			self.assertFalse(NOT.hasSubscription(cnt))
+			self.assertTrue(cnt.deleteFromCSE())
+
+
+	def test_notifyCoalesced(self):
+		# restart the notification sub-module with a coalesce window
+		NOT.shutdownNotifications()
+		self.assertTrue(NOT.setupNotifications(None, NOT_HOST, NOT_PORT, coalesceWindow=delayInSec/2))
+		TestNotification.callbackResources = []
+		self.assertTrue(TestNotification.cnt.subscribe(lambda resource: TestNotification.callbackResources.append(resource)))
+		# create a burst of new contentInstances to trigger the notifications
+		for i in range(5):
+			TestNotification.cin = TestNotification.cnt.addContent(CIN_CONTENT)
+			self.assertIsNotNone(TestNotification.cin)
+		# Wait a moment
+		time.sleep(delayInSec)
+		# and check that only the latest notification was passed to the callback
+		self.assertEqual(len(TestNotification.callbackResources), 1)
+		self.assertEqual(TestNotification.callbackResources[0].resourceID, TestNotification.cin.resourceID)
+		self.assertEqual(NOT.getNotificationStatistics()['coalesced'], 4)
+
+
+	def test_notifyCoalescedFull(self):
+		# restart the notification sub-module with a coalesce window, a single worker and a small queue
+		NOT.shutdownNotifications()
+		self.assertTrue(NOT.setupNotifications(None, NOT_HOST, NOT_PORT, workers=1, queueSize=1, coalesceWindow=delayInSec/4))
+		event = threading.Event()
+		self.assertTrue(TestNotification.cnt.subscribe(lambda resource: event.wait()))
+		# block the worker, and fill the queue
+		for i in range(2):
+			self.assertIsNotNone(TestNotification.cnt.addContent(CIN_CONTENT))
+			time.sleep(delayInSec/2)
+		# one more notification must be rejected, so that the CSE may send it again
+		sur = NOT._subscriptions[TestNotification.cnt.resourceID].subscription.resourceID
+		notification = { 'm2m:sgn' : { 'sur' : sur, 'nev' : { 'rep' : { 'm2m:cin' : { 'ty' : CON.Type_ContentInstance, 'ri' : 'full', 'con' : CIN_CONTENT } }, 'net' : 3 } } }
+		response = requests.post(NOT.getNotificationURI(), json=notification)
+		self.assertEqual(response.status_code, 503)
+		self.assertEqual(NOT.getNotificationStatistics()['rejected'], 1)
+		event.set()
 
 
 	def test_notifyFail(self):
@@ -116,6 +226,143 @@ class TestNotification(unittest.TestCase):
 		self.assertTrue(NOT.removeSubscription(TestNotification.cnt))
 
 
+	def test_shutdownTimeout(self):
+		# restart the notification sub-module with a single worker and a small queue
+		NOT.shutdownNotifications()
+		self.assertTrue(NOT.setupNotifications(None, NOT_HOST, NOT_PORT, workers=1, queueSize=1))
+		event = threading.Event()
+		self.assertTrue(TestNotification.cnt.subscribe(lambda resource: event.wait()))
+		# block the worker with one notification, and fill the queue with another one
+		for i in range(2):
+			self.assertIsNotNone(TestNotification.cnt.addContent(CIN_CONTENT))
+		time.sleep(delayInSec)
+		# the shutdown must not wait for the blocked callback longer than the timeout
+		start = time.monotonic()
+		NOT.shutdownNotifications(timeout=delayInSec)
+		self.assertLess(time.monotonic() - start, delayInSec * 3)
+		event.set()
+
+
+	def test_subscriptionRegistry(self):
+		registry = os.path.join(tempfile.mkdtemp(), 'subscriptions.db')
+		NOT.shutdownNotifications()
+		self.assertTrue(NOT.setupNotifications(None, NOT_HOST, NOT_PORT, registry=registry))
+		self.assertTrue(TestNotification.cnt.subscribe())
+		subscriptionID = NOT._subscriptions[TestNotification.cnt.resourceID].subscription.resourceID
+		NOT.shutdownNotifications(keepSubscriptions=True)
+		# "restart" and subscribe again. This should re-attach to the same subscription
+		self.assertTrue(NOT.setupNotifications(None, NOT_HOST, NOT_PORT, registry=registry))
+		self.assertTrue(TestNotification.cnt.subscribe())
+		self.assertEqual(NOT._subscriptions[TestNotification.cnt.resourceID].subscription.resourceID, subscriptionID)
+		self.assertEqual(NOT.removeOrphanedSubscriptions(TestNotification.session), 0)
+		# "restart" and subscribe with different attributes. This should replace the subscription
+		NOT.shutdownNotifications(keepSubscriptions=True)
+		self.assertTrue(NOT.setupNotifications(None, NOT_HOST, NOT_PORT, registry=registry))
+		self.assertTrue(TestNotification.cnt.subscribe(batchNotify=BatchNotify(2, 'PT10S')))
+		self.assertNotEqual(NOT._subscriptions[TestNotification.cnt.resourceID].subscription.resourceID, subscriptionID)
+		self.assertEqual(len(TestNotification.cnt.subscriptions()), 1)
+		self.assertEqual(NOT.removeOrphanedSubscriptions(TestNotification.session), 0)
+		self.assertTrue(TestNotification.cnt.unsubscribe())
+		self.assertEqual(len(TestNotification.cnt.subscriptions()), 0)
+		# a subscription with attributes that the CSE may set to their defaults should be re-attached
+		sub = Subscription(TestNotification.cnt, notificationURI=[ NOT.getNotificationURI() ], latestNotify=False, eventNotificationCriteria=EventNotificationCriteria([ CON.Sub_net_updateResource ]))
+		self.assertIsNotNone(sub.resourceID)
+		NOT._registry.put(TestNotification.cnt.resourceID, sub.resourceID, NOT.getNotificationURI())
+		NOT.shutdownNotifications(keepSubscriptions=True)
+		self.assertTrue(NOT.setupNotifications(None, NOT_HOST, NOT_PORT, registry=registry))
+		self.assertTrue(TestNotification.cnt.subscribe())
+		self.assertEqual(NOT._subscriptions[TestNotification.cnt.resourceID].subscription.resourceID, sub.resourceID)
+		self.assertTrue(TestNotification.cnt.unsubscribe())
+		self.assertEqual(len(TestNotification.cnt.subscriptions()), 0)
+
+
+	# define a coroutine callback function
+	async def asyncCallback(self, resource):
+		TestNotification.callbackResource = resource
+
+
+	def test_notifyAsyncServer(self):
+		# restart the notification sub-module with the asyncio based server
+		NOT.shutdownNotifications()
+		self.assertTrue(NOT.setupNotifications(None, NOT_HOST, NOT_PORT, server=CON.Sub_server_asyncio))
+		TestNotification.callbackResource = None
+		self.assertTrue(TestNotification.cnt.subscribe(self.asyncCallback))
+		TestNotification.cin = TestNotification.cnt.addContent(CIN_CONTENT)
+		self.assertIsNotNone(TestNotification.cin)
+		# Wait a moment
+		time.sleep(delayInSec)
+		# and check whether the callback happened
+		self.assertIsNotNone(TestNotification.callbackResource)
+		self.assertEqual(TestNotification.callbackResource.resourceID, TestNotification.cin.resourceID)
+		self.assertTrue(TestNotification.cnt.unsubscribe())
+
+
+	def test_notifyMultiProcess(self):
+		# restart the notification sub-module with multiple receiver processes
+		NOT.shutdownNotifications()
+		try:
+			self.assertTrue(NOT.setupNotifications(None, NOT_HOST, NOT_PORT, processes=2))
+		except EXC.NotSupportedError:
+			self.skipTest('Multiple receiver processes are not supported on this platform')
+		TestNotification.callbackResource = None
+		self.assertTrue(TestNotification.cnt.subscribe(self.callback))
+		TestNotification.cin = TestNotification.cnt.addContent(CIN_CONTENT)
+		self.assertIsNotNone(TestNotification.cin)
+		# Wait a moment
+		time.sleep(delayInSec)
+		# and check whether the callback happened in this process
+		self.assertIsNotNone(TestNotification.callbackResource)
+		self.assertEqual(TestNotification.callbackResource.resourceID, TestNotification.cin.resourceID)
+		self.assertTrue(TestNotification.cnt.unsubscribe())
+
+
+	def test_notifyMultiProcessFull(self):
+		# restart the notification sub-module with receiver processes, a single worker and small queues
+		NOT.shutdownNotifications()
+		try:
+			self.assertTrue(NOT.setupNotifications(None, NOT_HOST, NOT_PORT, workers=1, queueSize=1, processes=2))
+		except EXC.NotSupportedError:
+			self.skipTest('Multiple receiver processes are not supported on this platform')
+		event = threading.Event()
+		self.assertTrue(TestNotification.cnt.subscribe(lambda resource: event.wait()))
+		sur = NOT._subscriptions[TestNotification.cnt.resourceID].subscription.resourceID
+		notification = { 'm2m:sgn' : { 'sur' : sur, 'nev' : { 'rep' : { 'm2m:cin' : { 'ty' : CON.Type_ContentInstance, 'ri' : 'full', 'con' : CIN_CONTENT } }, 'net' : 3 } } }
+		# block the worker and fill the queues, until the receivers reject a notification
+		statusCodes = []
+		for i in range(6):
+			statusCodes.append(requests.post(NOT.getNotificationURI(), json=notification).status_code)
+			time.sleep(delayInSec/4)
+		event.set()
+		self.assertIn(503, statusCodes)
+		self.assertEqual(statusCodes[0], 200)
+		self.assertTrue(TestNotification.cnt.unsubscribe())
+
+
+	def test_shutdownMultiProcessTimeout(self):
+		# restart the notification sub-module with receiver processes, a single worker and small queues
+		NOT.shutdownNotifications()
+		try:
+			self.assertTrue(NOT.setupNotifications(None, NOT_HOST, NOT_PORT, workers=1, queueSize=1, processes=2))
+		except EXC.NotSupportedError:
+			self.skipTest('Multiple receiver processes are not supported on this platform')
+		event = threading.Event()
+		self.assertTrue(TestNotification.cnt.subscribe(lambda resource: event.wait()))
+		sur = NOT._subscriptions[TestNotification.cnt.resourceID].subscription.resourceID
+		notification = { 'm2m:sgn' : { 'sur' : sur, 'nev' : { 'rep' : { 'm2m:cin' : { 'ty' : CON.Type_ContentInstance, 'ri' : 'full', 'con' : CIN_CONTENT } }, 'net' : 3 } } }
+		# block the worker and fill the queues, so that the server waits for a free slot
+		for i in range(4):
+			requests.post(NOT.getNotificationURI(), json=notification)
+			time.sleep(delayInSec/4)
+		# the shutdown must not wait for the blocked callback longer than the timeout
+		timer = threading.Timer(delayInSec * 5, event.set)		# release a hanging shutdown
+		timer.start()
+		start = time.monotonic()
+		NOT.shutdownNotifications(timeout=delayInSec)
+		self.assertLess(time.monotonic() - start, delayInSec * 3)
+		event.set()
+		timer.cancel()
+
+
 	def test_finit(self):
 		self.assertIsNotNone(TestNotification.ae)
 		self.assertTrue(TestNotification.ae.deleteFromCSE())
@@ -129,8 +376,22 @@ if __name__ == '__main__':
 	suite.addTest(TestNotification('test_addSubscription'))
 	suite.addTest(TestNotification('test_hasSubscription'))
 	suite.addTest(TestNotification('test_notify'))
+	suite.addTest(TestNotification('test_notificationStatistics'))
+	suite.addTest(TestNotification('test_notifyUnknownSubscription'))
+	suite.addTest(TestNotification('test_notifyDuplicate'))
+	suite.addTest(TestNotification('test_subscribeBatch'))
+	suite.addTest(TestNotification('test_notifyBatch'))
 	suite.addTest(TestNotification('test_removeSubscription'))
 	suite.addTest(TestNotification('test_notifyFail')) 
+	suite.addTest(TestNotification('test_addRemoveSubscriptions'))
+	suite.addTest(TestNotification('test_notifyCoalesced'))
+	suite.addTest(TestNotification('test_notifyCoalescedFull'))
+	suite.addTest(TestNotification('test_shutdownTimeout'))
+	suite.addTest(TestNotification('test_subscriptionRegistry'))
+	suite.addTest(TestNotification('test_notifyAsyncServer'))
+	suite.addTest(TestNotification('test_notifyMultiProcess'))
+	suite.addTest(TestNotification('test_notifyMultiProcessFull'))
+	suite.addTest(TestNotification('test_shutdownMultiProcessTimeout'))
 	suite.addTest(TestNotification('test_finit'))
 
 	unittest.TextTestRunner(verbosity=2, failfast=True).run(suite)
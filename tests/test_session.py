@@ -35,8 +35,23 @@ class TestSession(unittest.TestCase):
 		self.assertIsNotNone(cse)
 
 
+	def test_connectionPool(self):
+		session = Session(host, originator, encoding, poolSize=2, maxConnectionsPerHost=4, idleTimeout=30)
+		self.assertEqual(session.poolSize, 2)
+		self.assertEqual(session.maxConnectionsPerHost, 4)
+		self.assertEqual(session.idleTimeout, 30)
+		self.assertIsNotNone(CSEBase(session, CSE_ID))
+		connection = session._connection
+		self.assertIsNotNone(connection)
+		self.assertIsNotNone(CSEBase(session, CSE_ID))
+		self.assertIs(session._connection, connection)	# the connection is re-used
+		session.close()
+		self.assertIsNone(session._connection)
+
+
 if __name__ == '__main__':
 	suite = unittest.TestSuite()
 	suite.addTest(TestSession('test_init'))
 	suite.addTest(TestSession('test_connect'))
+	suite.addTest(TestSession('test_connectionPool'))
 	unittest.TextTestRunner(verbosity=2, failfast=True).run(suite)
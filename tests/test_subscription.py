@@ -129,6 +129,29 @@ class TestSubscription(unittest.TestCase):
 		self.assertTrue(grp.deleteFromCSE())
 
 
+	def test_subscriptionRateLimit(self):
+		sub = Subscription(TestSubscription.cnt, notificationURI=[NOT_NU], rateLimit=RateLimit(5, 'PT1S'), latestNotify=True, pendingNotification=CON.Sub_pn_sendLatest)
+		self.assertIsNotNone(sub)
+		sub = Subscription(TestSubscription.cse, resourceID=sub.resourceID)
+		self.assertIsNotNone(sub.rateLimit)
+		self.assertEqual(sub.rateLimit.maxNrOfNotify, 5)
+		self.assertEqual(sub.rateLimit.timeWindow, 'PT1S')
+		self.assertTrue(sub.latestNotify)
+		self.assertEqual(sub.pendingNotification, CON.Sub_pn_sendLatest)
+		self.assertTrue(sub.deleteFromCSE())
+
+
+	def test_subscriptionEventNotificationCriteria(self):
+		enc = EventNotificationCriteria([ CON.Sub_net_createDirectChild, CON.Sub_net_deleteDirectChild ], attribute=[ 'lbl' ])
+		sub = Subscription(TestSubscription.cnt, notificationURI=[NOT_NU], eventNotificationCriteria=enc)
+		self.assertIsNotNone(sub)
+		sub = Subscription(TestSubscription.cse, resourceID=sub.resourceID)
+		self.assertIsNotNone(sub.eventNotificationCriteria)
+		self.assertEqual(sub.eventNotificationCriteria.notificationEventType, [ CON.Sub_net_createDirectChild, CON.Sub_net_deleteDirectChild ])
+		self.assertEqual(sub.eventNotificationCriteria.attribute, [ 'lbl' ])
+		self.assertTrue(sub.deleteFromCSE())
+
+
 	def test_subscriptionContentInstance(self):
 		self.assertIsNotNone(TestSubscription.cnt.addContent(CIN_CONTENT))
 		cin = TestSubscription.cnt.latestContentInstance()
@@ -154,6 +177,8 @@ if __name__ == '__main__':
 	suite.addTest(TestSubscription('test_subscriptionCSE'))
 	suite.addTest(TestSubscription('test_subscriptionAE'))
 	suite.addTest(TestSubscription('test_subscriptionGroup'))
+	suite.addTest(TestSubscription('test_subscriptionRateLimit'))
+	suite.addTest(TestSubscription('test_subscriptionEventNotificationCriteria'))
 	suite.addTest(TestSubscription('test_subscriptionContentInstance'))
 	suite.addTest(TestSubscription('test_finit'))
 
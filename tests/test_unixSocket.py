@@ -0,0 +1,104 @@
+#!/usr/local/bin/python3
+
+#
+#	test_unixSocket.py
+#
+#	(c) 2018 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	Unit test for the http transport over a Unix domain socket. This requires a CSE that
+#	listens on the socket in *uhost*.
+#
+
+import unittest
+import os, sys
+sys.path.append('..')
+
+from onem2mlib import *
+import onem2mlib.constants as CON
+import onem2mlib.exceptions as EXC
+import onem2mlib.transport as TRN
+from conf import *
+
+
+class TestUnixSocket(unittest.TestCase):
+	session = None
+	cse = None
+	ae = None
+	cnt = None
+
+
+	@classmethod
+	def setUpClass(cls):
+		TestUnixSocket.session = Session(uhost, originator, encoding)
+		TestUnixSocket.cse = CSEBase(TestUnixSocket.session, CSE_ID)
+		if TestUnixSocket.cse.findAE(AE_NAME):
+			print('*** AE with name "' + AE_NAME + '" already present in CSE. Please remove it first.')
+			exit()
+
+
+	@classmethod
+	def tearDownClass(cls):
+		if TestUnixSocket.ae:
+			TestUnixSocket.ae.deleteFromCSE()
+			TestUnixSocket.ae = None
+
+
+	def test_init(self):
+		self.assertIsNotNone(TestUnixSocket.session)
+		self.assertIsInstance(TestUnixSocket.session.transport, TRN.UnixSocketTransport)
+		self.assertIsNotNone(TestUnixSocket.cse)
+		self.assertEqual(TestUnixSocket.cse.resourceID, CSE_ID)
+
+
+	def test_createAE(self):
+		TestUnixSocket.ae = AE(TestUnixSocket.cse, resourceName=AE_NAME)
+		self.assertIsNotNone(TestUnixSocket.ae)
+		self.assertIsNotNone(TestUnixSocket.ae.resourceID)
+		self.assertEqual(TestUnixSocket.ae.resourceName, AE_NAME)
+
+
+	def test_createContainer(self):
+		TestUnixSocket.cnt = TestUnixSocket.ae.addContainer(CNT_NAME)
+		self.assertIsNotNone(TestUnixSocket.cnt)
+		self.assertIsNotNone(TestUnixSocket.cnt.resourceID)
+
+
+	def test_addContent(self):
+		cin = TestUnixSocket.cnt.addContent(CIN_CONTENT)
+		self.assertIsNotNone(cin)
+		cins = TestUnixSocket.cnt.contentInstances()
+		self.assertEqual(len(cins), 1)
+		self.assertEqual(cins[0].content, CIN_CONTENT)
+
+
+	def test_keepAlive(self):
+		# the connection is kept for the next request
+		self.assertGreaterEqual(len(TestUnixSocket.session.transport._connections), 1)
+		self.assertIsNotNone(TestUnixSocket.cse.findAE(AE_NAME))
+		TestUnixSocket.session.close()
+		self.assertEqual(len(TestUnixSocket.session.transport._connections), 0)
+		self.assertIsNotNone(TestUnixSocket.cse.findAE(AE_NAME))
+
+
+	def test_missingSocket(self):
+		with self.assertRaises(EXC.CSEOperationError):
+			CSEBase(Session('http+unix://%2Fnonexistent%2Fmn-cse.sock', originator, encoding), CSE_ID)
+
+
+	def test_finit(self):
+		self.assertIsNotNone(TestUnixSocket.ae)
+		self.assertTrue(TestUnixSocket.ae.deleteFromCSE())
+		TestUnixSocket.ae = None
+
+
+if __name__ == '__main__':
+	suite = unittest.TestSuite()
+	suite.addTest(TestUnixSocket('test_init'))
+	suite.addTest(TestUnixSocket('test_createAE'))
+	suite.addTest(TestUnixSocket('test_createContainer'))
+	suite.addTest(TestUnixSocket('test_addContent'))
+	suite.addTest(TestUnixSocket('test_keepAlive'))
+	suite.addTest(TestUnixSocket('test_missingSocket'))
+	suite.addTest(TestUnixSocket('test_finit'))
+	unittest.TextTestRunner(verbosity=2, failfast=True).run(suite)
@@ -0,0 +1,169 @@
+#!/usr/local/bin/python3
+
+#
+#	test_websocket.py
+#
+#	(c) 2018 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	Unit test for the WebSocket transport. This requires a CSE that supports WebSocket at *whost*,
+#	and http at *host*.
+#
+
+import unittest
+import os, sys, time, threading
+sys.path.append('..')
+
+from onem2mlib import *
+import onem2mlib.constants as CON
+import onem2mlib.exceptions as EXC
+import onem2mlib.notifications as NOT
+import onem2mlib.transport as TRN
+from conf import *
+
+
+class TestWebSocket(unittest.TestCase):
+	session = None
+	cse = None
+	ae = None
+	cnt = None
+	callbackResource = None
+
+
+	@classmethod
+	def setUpClass(cls):
+		TestWebSocket.session = Session(whost, originator, encoding)
+		TestWebSocket.cse = CSEBase(TestWebSocket.session, CSE_ID)
+		if TestWebSocket.cse.findAE(AE_NAME):
+			print('*** AE with name "' + AE_NAME + '" already present in CSE. Please remove it first.')
+			exit()
+
+
+	@classmethod
+	def tearDownClass(cls):
+		NOT.shutdownNotifications()
+		if TestWebSocket.ae:
+			TestWebSocket.ae.deleteFromCSE()
+			TestWebSocket.ae = None
+
+
+	def test_init(self):
+		self.assertIsNotNone(TestWebSocket.session)
+		self.assertIsInstance(TestWebSocket.session.transport, TRN.WebSocketTransport)
+		self.assertIsNotNone(TestWebSocket.cse)
+		self.assertEqual(TestWebSocket.cse.resourceID, CSE_ID)
+
+
+	def test_createAE(self):
+		TestWebSocket.ae = AE(TestWebSocket.cse, resourceName=AE_NAME)
+		self.assertIsNotNone(TestWebSocket.ae)
+		self.assertIsNotNone(TestWebSocket.ae.resourceID)
+		self.assertEqual(TestWebSocket.ae.resourceName, AE_NAME)
+
+
+	def test_createContainer(self):
+		TestWebSocket.cnt = TestWebSocket.ae.addContainer(CNT_NAME)
+		self.assertIsNotNone(TestWebSocket.cnt)
+		self.assertIsNotNone(TestWebSocket.cnt.resourceID)
+
+
+	def test_discovery(self):
+		# the filter criteria are sent as part of the request primitive
+		cnts = TestWebSocket.ae.containers()
+		self.assertEqual(len(cnts), 1)
+		self.assertEqual(cnts[0].resourceID, TestWebSocket.cnt.resourceID)
+
+
+	def test_parallelRequests(self):
+		# all requests are sent over the same connection, and their responses are correlated
+		results = []
+		def addContent(value):
+			cin = TestWebSocket.cnt.addContent(value)
+			results.append(cin is not None and cin.content == value)
+		threads = [ threading.Thread(target=addContent, args=(CIN_CONTENT + str(i),)) for i in range(10) ]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+		self.assertEqual(len(results), 10)
+		self.assertTrue(all(results))
+		self.assertEqual(len(TestWebSocket.cnt.contentInstances()), 10)
+
+
+	def test_sharedConnection(self):
+		session = Session(whost, originator, encoding)
+		self.assertIs(session.transport, TestWebSocket.session.transport)
+		ae = CSEBase(session, CSE_ID).findAE(AE_NAME)
+		self.assertIsNotNone(ae)
+		self.assertEqual(ae.resourceID, TestWebSocket.ae.resourceID)
+
+
+	def test_setupNotifications(self):
+		with self.assertRaises(EXC.ConfigurationError):
+			NOT.setupNotifications(None, server=CON.Sub_server_websocket)
+		self.assertTrue(NOT.setupNotifications(None, server=CON.Sub_server_websocket, session=TestWebSocket.session))
+		self.assertEqual(NOT.getNotificationURI(), originator)
+
+
+	# define a callback function
+	def callback(self, resource):
+		TestWebSocket.callbackResource = resource
+
+
+	def test_reconnect(self):
+		# a lost connection that receives notifications must be re-established without a request
+		self.assertTrue(TestWebSocket.cnt.subscribe(self.callback))
+		transport = TestWebSocket.session.transport
+		key = (TestWebSocket.session.address, TestWebSocket.session.encoding)
+		connection = transport._connections[key]
+		connection._shutdown()
+		self.assertFalse(connection.connected)
+		time.sleep(CON.NETWORK_WEBSOCKET_RECONNECT_DELAY + delayInSec)
+		self.assertIsNot(transport._connections[key], connection)
+		self.assertTrue(transport._connections[key].connected)
+		# the notification for a resource that is created via http must be received over the new connection
+		TestWebSocket.callbackResource = None
+		cnt = Container(CSEBase(Session(host, originator, encoding), CSE_ID), resourceID=TestWebSocket.cnt.resourceID)
+		cin = cnt.addContent(CIN_CONTENT)
+		self.assertIsNotNone(cin)
+		time.sleep(delayInSec)
+		self.assertIsNotNone(TestWebSocket.callbackResource)
+		self.assertEqual(TestWebSocket.callbackResource.resourceID, cin.resourceID)
+		self.assertTrue(TestWebSocket.cnt.unsubscribe())
+
+
+	def test_notify(self):
+		self.assertTrue(TestWebSocket.cnt.subscribe(self.callback))
+		cin = TestWebSocket.cnt.addContent(CIN_CONTENT)
+		self.assertIsNotNone(cin)
+		time.sleep(delayInSec)
+		self.assertIsNotNone(TestWebSocket.callbackResource)
+		self.assertEqual(TestWebSocket.callbackResource.resourceID, cin.resourceID)
+		self.assertEqual(TestWebSocket.callbackResource.content, CIN_CONTENT)
+
+
+	def test_shutdownNotifications(self):
+		NOT.shutdownNotifications()
+		self.assertIsNone(NOT.getNotificationURI())
+
+
+	def test_finit(self):
+		self.assertIsNotNone(TestWebSocket.ae)
+		self.assertTrue(TestWebSocket.ae.deleteFromCSE())
+		TestWebSocket.ae = None
+
+
+if __name__ == '__main__':
+	suite = unittest.TestSuite()
+	suite.addTest(TestWebSocket('test_init'))
+	suite.addTest(TestWebSocket('test_createAE'))
+	suite.addTest(TestWebSocket('test_createContainer'))
+	suite.addTest(TestWebSocket('test_discovery'))
+	suite.addTest(TestWebSocket('test_parallelRequests'))
+	suite.addTest(TestWebSocket('test_sharedConnection'))
+	suite.addTest(TestWebSocket('test_setupNotifications'))
+	suite.addTest(TestWebSocket('test_reconnect'))
+	suite.addTest(TestWebSocket('test_notify'))
+	suite.addTest(TestWebSocket('test_shutdownNotifications'))
+	suite.addTest(TestWebSocket('test_finit'))
+	unittest.TextTestRunner(verbosity=2, failfast=True).run(suite)